@@ -72,6 +72,90 @@ def get_color_for_neighborhood(neighborhood_code):
     except (ValueError, TypeError):
         return '#4caf50'  # Default emerald green for invalid values
 
+def _labels_for(col, label, default):
+    """
+    Map every value of a column through label() by labelling its unique
+    values once; missing values get the default.
+    """
+    codes, uniques = pd.factorize(col)
+    labels = np.array([label(value) for value in uniques] + [default], dtype=object)
+    return labels[codes].tolist()
+
+def _float_or_none(col):
+    values = pd.to_numeric(col, errors='coerce').astype('float64')
+    out = values.astype(object)
+    out[values.isna()] = None
+    return out.tolist()
+
+def _round6(values):
+    """
+    Round a float array to 6 decimals exactly like the builtin round().
+    np.round scales by 1e6 first, which can tip values sitting right on a
+    half-way point, so those few are rounded again with round().
+    """
+    rounded = np.round(values, 6)
+    scaled = values * 1e6
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(values[i]), 6)
+    return rounded.tolist()
+
+def build_features(df, neighborhood_mapping):
+    """
+    Build the GeoJSON features column by column instead of row by row.
+    """
+    lat = pd.to_numeric(df['Latitude'], errors='coerce')
+    lng = pd.to_numeric(df['Longitude'], errors='coerce')
+    keep = lat.notna() & lng.notna()
+    df = df[keep]
+
+    tree_id = df['Tree ID']
+    ids = tree_id.fillna(0).astype('int64').astype(object)
+    ids[tree_id.isna()] = None
+    lats = _round6(lat[keep].to_numpy())
+    lngs = _round6(lng[keep].to_numpy())
+    codes = df['Analysis Neighborhoods']
+
+    columns = zip(
+        ids.tolist(),
+        _labels_for(df['Species'], str, ''),
+        _labels_for(df['Address'], str, ''),
+        _float_or_none(df['DBH']),
+        _labels_for(df['Plant Date'], str, None),
+        _labels_for(df['Site Info'], str, None),
+        _labels_for(df['Legal Status'], str, None),
+        _labels_for(codes, str, None),
+        _labels_for(codes, get_color_for_neighborhood, get_color_for_neighborhood(None)),
+        lats,
+        lngs,
+        _labels_for(codes, lambda code: neighborhood_mapping.get(str(float(code)), 'Unknown'), 'Unknown'),
+    )
+    return [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [lng_, lat_]
+            },
+            "properties": {
+                "id": id_,
+                "species": species,
+                "address": address,
+                "dbh": dbh,
+                "plantDate": plant_date,
+                "siteInfo": site_info,
+                "legalStatus": legal_status,
+                "neighborhood": neighborhood,
+                "color": color,
+                "latitude": lat_,
+                "longitude": lng_,
+                "neighborhood_name": nhood
+            }
+        }
+        for (id_, species, address, dbh, plant_date, site_info, legal_status,
+             neighborhood, color, lat_, lng_, nhood) in columns
+    ]
+
 def convert_to_geojson():
     # Read the cleaned CSV file
     print("Reading cleaned CSV file...")
@@ -83,48 +167,7 @@ def convert_to_geojson():
     
     # Convert to GeoJSON
     print("Converting to GeoJSON...")
-    features = []
-    for _, row in df.iterrows():
-        # Skip rows with invalid coordinates
-        if pd.isna(row['Latitude']) or pd.isna(row['Longitude']):
-            continue
-        
-        # Get neighborhood color
-        neighborhood_code = row['Analysis Neighborhoods']
-        color = get_color_for_neighborhood(neighborhood_code)
-        
-        # Clean and round numeric values
-        lat = round(clean_numeric(row['Latitude']), 6)  # Round to 6 decimal places
-        lng = round(clean_numeric(row['Longitude']), 6)  # Round to 6 decimal places
-        dbh = clean_numeric(row['DBH'])
-        nhood = neighborhood_mapping.get(str(float(neighborhood_code)), 'Unknown')
-        
-        # Skip if coordinates are invalid
-        if lat is None or lng is None:
-            continue
-        
-        feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [lng, lat]
-            },
-            "properties": {
-                "id": int(row['Tree ID']) if pd.notna(row['Tree ID']) else None,
-                "species": str(row['Species']) if pd.notna(row['Species']) else '',
-                "address": str(row['Address']) if pd.notna(row['Address']) else '',
-                "dbh": dbh,
-                "plantDate": str(row['Plant Date']) if pd.notna(row['Plant Date']) else None,
-                "siteInfo": str(row['Site Info']) if pd.notna(row['Site Info']) else None,
-                "legalStatus": str(row['Legal Status']) if pd.notna(row['Legal Status']) else None,
-                "neighborhood": str(neighborhood_code) if pd.notna(neighborhood_code) else None,
-                "color": color,
-                "latitude": lat,
-                "longitude": lng,
-                "neighborhood_name": str(nhood) if nhood is not None else None
-            }
-        }
-        features.append(feature)
+    features = build_features(df, neighborhood_mapping)
     
     # Create the final GeoJSON object
     geojson = {
@@ -0,0 +1,37 @@
+import gzip
+import json
+import time
+from columnar_export import decode_properties, read_columnar
+
+def timed(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def load_geojson():
+    with open('trees.geojson', 'r') as f:
+        return json.load(f)
+
+def benchmark_columnar_export():
+    print(f"{'file':<22}{'bytes':>14}{'gzip bytes':>14}{'decode s':>10}")
+    for path, decode in [('trees.geojson', load_geojson), ('trees.columnar.bin', lambda: read_columnar('trees.columnar.bin'))]:
+        with open(path, 'rb') as f:
+            data = f.read()
+        seconds, _ = timed(decode)
+        print(f"{path:<22}{len(data):>14,}{len(gzip.compress(data, 6)):>14,}{seconds:>10.3f}")
+
+    # Spot-check that the columnar file round-trips the GeoJSON properties
+    features = load_geojson()['features']
+    header, columns = read_columnar('trees.columnar.bin')
+    step = max(1, len(features) // 1000)
+    mismatches = sum(
+        decode_properties(header, columns, i) != features[i]['properties']
+        for i in range(0, len(features), step)
+    )
+    print(f"Property mismatches in sample: {mismatches}")
+
+if __name__ == "__main__":
+    benchmark_columnar_export()
@@ -0,0 +1,39 @@
+import json
+import os
+import time
+import pandas as pd
+from convert_to_geojson import (
+    build_features,
+    build_features_iterrows,
+    genus_to_color_map,
+    load_neighborhood_mapping,
+)
+
+def serialize(features):
+    return json.dumps({"type": "FeatureCollection", "features": features}, separators=(',', ':'))
+
+def benchmark_convert_to_geojson(repeat=3):
+    print("Reading cleaned CSV file...")
+    df = pd.read_csv('cleaned_street_trees.csv')
+    genus_color_map = genus_to_color_map()
+    neighborhood_mapping = load_neighborhood_mapping()
+
+    results = {}
+    for name, build in [('iterrows', build_features_iterrows), ('vectorized', build_features)]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            features = build(df, genus_color_map, neighborhood_mapping)
+            timings.append(time.perf_counter() - start)
+        results[name] = serialize(features)
+        print(f"{name:>10}: best {min(timings):.3f}s over {repeat} runs ({len(features)} features)")
+
+    identical = results['iterrows'] == results['vectorized']
+    print(f"Byte-identical output: {identical}")
+
+    if os.path.exists('trees.geojson'):
+        with open('trees.geojson', 'r') as f:
+            print(f"Matches trees.geojson: {f.read() == results['vectorized']}")
+
+if __name__ == "__main__":
+    benchmark_convert_to_geojson()
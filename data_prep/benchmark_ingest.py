@@ -0,0 +1,45 @@
+import gc
+import time
+import tracemalloc
+import pandas as pd
+from tree_schema import has_pyarrow, load_street_trees
+
+RAW_CSV = 'Street_Tree_List_20250323.csv'
+
+def measure(load, repeat=3):
+    """
+    Return (best seconds, peak traced MB, frame MB) for a loader. Timing
+    runs without tracemalloc, which slows allocation-heavy code down.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    df = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 1e6, df.memory_usage(deep=True).sum() / 1e6
+
+def benchmark_ingest():
+    loaders = [
+        ('untyped read_csv', lambda: pd.read_csv(RAW_CSV, low_memory=False)),
+        ('typed, c engine', lambda: load_street_trees(RAW_CSV)),
+    ]
+    if has_pyarrow():
+        loaders.append(('typed, pyarrow engine', lambda: load_street_trees(RAW_CSV, engine='pyarrow')))
+        # First call writes the Parquet copy, second one reads it
+        load_street_trees(RAW_CSV, parquet_cache=True)
+        loaders.append(('typed, parquet cache', lambda: load_street_trees(RAW_CSV, parquet_cache=True)))
+
+    print(f"{'loader':<24}{'seconds':>10}{'peak MB':>10}{'frame MB':>10}")
+    for name, load in loaders:
+        seconds, peak, size = measure(load)
+        print(f"{name:<24}{seconds:>10.3f}{peak:>10.1f}{size:>10.1f}")
+
+if __name__ == "__main__":
+    benchmark_ingest()
@@ -0,0 +1,93 @@
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from lookup_export import LOOKUP_KEYS, LOOKUP_PATH, decode_lookup
+
+# Parse (and for the compact file, decode) the lookup the way App.tsx does
+NODE_PARSE = """
+const fs = require('fs');
+const text = fs.readFileSync(process.argv[1], 'utf8');
+let best = Infinity;
+for (let run = 0; run < 5; run++) {
+  const start = process.hrtime.bigint();
+  const data = JSON.parse(text);
+  if (!Array.isArray(data)) {
+    const { count, derived, dictionaries, columns } = data;
+    const trees = new Array(count);
+    for (let i = 0; i < count; i++) {
+      const tree = {};
+      for (const key of Object.keys(columns)) {
+        tree[key] = key in dictionaries ? dictionaries[key][columns[key][i]] : columns[key][i];
+      }
+      for (const key of Object.keys(derived)) tree[key] = dictionaries[key][columns[derived[key]][i]];
+      trees[i] = tree;
+    }
+  }
+  best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e9);
+}
+console.log(best);
+"""
+
+def legacy_lookup_text(trees):
+    """
+    trees-lookup.json as generate-trees-lookup.cjs wrote it with
+    JSON.stringify(simplified, null, 2).
+    """
+    entries = []
+    for properties in trees:
+        entry = {
+            key: int(value) if isinstance(value, float) and value.is_integer() else value
+            for key, value in properties.items()
+        }
+        text = json.dumps(entry, indent=2, ensure_ascii=False)
+        entries.append('\n'.join('  ' + line for line in text.split('\n')))
+    return '[\n' + ',\n'.join(entries) + '\n]' if entries else '[]'
+
+def python_parse_seconds(text, decode, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(json.loads(text))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def node_parse_seconds(path):
+    if shutil.which('node') is None:
+        return None
+    result = subprocess.run(['node', '-e', NODE_PARSE, path], capture_output=True, text=True, check=True)
+    return float(result.stdout)
+
+def benchmark_lookup_export(path=LOOKUP_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        compact = f.read()
+    trees = decode_lookup(json.loads(compact))
+
+    # Check the compact file against the GeoJSON it was written with
+    if os.path.exists('trees.geojson'):
+        with open('trees.geojson', 'r') as f:
+            features = json.load(f)['features']
+        expected = [{key: feature['properties'][key] for key in LOOKUP_KEYS} for feature in features]
+        print(f"Lookup matches trees.geojson properties: {trees == expected}")
+
+    legacy = legacy_lookup_text(trees)
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, 'trees-lookup-legacy.json')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            f.write(legacy)
+        rows = [
+            ('indent=2 (old)', legacy, legacy_path, lambda data: data),
+            ('compact', compact, path, decode_lookup),
+        ]
+        print(f"{'format':<16}{'bytes':>14}{'gzip bytes':>14}{'python s':>10}{'node s':>10}")
+        for name, text, file_path, decode in rows:
+            data = text.encode('utf-8')
+            node = node_parse_seconds(file_path)
+            print(f"{name:<16}{len(data):>14,}{len(gzip.compress(data, 6)):>14,}"
+                  f"{python_parse_seconds(text, decode):>10.3f}{node if node is not None else float('nan'):>10.3f}")
+
+if __name__ == "__main__":
+    benchmark_lookup_export()
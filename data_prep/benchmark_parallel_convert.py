@@ -0,0 +1,49 @@
+import argparse
+import os
+import tempfile
+import time
+from convert_to_geojson import (
+    GEOJSON_COLUMNS,
+    genus_to_color_map,
+    iter_frame_chunks,
+    load_neighborhood_mapping,
+    write_geojson,
+)
+from parallel_convert import frame_slices, iter_rendered_chunks, write_rendered
+from tree_schema import load_cleaned_trees
+
+def benchmark_parallel_convert(worker_counts=(1, 2, 4, 8, 16), repeat=3):
+    df = load_cleaned_trees('cleaned_street_trees.csv', columns=GEOJSON_COLUMNS)
+    genus_color_map = genus_to_color_map()
+    neighborhood_mapping = load_neighborhood_mapping()
+    print(f"{len(df)} trees, {os.cpu_count()} CPUs")
+
+    with tempfile.TemporaryDirectory() as directory:
+        serial_path = os.path.join(directory, 'serial.geojson')
+        start = time.perf_counter()
+        write_geojson(iter_frame_chunks(df, genus_color_map, neighborhood_mapping), serial_path)
+        serial = time.perf_counter() - start
+        with open(serial_path, 'rb') as f:
+            expected = f.read()
+        print(f"{'serial':>8}: {serial:.3f}s")
+
+        for workers in worker_counts:
+            path = os.path.join(directory, f'workers-{workers}.geojson')
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                chunks = frame_slices(df, workers)
+                write_rendered(iter_rendered_chunks(chunks, genus_color_map, neighborhood_mapping, workers), path)
+                timings.append(time.perf_counter() - start)
+            with open(path, 'rb') as f:
+                identical = f.read() == expected
+            best = min(timings)
+            print(f"{workers:>8}: best {best:.3f}s over {repeat} runs, {serial / best:.2f}x serial, "
+                  f"identical: {identical}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time GeoJSON conversion with 1, 2, 4, ... worker processes")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    benchmark_parallel_convert(args.workers, args.repeat)
@@ -0,0 +1,54 @@
+import glob
+import importlib.util
+import json
+import os
+import time
+from selectree_parser import PlaywrightExtractor, parse_tree_html
+from selectree_stub_server import FIXTURES_DIR
+
+BASE_URL = "https://selectree.calpoly.edu/tree-detail/"
+
+def load_fixtures():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        tree_id = os.path.splitext(os.path.basename(path))[0]
+        with open(path, 'r') as f:
+            pages[tree_id] = f.read()
+    with open(os.path.join(FIXTURES_DIR, 'expected.json'), 'r') as f:
+        expected = json.load(f)
+    return pages, expected
+
+def parse_all(parse, pages):
+    return {tree_id: parse(html, f"{BASE_URL}{tree_id}") for tree_id, html in pages.items()}
+
+def throughput(parse, pages, seconds=2.0):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        parse_all(parse, pages)
+        count += len(pages)
+    return count / (time.perf_counter() - start)
+
+def benchmark_selectree_parser():
+    pages, expected = load_fixtures()
+    expected = {tree_id: expected.get(tree_id) for tree_id in pages}
+
+    backends = [('html', parse_tree_html)]
+    extractor = None
+    if importlib.util.find_spec('playwright') is not None:
+        extractor = PlaywrightExtractor()
+        backends.append(('playwright', extractor.extract_html))
+    else:
+        print("playwright is not installed, only checking the HTML backend")
+
+    try:
+        for name, parse in backends:
+            records = parse_all(parse, pages)
+            print(f"{name:>10}: records match fixtures: {records == expected}, "
+                  f"{throughput(parse, pages):,.0f} pages/s")
+    finally:
+        if extractor is not None:
+            extractor.__exit__(None, None, None)
+
+if __name__ == "__main__":
+    benchmark_selectree_parser()
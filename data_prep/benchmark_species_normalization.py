@@ -0,0 +1,38 @@
+import time
+import pandas as pd
+from species_normalization import convert_species_format, load_species_corrections, normalize_species
+
+def normalize_chained(species, corrections, drop):
+    """
+    The per-row approach cleanupData.py used: one Series.replace per
+    correction, then an apply over every remaining row.
+    """
+    for old, new in corrections:
+        species = species.replace(old, new)
+    species = species[~species.isin(drop)]
+    return species.apply(convert_species_format)
+
+def benchmark_species_normalization(repeat=5):
+    print("Reading raw CSV file...")
+    species = pd.read_csv('Street_Tree_List_20250323.csv', usecols=['qSpecies'])['qSpecies'].dropna()
+    corrections, drop = load_species_corrections()
+    print(f"{len(species)} rows, {species.nunique()} distinct species")
+
+    def categorical():
+        normalized, keep = normalize_species(species, corrections, drop)
+        return normalized['Species'][keep]
+
+    results = {}
+    for name, run in [('chained', lambda: normalize_chained(species, corrections, drop)), ('categorical', categorical)]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[name] = run()
+            timings.append(time.perf_counter() - start)
+        print(f"{name:>11}: best {min(timings):.4f}s over {repeat} runs")
+
+    same = results['chained'].tolist() == results['categorical'].astype(object).tolist()
+    print(f"Identical species: {same}")
+
+if __name__ == "__main__":
+    benchmark_species_normalization()
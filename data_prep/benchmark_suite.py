@@ -0,0 +1,207 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import benefits
+import clean_trees
+import cleanupData
+import clusters
+import convert_to_geojson
+import facets
+import get_different_species
+import heatmap
+import lookup_export
+import tree_schema
+import validation
+from synthetic_trees import SIZES, generate_street_trees, synthetic_path
+
+HISTORY_PATH = 'benchmark_history.jsonl'
+# Inputs the stages read from the working directory
+INPUT_FILES = ['species_corrections.json', 'neighborhood_mapping.json']
+
+def _geojson(context):
+    genus_color_map = convert_to_geojson.genus_colors(list(context['genus'].keys()))
+    chunks = convert_to_geojson.iter_frame_chunks(context['cleanup'], genus_color_map, context['mapping'])
+    lookup_writer = lookup_export.LookupWriter()
+    count = convert_to_geojson.write_geojson(lookup_writer.tee(chunks), 'trees.geojson')
+    lookup_writer.write()
+    return count
+
+# The pipeline's stages in order: name -> function of the results so far
+STAGES = {
+    'load': lambda c: tree_schema.load_street_trees(c['raw_csv'], parse_dates=False),
+    'validation': lambda c: validation.run_validation(c['load']),
+    'clean_trees': lambda c: clean_trees.clean_trees(c['load']),
+    'cleanup': lambda c: cleanupData.cleanup_data(c['load']),
+    'genus': lambda c: get_different_species.genus_to_species_map(c['cleanup']),
+    'geojson': _geojson,
+    'clusters': lambda c: clusters.build_pyramid(c['cleanup']),
+    'heatmap': lambda c: heatmap.build_heatmaps(c['cleanup'], {'count': ('count', None)}),
+    'facets': lambda c: facets.build_facets(c['cleanup'], c['mapping']),
+    'benefits': lambda c: benefits.estimate_benefits(c['cleanup']['Genus'], c['cleanup']['DBH']),
+}
+
+def current_rss_mb():
+    """
+    Resident set size now, or the peak so far where /proc isn't available.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+class PeakMemory:
+    """
+    Sample the process RSS on a background thread while a stage runs;
+    ru_maxrss only ever gives the peak of the whole run.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0.0
+        self._done = threading.Event()
+
+    def _sample(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, current_rss_mb())
+            self._done.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+def run_stages(raw_csv, rows, stages=STAGES):
+    """
+    Run every stage on one export in a scratch directory. Returns a record
+    per stage with its wall time, peak RSS and throughput.
+    """
+    context = {'raw_csv': os.path.abspath(raw_csv)}
+    records = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        for name in INPUT_FILES:
+            shutil.copy(name, directory)
+        os.chdir(directory)
+        try:
+            context['mapping'] = convert_to_geojson.load_neighborhood_mapping()
+            for name, stage in stages.items():
+                with PeakMemory() as memory:
+                    start = time.perf_counter()
+                    context[name] = stage(context)
+                    seconds = time.perf_counter() - start
+                records.append({
+                    "rows": rows,
+                    "stage": name,
+                    "seconds": round(seconds, 4),
+                    "peak_rss_mb": round(memory.peak, 1),
+                    "rows_per_sec": round(rows / seconds) if seconds else None,
+                })
+        finally:
+            os.chdir(cwd)
+    return records
+
+def read_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def flag_regressions(records, history, threshold=0.2, window=5, min_seconds=0.05):
+    """
+    Compare each record with the median time of the last window runs of
+    the same stage and size on this host. Sets "baseline" and "regression"
+    on the records and returns the regressed ones. Differences under
+    min_seconds are noise, not regressions.
+    """
+    regressed = []
+    for record in records:
+        previous = sorted(
+            past["seconds"] for past in [
+                past for past in history
+                if past["host"] == record["host"] and past["stage"] == record["stage"]
+                and past["rows"] == record["rows"]
+            ][-window:]
+        )
+        record["baseline"] = previous[len(previous) // 2] if previous else None
+        record["regression"] = bool(
+            previous and record["seconds"] > record["baseline"] * (1 + threshold)
+            and record["seconds"] - record["baseline"] > min_seconds
+        )
+        if record["regression"]:
+            regressed.append(record)
+    return regressed
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_suite(sizes=SIZES, threshold=0.2, history_path=HISTORY_PATH, seed=0):
+    """
+    Run the stages at every size, generating missing synthetic exports
+    first, append the results to the history file and return the records
+    that regressed.
+    """
+    run = {
+        "time": datetime.datetime.now().isoformat(timespec='seconds'),
+        "commit": git_commit(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+    }
+    history = read_history(history_path)
+    records = []
+    for rows in sizes:
+        path = synthetic_path(rows)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            print(f"Generating {path}...")
+            generate_street_trees(path, rows, seed)
+        print(f"Running stages on {rows:,} trees...")
+        records += [{**run, **record} for record in run_stages(path, rows)]
+
+    regressed = flag_regressions(records, history, threshold)
+    with open(history_path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+    print(f"\n{'rows':>11} {'stage':<12}{'seconds':>10}{'peak MB':>10}{'rows/s':>13}{'baseline':>10}")
+    for record in records:
+        baseline = f"{record['baseline']:.3f}" if record['baseline'] is not None else '-'
+        flag = f"  REGRESSION (+{threshold:.0%})" if record['regression'] else ''
+        print(f"{record['rows']:>11,} {record['stage']:<12}{record['seconds']:>10.3f}{record['peak_rss_mb']:>10.1f}"
+              f"{record['rows_per_sec'] or 0:>13,}{baseline:>10}{flag}")
+    print(f"\nAppended {len(records)} results to {history_path}")
+    return regressed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every data_prep stage on synthetic exports of several sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown over the baseline that counts as a regression")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fail-on-regression', action='store_true', help="exit with status 1 if any stage regressed")
+    args = parser.parse_args()
+    regressed = benchmark_suite(args.sizes, args.threshold, seed=args.seed)
+    if regressed:
+        print(f"{len(regressed)} stage(s) regressed: "
+              + ', '.join(f"{r['stage']} at {r['rows']:,} rows" for r in regressed))
+        if args.fail_on_regression:
+            sys.exit(1)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import random
+import time
+import numpy as np
+from convert_to_geojson import genus_to_color_map, iter_feature_chunks, load_neighborhood_mapping
+from tree_database import (
+    TREES_DB_PATH,
+    TreeDatabaseWriter,
+    open_tree_database,
+    search_trees,
+    tree_by_id,
+    trees_in_bbox,
+)
+
+def build_database(path=TREES_DB_PATH):
+    start = time.perf_counter()
+    writer = TreeDatabaseWriter(path)
+    for features in iter_feature_chunks('cleaned_street_trees.csv', genus_to_color_map(), load_neighborhood_mapping()):
+        writer.add(features)
+    size = writer.write()
+    print(f"Built {path}: {writer.count} trees, {size:,} bytes in {time.perf_counter() - start:.2f}s")
+
+def sample_queries(connection, count, seed=0):
+    """
+    Realistic queries around random trees: every prefix of a species or
+    street name as it is typed, species-on-street lookups, viewports of a
+    few blocks to a neighborhood, and lookups by Tree ID.
+    """
+    rng = random.Random(seed)
+    trees = connection.execute(
+        'SELECT t.tree_id, s.common_name, s.scientific_name, t.address, t.latitude, t.longitude '
+        'FROM trees t JOIN species s ON s.id = t.species_id'
+    ).fetchall()
+    queries = []
+    while len(queries) < count:
+        tree_id, common, scientific, address, lat, lng = rng.choice(trees)
+        street = ' '.join((address or '').split()[1:])
+        genus = (scientific or '').split(' ')[0]
+        name = rng.choice([common, scientific, street])
+        if name:
+            queries += [('search-as-you-type', lambda c, text=name[:n]: search_trees(c, text))
+                        for n in range(2, len(name) + 1)]
+        if genus and street:
+            queries.append(('species on street', lambda c, g=genus, s=street: search_trees(c, species=g, street=s, limit=None)))
+        half = rng.choice([0.002, 0.005, 0.01])
+        queries.append(('bbox', lambda c, b=(lng - half, lat - half / 2, lng + half, lat + half / 2): trees_in_bbox(c, *b)))
+        queries.append(('by id', lambda c, i=tree_id: tree_by_id(c, i)))
+    return queries[:count]
+
+def benchmark_tree_database(path=TREES_DB_PATH, queries=5000, rebuild=False):
+    if rebuild or not os.path.exists(path):
+        build_database(path)
+    connection = open_tree_database(path)
+    latencies, results = {}, {}
+    for kind, query in sample_queries(connection, queries):
+        start = time.perf_counter()
+        rows = query(connection)
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+        results.setdefault(kind, []).append(len(rows) if isinstance(rows, list) else int(rows is not None))
+
+    print(f"{'query':<20}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'mean rows':>11}")
+    for kind, timings in latencies.items():
+        ms = np.array(timings) * 1000
+        print(f"{kind:<20}{len(ms):>8}{np.percentile(ms, 50):>10.2f}{np.percentile(ms, 99):>10.2f}"
+              f"{ms.max():>10.2f}{np.mean(results[kind]):>11.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure query latency against trees.sqlite")
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--rebuild', action='store_true', help="rebuild trees.sqlite from cleaned_street_trees.csv first")
+    args = parser.parse_args()
+    benchmark_tree_database(queries=args.queries, rebuild=args.rebuild)
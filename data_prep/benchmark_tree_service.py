@@ -0,0 +1,113 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote
+import numpy as np
+from tree_service import GEOJSON_PATH, TreeStore, make_server
+
+def random_query(store, rng):
+    """
+    A query path around a random tree: a viewport, a radius or a nearest-N
+    lookup, sometimes filtered to the tree's species.
+    """
+    row = rng.randrange(len(store))
+    lat, lng = store.lat[row], store.lng[row]
+    kind = rng.choice(['bbox', 'radius', 'nearest'])
+    if kind == 'bbox':
+        half = rng.choice([0.002, 0.005, 0.01])
+        path = f"/trees/bbox?west={lng - half}&south={lat - half / 2}&east={lng + half}&north={lat + half / 2}"
+    elif kind == 'radius':
+        path = f"/trees/radius?lat={lat}&lng={lng}&r={rng.choice([50, 200, 500])}"
+    else:
+        path = f"/trees/nearest?lat={lat}&lng={lng}&n={rng.choice([1, 10, 50])}"
+    if rng.random() < 0.25 and store.species_codes[row] != -1:
+        species = store.species[store.species_codes[row]]
+        path += '&species=' + quote(species)
+    return kind, path
+
+def check_queries(store, samples=200, seed=0):
+    """
+    Compare indexed answers against brute-force scans of every tree.
+    """
+    rng = random.Random(seed)
+    everything = np.arange(len(store))
+    for _ in range(samples):
+        row = rng.randrange(len(store))
+        lat, lng = store.lat[row], store.lng[row]
+        west, south, east, north = lng - 0.004, lat - 0.003, lng + 0.004, lat + 0.003
+        brute = everything[(store.lng >= west) & (store.lng <= east) & (store.lat >= south) & (store.lat <= north)]
+        if not np.array_equal(store.bbox(west, south, east, north), brute):
+            return False
+        distances = store._distances(everything, lat, lng)
+        if set(store.within(lat, lng, 300).tolist()) != set(everything[distances <= 300].tolist()):
+            return False
+        nearest = store.nearest(lat, lng, 20)
+        if not np.allclose(np.sort(distances[nearest]), np.sort(distances)[:20]):
+            return False
+    return True
+
+def load_test(store, clients=8, seconds=5.0, seed=0):
+    """
+    Run keep-alive clients against a local server for a fixed time and
+    return {query kind: [latencies in seconds]} and the elapsed time.
+    """
+    server = make_server(store, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    latencies = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        rng = random.Random(seed + index)
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        local = {}
+        while time.perf_counter() < deadline:
+            kind, path = random_query(store, rng)
+            start = time.perf_counter()
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            local.setdefault(kind, []).append(time.perf_counter() - start)
+            if response.status != 200:
+                raise RuntimeError(f"{path} answered {response.status}")
+        conn.close()
+        with lock:
+            for kind, values in local.items():
+                latencies.setdefault(kind, []).extend(values)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    return latencies, elapsed
+
+def benchmark_tree_service(geojson=GEOJSON_PATH, clients=8, seconds=5.0):
+    start = time.perf_counter()
+    store = TreeStore.from_geojson(geojson)
+    print(f"Loaded {len(store)} trees in {time.perf_counter() - start:.2f}s")
+    print(f"Indexed queries match brute force: {check_queries(store)}")
+
+    latencies, elapsed = load_test(store, clients, seconds)
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests from {clients} clients in {elapsed:.1f}s: {total / elapsed:,.0f} requests/s")
+    for kind in sorted(latencies):
+        values = np.array(latencies[kind]) * 1000
+        print(f"  {kind:>8}: {len(values):>7} requests, p50 {np.percentile(values, 50):6.2f} ms, "
+              f"p99 {np.percentile(values, 99):6.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the tree query service")
+    parser.add_argument('--geojson', default=GEOJSON_PATH)
+    parser.add_argument('--clients', type=int, default=8, help="concurrent keep-alive clients")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    benchmark_tree_service(args.geojson, args.clients, args.seconds)
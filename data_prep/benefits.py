@@ -0,0 +1,153 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from validation import DBH_RANGE
+
+CM_PER_INCH = 2.54
+# San Francisco's mean annual rainfall, almost all of it between October and April
+RAINFALL_MM = 600
+# Open-grown urban trees carry about 80% of the biomass the forest
+# equations predict for their diameter (Nowak 1994)
+URBAN_BIOMASS_FACTOR = 0.8
+# Roots as a share of aboveground biomass (Cairns et al. 1997)
+ROOT_TO_SHOOT = 0.26
+CARBON_FRACTION = 0.5
+
+# Allometric groups: name -> (b0, b1, c0, c1, interception).
+# Aboveground dry biomass in kg is exp(b0 + b1 * ln(DBH in cm)), with
+# Jenkins et al. (2003)'s national coefficients for the nearest species
+# group (palms have none; the woodland group's flat curve stands in).
+# Crown diameter in m is c0 + c1 * DBH in cm, a straight-line fit to
+# street tree crown widths. interception is the share of the rain falling
+# on the crown that the leaves hold and evaporate over a year, lower for
+# trees that are bare through the winter rains.
+GROUPS = {
+    'pine':               (-2.5356, 2.4349, 1.2, 0.15, 0.25),
+    'cypress_cedar':      (-2.0336, 2.2592, 1.0, 0.13, 0.25),
+    'redwood_fir':        (-2.2304, 2.4435, 1.0, 0.11, 0.25),
+    'maple_birch':        (-1.9123, 2.3651, 1.0, 0.20, 0.12),
+    'oak_beech':          (-2.0127, 2.4342, 1.0, 0.22, 0.15),
+    'soft_hardwood':      (-2.2094, 2.3867, 1.0, 0.20, 0.12),
+    'deciduous_hardwood': (-2.4800, 2.4835, 1.0, 0.20, 0.12),
+    'evergreen_hardwood': (-2.4800, 2.4835, 1.0, 0.18, 0.20),
+    'small_evergreen':    (-0.7152, 1.7029, 0.8, 0.18, 0.20),
+    'palm':               (-0.7152, 1.7029, 3.5, 0.03, 0.10),
+}
+DEFAULT_GROUP = 'evergreen_hardwood'  # most of the city's street trees
+GENUS_GROUPS = {
+    **dict.fromkeys(['Pinus'], 'pine'),
+    **dict.fromkeys(['Cupressus', 'Cupressocyparis', 'Hesperocyparis', 'Calocedrus', 'Cedrus', 'Juniperus',
+                     'Thuja', 'Chamaecyparis'], 'cypress_cedar'),
+    **dict.fromkeys(['Sequoia', 'Sequoiadendron', 'Metasequoia', 'Pseudotsuga', 'Abies', 'Picea', 'Tsuga',
+                     'Araucaria', 'Podocarpus', 'Afrocarpus'], 'redwood_fir'),
+    **dict.fromkeys(['Acer', 'Betula'], 'maple_birch'),
+    **dict.fromkeys(['Quercus', 'Fagus', 'Carya', 'Castanea'], 'oak_beech'),
+    **dict.fromkeys(['Populus', 'Salix', 'Alnus', 'Liriodendron'], 'soft_hardwood'),
+    **dict.fromkeys(['Platanus', 'Fraxinus', 'Ulmus', 'Tilia', 'Liquidambar', 'Pyrus', 'Prunus', 'Malus',
+                     'Ginkgo', 'Zelkova', 'Gleditsia', 'Celtis', 'Aesculus', 'Koelreuteria', 'Cercis',
+                     'Crataegus', 'Lagerstroemia', 'Robinia', 'Catalpa', 'Jacaranda', 'Pistacia',
+                     'Styphnolobium', 'Sophora', 'Morus', 'Juglans'], 'deciduous_hardwood'),
+    **dict.fromkeys(['Eucalyptus', 'Corymbia', 'Lophostemon', 'Tristaniopsis', 'Metrosideros', 'Magnolia',
+                     'Ficus', 'Melaleuca', 'Pittosporum', 'Acacia', 'Arbutus', 'Casuarina', 'Lyonothamnus',
+                     'Umbellularia', 'Laurus', 'Schinus', 'Geijera', 'Syzygium', 'Brachychiton', 'Lagunaria',
+                     'Hymenosporum', 'Agonis', 'Persea', 'Grevillea', 'Maytenus', 'Eriobotrya'],
+                    'evergreen_hardwood'),
+    **dict.fromkeys(['Olea', 'Ceanothus', 'Heteromeles', 'Rhamnus', 'Myoporum', 'Leptospermum', 'Callistemon',
+                     'Rhus', 'Rhaphiolepis', 'Ligustrum', 'Nerium', 'Elaeagnus', 'Myrica', 'Citrus',
+                     'Cotoneaster', 'Banksia', 'Leucodendron', 'Fremontodendron', 'Chiranthodendron'],
+                    'small_evergreen'),
+    **dict.fromkeys(['Washingtonia', 'Phoenix', 'Syagrus', 'Archontophoenix', 'Trachycarpus', 'Caryota',
+                     'Cordyline', 'Yucca', 'Chamaerops', 'Butia', 'Dracaena'], 'palm'),
+}
+
+# Per-tree estimate -> unit, in the order they appear in the GeoJSON properties
+BENEFIT_UNITS = {
+    'canopyArea': 'm2',
+    'biomass': 'kg',
+    'carbon': 'kg',
+    'stormwater': 'L/yr',
+}
+BENEFIT_KEYS = list(BENEFIT_UNITS)
+# Decimals kept per tree and in the rollups
+BENEFIT_DECIMALS = {'canopyArea': 1, 'biomass': 1, 'carbon': 1, 'stormwater': 0}
+
+_GROUP_NAMES = list(GROUPS)
+_COEFFICIENTS = np.array([GROUPS[name] for name in _GROUP_NAMES], dtype='float64')
+
+def group_codes(genus):
+    """
+    Return each tree's row of the coefficient table. The genera are
+    factorized so the dictionary lookup runs once per distinct genus.
+    """
+    codes, uniques = pd.factorize(pd.Series(genus, dtype=object))
+    default = _GROUP_NAMES.index(DEFAULT_GROUP)
+    by_genus = np.array([_GROUP_NAMES.index(GENUS_GROUPS.get(name, DEFAULT_GROUP)) for name in uniques] + [default],
+                        dtype='int64')
+    return by_genus[codes]
+
+def estimate_benefits(genus, dbh):
+    """
+    Estimate canopy area (m2), total dry biomass including roots (kg),
+    stored carbon (kg) and rain intercepted (L/yr) for every tree from its
+    genus and DBH in inches, as whole-array operations. DBH is clipped to
+    the range validation accepts, so a typo doesn't yield a tree the size
+    of a building; trees without a DBH get NaN. Returns a DataFrame with
+    one column per BENEFIT_KEYS.
+    """
+    b0, b1, c0, c1, interception = _COEFFICIENTS[group_codes(genus)].T
+    dbh_cm = np.clip(np.asarray(dbh, dtype='float64'), *DBH_RANGE) * CM_PER_INCH
+    crown = c0 + c1 * dbh_cm
+    canopy = np.pi / 4 * crown ** 2
+    biomass = np.exp(b0 + b1 * np.log(dbh_cm)) * URBAN_BIOMASS_FACTOR * (1 + ROOT_TO_SHOOT)
+    return pd.DataFrame({
+        'canopyArea': canopy,
+        'biomass': biomass,
+        'carbon': biomass * CARBON_FRACTION,
+        # m2 of crown times mm of rain is litres
+        'stormwater': canopy * RAINFALL_MM * interception,
+    })
+
+def benefit_properties(benefits):
+    """
+    Per-tree estimates as lists of rounded floats, None where missing, in
+    the form build_features puts in the GeoJSON properties.
+    """
+    properties = {}
+    for key in BENEFIT_KEYS:
+        values = benefits[key].round(BENEFIT_DECIMALS[key])
+        values = values.astype(object).where(values.notna(), None)
+        properties[key] = values.tolist()
+    return properties
+
+def benefit_totals(totals):
+    """
+    Turn a frame of summed estimates indexed by name into {name: {key: total}}.
+    """
+    rounded = {key: totals[key].round(BENEFIT_DECIMALS[key]).tolist() for key in BENEFIT_KEYS}
+    return {
+        name: {key: rounded[key][i] for key in BENEFIT_KEYS}
+        for i, name in enumerate(totals.index.tolist())
+    }
+
+if __name__ == "__main__":
+    # Imported here because facets builds on this module
+    from convert_to_geojson import GEOJSON_COLUMNS, load_neighborhood_mapping
+    from facets import build_facets
+    from tree_schema import load_cleaned_trees
+
+    parser = argparse.ArgumentParser(description="Estimate canopy, carbon and stormwater benefits of the street trees")
+    parser.add_argument('--top', type=int, default=10, help="neighborhoods and species to list")
+    args = parser.parse_args()
+
+    df = load_cleaned_trees('cleaned_street_trees.csv', columns=GEOJSON_COLUMNS)
+    start = time.perf_counter()
+    benefits = build_facets(df, load_neighborhood_mapping())['benefits']
+    print(f"Estimated benefits of {len(df)} trees and rolled them up (with the other facets) "
+          f"in {time.perf_counter() - start:.2f}s")
+    print('Total: ' + ', '.join(f"{benefits['total'][key]:,.0f} {unit} {key}" for key, unit in BENEFIT_UNITS.items()))
+    for title in ['by_neighborhood', 'by_species']:
+        print(f"\nTop {args.top} {title.replace('_', ' ')} by carbon:")
+        top = sorted(benefits[title].items(), key=lambda item: item[1]['carbon'], reverse=True)[:args.top]
+        for name, totals in top:
+            print(f"  {name:<50}{totals['carbon']:>14,.0f} kg{totals['canopyArea']:>14,.0f} m2")
@@ -1,20 +1,13 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from tree_schema import load_street_trees
 
-def clean_trees_data():
-    # Read the CSV file
-    print("Reading CSV file...")
-    df = pd.read_csv('Street_Tree_List_20250323.csv')
-    
-    # Print initial information
-    print("\nInitial data shape:", df.shape)
-    print("\nInitial columns and data types:")
-    print(df.dtypes)
-    
-    # Basic cleaning steps
-    print("\nCleaning data...")
-    
+def clean_trees(df):
+    """
+    Normalize dates, species, address and numeric columns of the raw export.
+    """
+    df = df.copy()
     # Convert date columns to datetime
     date_columns = ['PlantDate']
     for col in date_columns:
@@ -29,7 +22,7 @@ def clean_trees_data():
     address_columns = ['qAddress', 'SiteOrder', 'qSiteInfo']
     for col in address_columns:
         if col in df.columns:
-            if df[col].dtype == 'object':
+            if not pd.api.types.is_numeric_dtype(df[col]):
                 df[col] = df[col].astype(str).str.strip()
     
     # Clean up numeric columns
@@ -39,7 +32,21 @@ def clean_trees_data():
             df[col] = pd.to_numeric(df[col], errors='coerce')
     
     # Remove any completely empty rows
-    df = df.dropna(how='all')
+    return df.dropna(how='all')
+
+def clean_trees_data():
+    # Read the CSV file
+    print("Reading CSV file...")
+    df = load_street_trees('Street_Tree_List_20250323.csv')
+    
+    # Print initial information
+    print("\nInitial data shape:", df.shape)
+    print("\nInitial columns and data types:")
+    print(df.dtypes)
+    
+    # Basic cleaning steps
+    print("\nCleaning data...")
+    df = clean_trees(df)
     
     # Save the cleaned data
     print("\nSaving cleaned data...")
@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from convert_to_geojson import GEOJSON_COLUMNS, genus_to_color_map, select_mappable
+from tree_schema import load_cleaned_trees
+
+CLUSTERS_DIR = 'clusters'
+COORD_SCALE = 1_000_000  # 6 decimal places, same precision as trees.geojson
+
+def mercator_pixels(lng, lat, zoom, tile_size=256):
+    """
+    Web Mercator pixel coordinates of each point at zoom.
+    """
+    scale = tile_size * 2.0 ** zoom
+    x = (lng + 180.0) / 360.0 * scale
+    sin = np.sin(np.radians(lat))
+    y = (0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)) * scale
+    return x, y
+
+class ClusterLevel:
+    """
+    Per-cell totals at one zoom: counts per (cell, genus) plus coordinate
+    and DBH sums per cell. Cells are aligned across zooms, so the level
+    below is built by halving the cell coordinates and summing again.
+    """
+
+    def __init__(self, zoom, cx, cy, genus, counts, lng_sum, lat_sum, dbh_sum, dbh_count):
+        self.zoom = zoom
+        self.cx, self.cy, self.genus, self.counts = cx, cy, genus, counts
+        self.lng_sum, self.lat_sum = lng_sum, lat_sum
+        self.dbh_sum, self.dbh_count = dbh_sum, dbh_count
+
+    @classmethod
+    def from_points(cls, zoom, lng, lat, genus, dbh, cell_size):
+        x, y = mercator_pixels(lng, lat, zoom)
+        cx = (x // cell_size).astype('int64')
+        cy = (y // cell_size).astype('int64')
+        has_dbh = ~np.isnan(dbh)
+        return cls._group(
+            zoom, cx, cy, genus, np.ones(len(lng), dtype='int64'),
+            lng, lat, np.where(has_dbh, dbh, 0.0), has_dbh.astype('int64'),
+        )
+
+    def parent(self):
+        return self._group(
+            self.zoom - 1, self.cx >> 1, self.cy >> 1, self.genus, self.counts,
+            self.lng_sum, self.lat_sum, self.dbh_sum, self.dbh_count,
+        )
+
+    @classmethod
+    def _group(cls, zoom, cx, cy, genus, counts, lng_sum, lat_sum, dbh_sum, dbh_count):
+        # One integer key per (cell, genus); np.unique groups them and
+        # bincount sums every total in a single pass
+        genera = int(genus.max()) + 1 if len(genus) else 1
+        width = int(cx.max()) + 1 if len(cx) else 1
+        keys = (cy * width + cx) * genera + genus
+        unique, inverse = np.unique(keys, return_inverse=True)
+
+        def total(weights):
+            return np.bincount(inverse, weights=weights, minlength=len(unique))
+
+        cell, genus = np.divmod(unique, genera)
+        cy, cx = np.divmod(cell, width)
+        return cls(
+            zoom, cx, cy, genus, total(counts).astype('int64'),
+            total(lng_sum), total(lat_sum), total(dbh_sum), total(dbh_count).astype('int64'),
+        )
+
+    def cells(self):
+        """
+        Collapse the genus rows into one row per cell, returning a
+        DataFrame with the tree count, centroid, dominant genus and mean DBH.
+        """
+        cell = self.cy * (int(self.cx.max()) + 1 if len(self.cx) else 1) + self.cx
+        starts = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]])  # rows are sorted by cell
+        counts = np.add.reduceat(self.counts, starts)
+        dbh_count = np.add.reduceat(self.dbh_count, starts)
+        # Dominant genus: the largest count within each cell's run of rows,
+        # ties going to the lowest genus code
+        cell_of_row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(cell)]))
+        order = np.lexsort((self.genus, -self.counts, cell_of_row))
+        first = order[np.searchsorted(cell_of_row[order], np.arange(len(starts)))]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_dbh = np.add.reduceat(self.dbh_sum, starts) / dbh_count
+        return pd.DataFrame({
+            'lng': np.add.reduceat(self.lng_sum, starts) / counts,
+            'lat': np.add.reduceat(self.lat_sum, starts) / counts,
+            'count': counts,
+            'genus': self.genus[first],
+            'mean_dbh': mean_dbh,
+        })
+
+def build_pyramid(df, min_zoom=10, max_zoom=15, cell_size=64):
+    """
+    Cluster the mappable trees into cell_size-pixel cells at every zoom
+    from max_zoom down to min_zoom. Returns ({zoom: cells DataFrame},
+    genus names indexed by the cells' genus codes).
+    """
+    df = select_mappable(df)
+    genus_codes, genera = pd.factorize(df['Genus'].astype(object).fillna(''))
+    level = ClusterLevel.from_points(
+        max_zoom,
+        df['Longitude'].to_numpy(dtype='float64'),
+        df['Latitude'].to_numpy(dtype='float64'),
+        genus_codes.astype('int64'),
+        pd.to_numeric(df['DBH'], errors='coerce').to_numpy(dtype='float64'),
+        cell_size,
+    )
+    pyramid = {max_zoom: level.cells()}
+    for zoom in range(max_zoom - 1, min_zoom - 1, -1):
+        level = level.parent()
+        pyramid[zoom] = level.cells()
+    return pyramid, list(genera)
+
+def write_pyramid(pyramid, genera, genus_color_map, directory=CLUSTERS_DIR, cell_size=64):
+    """
+    Write one columnar JSON file per zoom plus index.json. Returns the
+    index, which lists each zoom's file, cluster count and size.
+    """
+    os.makedirs(directory, exist_ok=True)
+    colors = [genus_color_map.get(genus, '#000000') for genus in genera]
+    levels = []
+    for zoom in sorted(pyramid):
+        cells = pyramid[zoom]
+        mean_dbh = cells['mean_dbh'].round(1)
+        document = {
+            "zoom": zoom,
+            "count": len(cells),
+            "coordScale": COORD_SCALE,
+            "genera": genera,
+            "colors": colors,
+            "columns": {
+                "longitude": np.rint(cells['lng'].to_numpy() * COORD_SCALE).astype('int64').tolist(),
+                "latitude": np.rint(cells['lat'].to_numpy() * COORD_SCALE).astype('int64').tolist(),
+                "count": cells['count'].tolist(),
+                "genus": cells['genus'].tolist(),
+                "meanDbh": mean_dbh.astype(object).where(mean_dbh.notna(), None).tolist(),
+            },
+        }
+        path = f"z{zoom}.json"
+        text = json.dumps(document, separators=(',', ':'), ensure_ascii=False)
+        with open(os.path.join(directory, path), 'w', encoding='utf-8') as f:
+            f.write(text)
+        levels.append({"zoom": zoom, "path": path, "clusters": len(cells), "bytes": len(text.encode('utf-8'))})
+    index = {"cellSize": cell_size, "minZoom": min(pyramid), "maxZoom": max(pyramid), "levels": levels}
+    with open(os.path.join(directory, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def build_clusters(min_zoom=10, max_zoom=15, cell_size=64):
+    df = load_cleaned_trees('cleaned_street_trees.csv', columns=GEOJSON_COLUMNS)
+    start = time.perf_counter()
+    pyramid, genera = build_pyramid(df, min_zoom, max_zoom, cell_size)
+    elapsed = time.perf_counter() - start
+    index = write_pyramid(pyramid, genera, genus_to_color_map(), cell_size=cell_size)
+    print(f"Built cluster pyramid for zooms {min_zoom}-{max_zoom} in {elapsed:.2f}s")
+    for level in index['levels']:
+        print(f"  z{level['zoom']:<3} {level['clusters']:>7} clusters {level['bytes']:>11,} bytes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute per-zoom tree clusters for low zoom levels")
+    parser.add_argument('--min-zoom', type=int, default=10)
+    parser.add_argument('--max-zoom', type=int, default=15, help="finest zoom that is clustered")
+    parser.add_argument('--cell-size', type=int, default=64, help="cluster cell size in screen pixels")
+    args = parser.parse_args()
+    build_clusters(args.min_zoom, args.max_zoom, args.cell_size)
@@ -0,0 +1,166 @@
+import json
+import struct
+import numpy as np
+import pandas as pd
+from benefits import benefit_properties, estimate_benefits
+from convert_to_geojson import round6, select_mappable
+
+# Binary layout, all little-endian:
+#   MAGIC | uint32 header length | header JSON | padding | column buffers
+# Every column buffer starts on an 8-byte boundary; the header lists each
+# column's dtype, byte offset (from the start of the file) and, for
+# dictionary-encoded columns, the dictionary its codes index into.
+MAGIC = b'SFTREES1'
+COORD_SCALE = 1_000_000  # 6 decimal places, same precision as trees.geojson
+DBH_SCALE = 10  # tenths of an inch
+DBH_MISSING = 65535
+
+def _code_dtype(size):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if size <= np.iinfo(dtype).max + 1:
+            return dtype
+    raise ValueError(f"Dictionary too large: {size}")
+
+def _dictionary_encode(col, label=str, default=None):
+    """
+    Encode a column as codes into a dictionary whose entry 0 is the value
+    used for missing rows.
+    """
+    codes, uniques = pd.factorize(col)
+    dictionary = [default] + [label(value) for value in uniques]
+    return (codes + 1).astype(_code_dtype(len(dictionary))), dictionary
+
+def build_columns(df, genus_color_map, neighborhood_mapping):
+    """
+    Build the columnar arrays and dictionaries for the mappable trees in df.
+    """
+    df = select_mappable(df)
+
+    dbh = pd.to_numeric(df['DBH'], errors='coerce').to_numpy(dtype='float64')
+    dbh = np.where(np.isnan(dbh), DBH_MISSING, np.clip(np.rint(dbh * DBH_SCALE), 0, DBH_MISSING - 1))
+
+    columns = {
+        'id': df['Tree ID'].fillna(0).to_numpy().astype(np.uint32),
+        'longitude': np.rint(round6(df['Longitude'].to_numpy()) * COORD_SCALE).astype(np.int32),
+        'latitude': np.rint(round6(df['Latitude'].to_numpy()) * COORD_SCALE).astype(np.int32),
+        'dbh': dbh.astype(np.uint16),
+    }
+    dictionaries = {}
+    for name, source, default in [
+        ('species', 'Species', ''),
+        ('address', 'Address', ''),
+        ('plantDate', 'Plant Date', None),
+        ('siteInfo', 'Site Info', None),
+        ('legalStatus', 'Legal Status', None),
+        ('neighborhood', 'Analysis Neighborhoods', None),
+    ]:
+        columns[name], dictionaries[name] = _dictionary_encode(df[source], default=default)
+
+    # Genus, colours and neighborhood names are functions of the species and
+    # neighborhood code, so they are stored once per dictionary entry. Genus
+    # is the cleaned column, taken from the first tree of each species.
+    genera = df['Genus'].astype(object).fillna('').to_numpy()
+    entries, first_rows = np.unique(columns['species'], return_index=True)
+    dictionaries['genus'] = [''] * len(dictionaries['species'])
+    for entry, row in zip(entries.tolist(), first_rows.tolist()):
+        dictionaries['genus'][entry] = genera[row]
+    dictionaries['color'] = [genus_color_map.get(genus, '#000000') for genus in dictionaries['genus']]
+    dictionaries['neighborhood_name'] = [
+        neighborhood_mapping.get(str(float(code)), 'Unknown') if code is not None else 'Unknown'
+        for code in dictionaries['neighborhood']
+    ]
+    return columns, dictionaries
+
+def write_columnar(columns, dictionaries, path):
+    """
+    Write columns and dictionaries produced by build_columns to path.
+    Returns the number of bytes written.
+    """
+    count = len(columns['id'])
+    layout = []
+    for name, values in columns.items():
+        layout.append({"name": name, "dtype": values.dtype.str, "nbytes": values.nbytes})
+    header = {
+        "count": count,
+        "coordScale": COORD_SCALE,
+        "dbhScale": DBH_SCALE,
+        "dbhMissing": DBH_MISSING,
+        "columns": layout,
+        "dictionaries": dictionaries,
+    }
+
+    # Offsets depend on the header length, which depends on the offsets;
+    # fix the header size by reserving room for the digits first.
+    for column in layout:
+        column["offset"] = 0
+    size = len(json.dumps(header, separators=(',', ':')).encode('utf-8')) + len(layout) * 12
+    offset = _align(len(MAGIC) + 4 + size)
+    for column in layout:
+        column["offset"] = offset
+        offset = _align(offset + column["nbytes"])
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8').ljust(size)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(encoded)))
+        f.write(encoded)
+        for column, values in zip(layout, columns.values()):
+            f.write(b'\0' * (column["offset"] - f.tell()))
+            f.write(values.tobytes())
+        return f.tell()
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+def read_columnar(path):
+    """
+    Read a file written by write_columnar, returning (header, columns) with
+    each column as a zero-copy NumPy view over the file contents.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a columnar tree file")
+    (size,) = struct.unpack_from('<I', data, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(data[start:start + size])
+    columns = {
+        column["name"]: np.frombuffer(
+            data,
+            dtype=np.dtype(column["dtype"]),
+            count=column["nbytes"] // np.dtype(column["dtype"]).itemsize,
+            offset=column["offset"],
+        )
+        for column in header["columns"]
+    }
+    return header, columns
+
+def decode_properties(header, columns, index):
+    """
+    Rebuild the GeoJSON properties of one tree from the columnar arrays.
+    """
+    dictionaries = header["dictionaries"]
+    species = columns['species'][index]
+    neighborhood = columns['neighborhood'][index]
+    dbh = int(columns['dbh'][index])
+    dbh = None if dbh == header["dbhMissing"] else dbh / header["dbhScale"]
+    lat = round(int(columns['latitude'][index]) / header["coordScale"], 6)
+    lng = round(int(columns['longitude'][index]) / header["coordScale"], 6)
+    # Not stored: the benefit estimates follow from the genus and DBH
+    benefits = benefit_properties(estimate_benefits([dictionaries['genus'][species]],
+                                                    [np.nan if dbh is None else dbh]))
+    return {
+        "id": int(columns['id'][index]),
+        "species": dictionaries['species'][species],
+        "address": dictionaries['address'][columns['address'][index]],
+        "dbh": dbh,
+        "plantDate": dictionaries['plantDate'][columns['plantDate'][index]],
+        "siteInfo": dictionaries['siteInfo'][columns['siteInfo'][index]],
+        "legalStatus": dictionaries['legalStatus'][columns['legalStatus'][index]],
+        "neighborhood": dictionaries['neighborhood'][neighborhood],
+        "color": dictionaries['color'][species],
+        "latitude": lat,
+        "longitude": lng,
+        "neighborhood_name": dictionaries['neighborhood_name'][neighborhood],
+        **{key: values[0] for key, values in benefits.items()},
+    }
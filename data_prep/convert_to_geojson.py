@@ -1,8 +1,15 @@
+import argparse
 import pandas as pd
 import json
 import numpy as np
 from datetime import datetime
 import colorsys
+from tree_schema import CLEANED_DTYPES, load_cleaned_trees
+from extract_neighborhoods import fill_missing_codes, load_neighborhood_index
+from lookup_export import LOOKUP_PATH, LookupWriter
+from benefits import BENEFIT_KEYS, benefit_properties, estimate_benefits
+from species_matcher import SELECTREE_PATH
+from tree_database import TREES_DB_PATH, TreeDatabaseWriter
 
 def clean_numeric(value):
     if pd.isna(value) or value == '' or value is None:
@@ -19,38 +26,138 @@ def hsl_to_hex(h, s, l):
     r, g, b = colorsys.hls_to_rgb(h / 360, l / 100, s / 100)
     return '#{:02x}{:02x}{:02x}'.format(int(r * 255), int(g * 255), int(b * 255))
 
-def genus_to_color_map():
+def genus_colors(genus_list):
     """
     Generate a {genus: hex_color} mapping.
     """
-    with open('genus_list.json', 'r') as f:
-        genus_list = json.load(f)
     total = len(genus_list)
     sorted_genuses = sorted(genus_list)
-    genus_colors = {}
+    color_map = {}
 
     for i, genus in enumerate(sorted_genuses):
         hue = int((360 * i) / total)
         saturation = 40
         lightness = 60
         hex_color = hsl_to_hex(hue, saturation, lightness)
-        genus_colors[genus] = hex_color
+        color_map[genus] = hex_color
 
-    return genus_colors
+    return color_map
 
-def convert_to_geojson():
-    # Read the cleaned CSV file
-    print("Reading cleaned CSV file...")
-    df = pd.read_csv('cleaned_street_trees.csv')
-    genus_color_map = genus_to_color_map()
+def genus_to_color_map():
+    with open('genus_list.json', 'r') as f:
+        return genus_colors(json.load(f))
 
-    # Load neighborhood mapping
-    with open('neighborhood_mapping.json', 'r') as f:
-        neighborhood_mapping = json.load(f)
-    
-    # Convert to GeoJSON
-    print("Converting to GeoJSON...")
+def _labels_for(col, label, default):
+    """
+    Map every value of a column through label() by labelling its unique
+    values once; missing values get the default.
+    """
+    codes, uniques = pd.factorize(col)
+    labels = np.array([label(value) for value in uniques] + [default], dtype=object)
+    return labels[codes].tolist()
+
+def _float_or_none(col):
+    values = pd.to_numeric(col, errors='coerce').astype('float64')
+    out = values.astype(object)
+    out[values.isna()] = None
+    return out.tolist()
+
+def round6(values):
+    """
+    Round a float array to 6 decimals exactly like the builtin round().
+    np.round scales by 1e6 first, which can tip values sitting right on a
+    half-way point, so those few are rounded again with round().
+    """
+    rounded = np.round(values, 6)
+    scaled = values * 1e6
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(values[i]), 6)
+    return rounded
+
+def select_mappable(df):
+    """
+    Drop potential sites and rows without usable coordinates, leaving
+    Latitude/Longitude as floats.
+    """
+    lat = pd.to_numeric(df['Latitude'], errors='coerce')
+    lng = pd.to_numeric(df['Longitude'], errors='coerce')
+    keep = (df['Species'] != 'Potential Site (Potential Site)') & lat.notna() & lng.notna()
+    return df[keep].assign(Latitude=lat[keep], Longitude=lng[keep])
+
+def build_features(df, genus_color_map, neighborhood_mapping):
+    """
+    Build the GeoJSON features column by column instead of row by row.
+    """
+    df = select_mappable(df)
+
+    tree_id = df['Tree ID']
+    ids = tree_id.fillna(0).astype('int64').astype(object)
+    ids[tree_id.isna()] = None
+    lats = round6(df['Latitude'].to_numpy()).tolist()
+    lngs = round6(df['Longitude'].to_numpy()).tolist()
+    # Genus comes from species normalization in cleanupData rather than
+    # being parsed out of Species again. The CSV reads an empty genus back
+    # as missing, and '' is a genus of its own in the colour map
+    genera = df['Genus'].astype(object).fillna('')
+    colors = _labels_for(genera, lambda genus: genus_color_map.get(genus, '#000000'), '#000000')
+    nhoods = _labels_for(
+        pd.to_numeric(df['Analysis Neighborhoods'], errors='coerce'),
+        lambda code: neighborhood_mapping.get(str(float(code)), 'Unknown'),
+        'Unknown',
+    )
+    genus = _labels_for(genera, str, '')
+    benefits = benefit_properties(estimate_benefits(genus, pd.to_numeric(df['DBH'], errors='coerce')))
+
+    columns = zip(
+        ids.tolist(),
+        _labels_for(df['Species'], str, ''),
+        _labels_for(df['Address'], str, ''),
+        _float_or_none(df['DBH']),
+        _labels_for(df['Plant Date'], str, None),
+        _labels_for(df['Site Info'], str, None),
+        _labels_for(df['Legal Status'], str, None),
+        _labels_for(df['Analysis Neighborhoods'], str, None),
+        colors,
+        lats,
+        lngs,
+        nhoods,
+        zip(*(benefits[key] for key in BENEFIT_KEYS)),
+    )
+    return [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [lng_, lat_]
+            },
+            "properties": {
+                "id": id_,
+                "species": species,
+                "address": address,
+                "dbh": dbh,
+                "plantDate": plant_date,
+                "siteInfo": site_info,
+                "legalStatus": legal_status,
+                "neighborhood": neighborhood,
+                "color": color,
+                "latitude": lat_,
+                "longitude": lng_,
+                "neighborhood_name": nhood,
+                **dict(zip(BENEFIT_KEYS, tree_benefits))
+            }
+        }
+        for (id_, species, address, dbh, plant_date, site_info, legal_status,
+             neighborhood, color, lat_, lng_, nhood, tree_benefits) in columns
+    ]
+
+def build_features_iterrows(df, genus_color_map, neighborhood_mapping):
+    """
+    Original row-by-row conversion, kept as the reference for
+    benchmark_convert_to_geojson.py.
+    """
     features = []
+    genera, dbhs = [], []
     for _, row in df.iterrows():
         # Skip rows with invalid coordinates
         if row['Species'] == 'Potential Site (Potential Site)':
@@ -60,9 +167,7 @@ def convert_to_geojson():
         
         # Get neighborhood color
         neighborhood_code = row['Analysis Neighborhoods']
-        common_name = row['Species'].split('(')[0].strip()
-        scientific_name = row['Species'].split('(')[1].strip(')') if '(' in row['Species'] else ''
-        genus = scientific_name.split(' ')[0] if ' ' in scientific_name else ''
+        genus = str(row['Genus']) if pd.notna(row['Genus']) else ''
         color = genus_color_map.get(genus, '#000000')
         
         # Clean and round numeric values
@@ -74,15 +179,6 @@ def convert_to_geojson():
         # Skip if coordinates are invalid
         if lat is None or lng is None:
             continue
-
-        species = row['Species']
-        # camel case species
-        if '(' in species:
-            common, scientific = species.split('(', 1)
-            common = ' '.join(word.capitalize() for word in common.strip().split(' '))
-            species = f"{common} ({scientific.strip()}"
-        else:
-            species = ' '.join(word.capitalize() for word in species.split(' '))
         
         feature = {
             "type": "Feature",
@@ -106,19 +202,170 @@ def convert_to_geojson():
             }
         }
         features.append(feature)
-    
-    # Create the final GeoJSON object
-    geojson = {
-        "type": "FeatureCollection",
-        "features": features
+        genera.append(genus)
+        dbhs.append(dbh if dbh is not None else np.nan)
+
+    # Benefit estimates for all the rows at once
+    benefits = benefit_properties(estimate_benefits(genera, dbhs))
+    for feature, values in zip(features, zip(*(benefits[key] for key in BENEFIT_KEYS))):
+        feature['properties'].update(zip(BENEFIT_KEYS, values))
+    return features
+
+def load_neighborhood_mapping():
+    with open('neighborhood_mapping.json', 'r') as f:
+        return json.load(f)
+
+# Columns of cleaned_street_trees.csv that end up in the output (Genus
+# through the colours and benefit estimates)
+GEOJSON_COLUMNS = [
+    'Tree ID', 'Species', 'Address', 'DBH', 'Plant Date', 'Site Info',
+    'Legal Status', 'Analysis Neighborhoods', 'Latitude', 'Longitude', 'Genus',
+]
+
+def coerce_cleaned_dtypes(df):
+    """
+    Give an in-memory cleaned frame the numeric dtypes the CSV is read
+    with, so it converts exactly like cleaned_street_trees.csv would.
+    """
+    numeric = {
+        col: dtype for col, dtype in CLEANED_DTYPES.items()
+        if col in df.columns and dtype in ('float64', 'Int64')
     }
+    return df.astype(numeric)
+
+def iter_frame_chunks(df, genus_color_map, neighborhood_mapping, chunksize=50000):
+    """
+    Yield lists of features built from successive row ranges of df.
+    """
+    df = coerce_cleaned_dtypes(df)
+    for start in range(0, len(df), chunksize):
+        yield build_features(df.iloc[start:start + chunksize], genus_color_map, neighborhood_mapping)
+
+def iter_cleaned_chunks(path, neighborhood_mapping, chunksize=50000, neighborhood_index=None):
+    """
+    Yield successive chunks of the cleaned CSV. With a neighborhood_index,
+    trees without an Analysis Neighborhoods code get the code of the
+    polygon they stand in.
+    """
+    for chunk in load_cleaned_trees(path, columns=GEOJSON_COLUMNS, chunksize=chunksize):
+        if neighborhood_index is not None:
+            chunk['Analysis Neighborhoods'] = fill_missing_codes(chunk, neighborhood_index, neighborhood_mapping)
+        yield chunk
+
+def iter_feature_chunks(path, genus_color_map, neighborhood_mapping, chunksize=50000, neighborhood_index=None):
+    """
+    Yield lists of features built from successive chunks of the cleaned CSV.
+    """
+    for chunk in iter_cleaned_chunks(path, neighborhood_mapping, chunksize, neighborhood_index):
+        yield build_features(chunk, genus_color_map, neighborhood_mapping)
+
+def write_geojson(feature_chunks, path, ndjson=False):
+    """
+    Stream feature chunks to disk as they are produced, so only one chunk is
+    held in memory at a time. Writes a FeatureCollection byte-identical to
+    json.dump with minimal separators, or one feature per line when ndjson
+    is set. Returns the number of features written.
+    """
+    count = 0
+    with open(path, 'w') as f:
+        if not ndjson:
+            f.write('{"type":"FeatureCollection","features":[')
+        for features in feature_chunks:
+            if not features:
+                continue
+            if ndjson:
+                f.write(''.join(json.dumps(feature, separators=(',', ':')) + '\n' for feature in features))
+            else:
+                if count:
+                    f.write(',')
+                f.write(json.dumps(features, separators=(',', ':'))[1:-1])
+            count += len(features)
+        if not ndjson:
+            f.write(']}')
+    return count
+
+def convert_to_geojson(ndjson=False, chunksize=50000, columnar=False, locate_neighborhoods=False, shards=False,
+                       lookup=True, workers=1, sqlite=False, selectree_path=SELECTREE_PATH):
+    genus_color_map = genus_to_color_map()
+
+    # Load neighborhood mapping
+    neighborhood_mapping = load_neighborhood_mapping()
+    neighborhood_index = load_neighborhood_index() if locate_neighborhoods else None
     
-    # Save to file with minimal whitespace
-    print("Saving GeoJSON file...")
-    with open('trees.geojson', 'w') as f:
-        json.dump(geojson, f, separators=(',', ':'))  # Use minimal separators
+    # Read the cleaned CSV in chunks and stream each one straight to disk
+    output_path = 'trees.ndjson' if ndjson else 'trees.geojson'
+    print(f"Converting cleaned CSV file to {output_path}...")
+    if shards:
+        # Imported here because shards builds on this module
+        from shards import SHARDS_DIR, ShardWriter, print_partition_sizes
+        shard_writer = ShardWriter()
+    if lookup:
+        lookup_writer = LookupWriter()
+    if sqlite:
+        database_writer = TreeDatabaseWriter(selectree_path=selectree_path)
+    # Imported here because parallel_convert builds on this module. Every
+    # chunk is serialized once, and that text goes to both trees.geojson
+    # and the shards
+    from parallel_convert import iter_rendered_chunks, render_chunks, write_rendered
+    if workers > 1:
+        # The workers take the CSV chunks as the reader produces them
+        chunks = iter_cleaned_chunks('cleaned_street_trees.csv', neighborhood_mapping, chunksize, neighborhood_index)
+        rendered_chunks = iter_rendered_chunks(chunks, genus_color_map, neighborhood_mapping, workers)
+    else:
+        rendered_chunks = render_chunks(iter_feature_chunks('cleaned_street_trees.csv', genus_color_map,
+                                                            neighborhood_mapping, chunksize, neighborhood_index))
+    if shards:
+        rendered_chunks = shard_writer.tee_rendered(rendered_chunks)
+    if lookup:
+        rendered_chunks = lookup_writer.tee_rendered(rendered_chunks)
+    if sqlite:
+        rendered_chunks = database_writer.tee_rendered(rendered_chunks)
+    count = write_rendered(rendered_chunks, output_path, ndjson=ndjson)
     
-    print(f"Converted {len(features)} trees to GeoJSON format")
+    print(f"Converted {count} trees to GeoJSON format")
+
+    if lookup:
+        size = lookup_writer.write(LOOKUP_PATH)
+        print(f"Wrote {LOOKUP_PATH} ({size} bytes)")
+
+    if sqlite:
+        size = database_writer.write()
+        print(f"Wrote {TREES_DB_PATH} ({size} bytes)")
+
+    if shards:
+        manifest = shard_writer.write()
+        print(f"Wrote neighborhood, genus and species shards to {SHARDS_DIR}/ (see manifest.json):")
+        print_partition_sizes(manifest)
+
+    if columnar:
+        # Imported here because columnar_export builds on this module
+        from columnar_export import build_columns, write_columnar
+        print("Writing columnar export to trees.columnar.bin...")
+        df = load_cleaned_trees('cleaned_street_trees.csv', columns=GEOJSON_COLUMNS)
+        if neighborhood_index is not None:
+            df['Analysis Neighborhoods'] = fill_missing_codes(df, neighborhood_index, neighborhood_mapping)
+        columns, dictionaries = build_columns(df, genus_color_map, neighborhood_mapping)
+        size = write_columnar(columns, dictionaries, 'trees.columnar.bin')
+        print(f"Wrote {len(columns['id'])} trees ({size} bytes) to trees.columnar.bin")
 
 if __name__ == "__main__":
-    convert_to_geojson() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert cleaned_street_trees.csv to GeoJSON")
+    parser.add_argument('--ndjson', action='store_true', help="write newline-delimited GeoJSON to trees.ndjson")
+    parser.add_argument('--chunksize', type=int, default=50000, help="rows read from the CSV per chunk")
+    parser.add_argument('--columnar', action='store_true', help="also write the compact binary trees.columnar.bin")
+    parser.add_argument('--locate-neighborhoods', action='store_true',
+                        help="fill missing neighborhood codes from the Analysis Neighborhoods polygons")
+    parser.add_argument('--shards', action='store_true',
+                        help="also write per-neighborhood, per-genus and per-species GeoJSON shards")
+    parser.add_argument('--no-lookup', action='store_true', help="skip writing trees-lookup.json")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="convert CSV chunks in this many worker processes (1 converts them serially)")
+    parser.add_argument('--sqlite', action='store_true',
+                        help="also write trees.sqlite with R*Tree and full-text indexes")
+    parser.add_argument('--selectree', default=SELECTREE_PATH,
+                        help="SelecTree records whose synonyms trees.sqlite makes searchable")
+    args = parser.parse_args()
+    convert_to_geojson(ndjson=args.ndjson, chunksize=args.chunksize, columnar=args.columnar,
+                       locate_neighborhoods=args.locate_neighborhoods, shards=args.shards,
+                       lookup=not args.no_lookup, workers=args.workers, sqlite=args.sqlite,
+                       selectree_path=args.selectree)
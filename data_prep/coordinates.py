@@ -0,0 +1,116 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tree_schema import load_street_trees
+
+# XCoord/YCoord in the export are NAD83 California State Plane Zone III
+# (EPSG:2227), US survey feet: Lambert Conformal Conic on GRS80
+SEMI_MAJOR_AXIS = 6378137.0
+FLATTENING = 1 / 298.257222101
+ECCENTRICITY = np.sqrt(FLATTENING * (2 - FLATTENING))
+US_FOOT = 1200 / 3937  # metres
+STANDARD_PARALLELS = (37 + 4 / 60, 38 + 26 / 60)
+ORIGIN = (-120.5, 36.5)  # longitude, latitude
+FALSE_EASTING = 2_000_000.0  # metres
+FALSE_NORTHING = 500_000.0  # metres
+
+TOLERANCE_M = 25.0
+MISMATCHES_PATH = 'coordinate_mismatches.csv'
+
+def _m(phi):
+    return np.cos(phi) / np.sqrt(1 - (ECCENTRICITY * np.sin(phi)) ** 2)
+
+def _t(phi):
+    e_sin = ECCENTRICITY * np.sin(phi)
+    return np.tan(np.pi / 4 - phi / 2) / ((1 - e_sin) / (1 + e_sin)) ** (ECCENTRICITY / 2)
+
+def _cone_constants():
+    phi1, phi2 = np.radians(STANDARD_PARALLELS)
+    n = (np.log(_m(phi1)) - np.log(_m(phi2))) / (np.log(_t(phi1)) - np.log(_t(phi2)))
+    a_f = SEMI_MAJOR_AXIS * _m(phi1) / (n * _t(phi1) ** n)
+    rho0 = a_f * _t(np.radians(ORIGIN[1])) ** n
+    return n, a_f, rho0
+
+CONE_N, CONE_AF, CONE_RHO0 = _cone_constants()
+
+def lnglat_to_state_plane(lng, lat):
+    """
+    Project WGS84 longitude/latitude arrays to State Plane X/Y in US feet.
+    NAD83 and WGS84 differ by about a metre here, well inside the tolerance.
+    """
+    rho = CONE_AF * _t(np.radians(lat)) ** CONE_N
+    theta = CONE_N * np.radians(np.asarray(lng, dtype='float64') - ORIGIN[0])
+    x = FALSE_EASTING + rho * np.sin(theta)
+    y = FALSE_NORTHING + CONE_RHO0 - rho * np.cos(theta)
+    return x / US_FOOT, y / US_FOOT
+
+def state_plane_to_lnglat(x, y, iterations=6):
+    """
+    Inverse of lnglat_to_state_plane over whole arrays. Latitude is solved
+    by fixed-point iteration on the conformal latitude, a fixed number of
+    steps for every element (each step gains several digits; 6 is well
+    below a millimetre).
+    """
+    dx = np.asarray(x, dtype='float64') * US_FOOT - FALSE_EASTING
+    dy = CONE_RHO0 - (np.asarray(y, dtype='float64') * US_FOOT - FALSE_NORTHING)
+    rho = np.hypot(dx, dy)
+    t = (rho / CONE_AF) ** (1 / CONE_N)
+    lng = ORIGIN[0] + np.degrees(np.arctan2(dx, dy) / CONE_N)
+    phi = np.pi / 2 - 2 * np.arctan(t)
+    for _ in range(iterations):
+        e_sin = ECCENTRICITY * np.sin(phi)
+        phi = np.pi / 2 - 2 * np.arctan(t * ((1 - e_sin) / (1 + e_sin)) ** (ECCENTRICITY / 2))
+    return lng, np.degrees(phi)
+
+def recover_coordinates(df, tolerance_m=TOLERANCE_M):
+    """
+    Fill missing Latitude/Longitude from XCoord/YCoord, projecting every row
+    with usable X/Y in one pass. Returns (df, recovered, mismatched):
+    boolean masks of the rows that were filled, and of the rows whose
+    lat/long and X/Y are both present but more than tolerance_m apart.
+    Frames without XCoord/YCoord come back unchanged.
+    """
+    none = pd.Series(False, index=df.index)
+    if 'XCoord' not in df.columns or 'YCoord' not in df.columns:
+        return df, none, none
+    lat = pd.to_numeric(df['Latitude'], errors='coerce')
+    lng = pd.to_numeric(df['Longitude'], errors='coerce')
+    x = pd.to_numeric(df['XCoord'], errors='coerce')
+    y = pd.to_numeric(df['YCoord'], errors='coerce')
+    # Unset coordinates show up as blanks or zeros
+    has_xy = (x > 0) & (y > 0)
+    has_lnglat = lat.notna() & lng.notna() & (lat != 0) & (lng != 0)
+
+    projected_lng, projected_lat = state_plane_to_lnglat(x.to_numpy(), y.to_numpy())
+    recovered = has_xy & ~has_lnglat
+    # Compare in the plane: both sides in feet, so the distance is direct
+    check_x, check_y = lnglat_to_state_plane(lng.to_numpy(), lat.to_numpy())
+    distance = np.hypot(check_x - x.to_numpy(), check_y - y.to_numpy()) * US_FOOT
+    mismatched = has_xy & has_lnglat & pd.Series(distance > tolerance_m, index=df.index)
+
+    df = df.assign(
+        Latitude=lat.mask(recovered, np.round(projected_lat, 6)),
+        Longitude=lng.mask(recovered, np.round(projected_lng, 6)),
+    )
+    return df, recovered, mismatched
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recover missing tree coordinates from State Plane X/Y")
+    parser.add_argument('raw_csv', nargs='?', default='Street_Tree_List_20250323.csv')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE_M, help="metres between lat/long and X/Y before a row is flagged")
+    args = parser.parse_args()
+
+    raw = load_street_trees(args.raw_csv, parse_dates=False)
+    start = time.perf_counter()
+    df, recovered, mismatched = recover_coordinates(raw, args.tolerance)
+    elapsed = time.perf_counter() - start
+    print(f"Recovered coordinates for {int(recovered.sum())} of {len(df)} trees in {elapsed:.3f}s")
+    print(f"{int(mismatched.sum())} trees have lat/long more than {args.tolerance:g} m from their X/Y")
+    if mismatched.any():
+        x, y = lnglat_to_state_plane(df['Longitude'].to_numpy(dtype='float64'), df['Latitude'].to_numpy(dtype='float64'))
+        offsets = np.hypot(x - df['XCoord'].to_numpy(dtype='float64'), y - df['YCoord'].to_numpy(dtype='float64')) * US_FOOT
+        columns = ['TreeID', 'qAddress', 'Latitude', 'Longitude', 'XCoord', 'YCoord']
+        report = df.loc[mismatched, columns].assign(OffsetMetres=np.round(offsets[mismatched.to_numpy()], 1))
+        report.to_csv(MISMATCHES_PATH, index=False)
+        print(f"Wrote them to {MISMATCHES_PATH}")
@@ -1,9 +1,16 @@
+import argparse
 import csv
+import re
 import sys
 import json
+import time
+import numpy as np
+import pandas as pd
 
-def extract_neighborhoods():
-    # Increase the field size limit
+NEIGHBORHOODS_CSV = 'Analysis_Neighborhoods_20250329.csv'
+
+def _raise_field_size_limit():
+    # the_geom fields hold whole multipolygons, far past csv's default limit
     maxInt = sys.maxsize
     while True:
         try:
@@ -11,11 +18,173 @@ def extract_neighborhoods():
             break
         except OverflowError:
             maxInt = int(maxInt/10)
-    
-    # Read the CSV file
-    with open('Analysis_Neighborhoods_20250329.csv', 'r') as file:
+
+def read_neighborhoods(path=NEIGHBORHOODS_CSV):
+    """
+    Return [(nhood name, WKT multipolygon)] in file order.
+    """
+    _raise_field_size_limit()
+    with open(path, 'r') as file:
         reader = csv.DictReader(file)
-        neighborhoods = [row['nhood'] for row in reader]
+        return [(row['nhood'], row['the_geom']) for row in reader]
+
+def parse_rings(wkt):
+    """
+    Parse the rings of a WKT (MULTI)POLYGON into (n, 2) lng/lat arrays.
+    Outer rings and holes are returned alike: the even-odd test in
+    NeighborhoodIndex tells them apart by itself.
+    """
+    return [
+        np.array(ring.replace(',', ' ').split(), dtype='float64').reshape(-1, 2)
+        for ring in re.findall(r'\(([^()]+)\)', wkt)
+    ]
+
+class NeighborhoodIndex:
+    """
+    Point-in-polygon lookup over every neighborhood boundary at once.
+    Polygon edges are bucketed into horizontal bands, so a point is only
+    tested against the edges crossing its own band, and the tests for all
+    points of a band run as one NumPy even-odd ray cast.
+    """
+
+    def __init__(self, names, rings, bands=512):
+        """
+        names: neighborhood names; rings: one list of rings per name.
+        """
+        self.names = list(names)
+        starts, ends, owners = [], [], []
+        for owner, polygon_rings in enumerate(rings):
+            for ring in polygon_rings:
+                starts.append(ring)
+                ends.append(np.roll(ring, -1, axis=0))  # closes the ring if needed
+                owners.append(np.full(len(ring), owner))
+        start, end, owner = np.concatenate(starts), np.concatenate(ends), np.concatenate(owners)
+        # Horizontal edges never cross a horizontal ray
+        sloped = start[:, 1] != end[:, 1]
+        start, end, owner = start[sloped], end[sloped], owner[sloped]
+
+        self.y_min = min(start[:, 1].min(), end[:, 1].min())
+        self.y_max = max(start[:, 1].max(), end[:, 1].max())
+        self.bands = bands
+        self.band_height = (self.y_max - self.y_min) / bands or 1.0
+        low = self._band(np.minimum(start[:, 1], end[:, 1]))
+        high = self._band(np.maximum(start[:, 1], end[:, 1]))
+
+        # Repeat every edge once per band it spans, then group by band and
+        # by neighborhood within a band
+        spans = high - low + 1
+        edge = np.repeat(np.arange(len(owner)), spans)
+        band = np.repeat(low, spans) + np.arange(len(edge)) - np.repeat(np.cumsum(spans) - spans, spans)
+        order = np.lexsort((owner[edge], band))
+        edge, band = edge[order], band[order]
+        self.band_starts = np.searchsorted(band, np.arange(bands + 1))
+        self.x0, self.y0 = start[edge, 0], start[edge, 1]
+        self.x1, self.y1 = end[edge, 0], end[edge, 1]
+        self.owner = owner[edge]
+
+    def _band(self, y):
+        return np.clip(((y - self.y_min) / self.band_height).astype('int64'), 0, self.bands - 1)
+
+    def locate(self, lng, lat, max_cells=4_000_000):
+        """
+        Return the index into names of the neighborhood containing each
+        point, or -1 for points outside every neighborhood or missing.
+        """
+        lng = np.asarray(lng, dtype='float64')
+        lat = np.asarray(lat, dtype='float64')
+        result = np.full(len(lat), -1, dtype='int64')
+        candidates = np.flatnonzero(np.isfinite(lng) & (lat >= self.y_min) & (lat <= self.y_max))
+        bands = self._band(lat[candidates])
+        order = np.argsort(bands, kind='stable')
+        candidates, bands = candidates[order], bands[order]
+        bounds = np.searchsorted(bands, np.arange(self.bands + 1))
+
+        for band in range(self.bands):
+            points = candidates[bounds[band]:bounds[band + 1]]
+            lo, hi = self.band_starts[band], self.band_starts[band + 1]
+            if not len(points) or lo == hi:
+                continue
+            x0, y0, x1, y1 = self.x0[lo:hi], self.y0[lo:hi], self.x1[lo:hi], self.y1[lo:hi]
+            owner = self.owner[lo:hi]
+            # Edges are grouped by neighborhood, so crossings are summed per
+            # neighborhood with one reduceat over each group's first edge
+            groups = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+            step = max(1, max_cells // (hi - lo))
+            for first in range(0, len(points), step):
+                chunk = points[first:first + step]
+                px, py = lng[chunk, None], lat[chunk, None]
+                straddles = (y0 > py) != (y1 > py)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    x_cross = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+                crossings = np.add.reduceat(straddles & (px < x_cross), groups, axis=1, dtype='int32')
+                inside = crossings % 2 == 1
+                hit = inside.any(axis=1)
+                result[chunk[hit]] = owner[groups][inside[hit].argmax(axis=1)]
+        return result
+
+def load_neighborhood_index(path=NEIGHBORHOODS_CSV):
+    neighborhoods = read_neighborhoods(path)
+    return NeighborhoodIndex(
+        [name for name, _ in neighborhoods],
+        [parse_rings(wkt) for _, wkt in neighborhoods],
+    )
+
+def locate_codes(index, neighborhood_mapping, lng, lat):
+    """
+    Return the Analysis Neighborhoods code (as a float) of the neighborhood
+    containing each point, NaN where none does.
+    """
+    code_for_name = {name: float(code) for code, name in neighborhood_mapping.items()}
+    codes = np.array([code_for_name.get(name, np.nan) for name in index.names] + [np.nan])
+    return codes[index.locate(lng, lat)]
+
+def fill_missing_codes(df, index, neighborhood_mapping):
+    """
+    Return df's Analysis Neighborhoods codes with the missing ones filled
+    in from the tree's location.
+    """
+    codes = pd.to_numeric(df['Analysis Neighborhoods'], errors='coerce')
+    missing = codes.isna().to_numpy()
+    located = locate_codes(
+        index, neighborhood_mapping,
+        pd.to_numeric(df['Longitude'], errors='coerce').to_numpy()[missing],
+        pd.to_numeric(df['Latitude'], errors='coerce').to_numpy()[missing],
+    )
+    codes = codes.astype('float64').to_numpy(copy=True)
+    codes[missing] = located
+    return pd.Series(codes, index=df.index)
+
+def assign_neighborhoods(trees_path='cleaned_street_trees.csv', neighborhoods_path=NEIGHBORHOODS_CSV):
+    """
+    Locate every tree in the neighborhood polygons and cross-check the
+    result against the codes DPW provides.
+    """
+    from tree_schema import load_cleaned_trees
+    with open('neighborhood_mapping.json', 'r') as f:
+        neighborhood_mapping = json.load(f)
+    trees = load_cleaned_trees(trees_path, columns=['Tree ID', 'Analysis Neighborhoods', 'Latitude', 'Longitude'])
+
+    start = time.perf_counter()
+    index = load_neighborhood_index(neighborhoods_path)
+    built = time.perf_counter()
+    located = locate_codes(index, neighborhood_mapping, trees['Longitude'].to_numpy(), trees['Latitude'].to_numpy())
+    elapsed = time.perf_counter() - built
+
+    unknown = sorted(set(index.names) - set(neighborhood_mapping.values()))
+    if unknown:
+        print(f"Neighborhoods missing from neighborhood_mapping.json: {', '.join(unknown)}")
+    dpw = pd.to_numeric(trees['Analysis Neighborhoods'], errors='coerce').to_numpy()
+    has_dpw, has_located = ~np.isnan(dpw), ~np.isnan(located)
+    print(f"Built index over {len(index.x0)} band edges in {built - start:.2f}s, "
+          f"located {len(trees)} trees in {elapsed:.2f}s")
+    print(f"  agree with DPW code     {np.sum(has_dpw & has_located & (dpw == located)):>8}")
+    print(f"  disagree with DPW code  {np.sum(has_dpw & has_located & (dpw != located)):>8}")
+    print(f"  filled missing code     {np.sum(~has_dpw & has_located):>8}")
+    print(f"  outside every polygon   {np.sum(~has_located):>8}")
+    return located
+
+def extract_neighborhoods():
+    neighborhoods = [name for name, _ in read_neighborhoods()]
     
     # Create index to neighborhood mapping (1-based index with decimals)
     # e.g. 1.0: "Bayview Hunters Point" instead of 1: "Bayview Hunters Point"
@@ -33,4 +202,23 @@ def extract_neighborhoods():
     print("Created neighborhood to index mapping in neighborhood_mapping.json")
 
 if __name__ == "__main__":
-    extract_neighborhoods() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Extract Analysis Neighborhoods and locate trees in them")
+    parser.add_argument('--assign', action='store_true',
+                        help="locate every cleaned tree in the neighborhood polygons and compare with the DPW codes")
+    parser.add_argument('--boundaries', action='store_true',
+                        help="write simplified boundary GeoJSON, labels and bounding boxes to neighborhoods/")
+    parser.add_argument('--tolerances', type=float, nargs='+', default=None,
+                        help="simplification tolerances in metres, one file each")
+    args = parser.parse_args()
+    if args.boundaries:
+        # Imported here because neighborhood_boundaries builds on this module
+        from neighborhood_boundaries import BOUNDARIES_DIR, TOLERANCES, export_boundaries, print_levels
+        start = time.perf_counter()
+        index = export_boundaries(tolerances=args.tolerances or TOLERANCES)
+        print(f"Wrote {len(index['levels'])} boundary levels for {len(index['neighborhoods'])} neighborhoods "
+              f"to {BOUNDARIES_DIR}/ in {time.perf_counter() - start:.2f}s")
+        print_levels(index)
+    elif args.assign:
+        assign_neighborhoods()
+    else:
+        extract_neighborhoods() 
\ No newline at end of file
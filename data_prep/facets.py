@@ -0,0 +1,95 @@
+import json
+import time
+import pandas as pd
+from benefits import BENEFIT_KEYS, BENEFIT_UNITS, benefit_totals, estimate_benefits
+from convert_to_geojson import GEOJSON_COLUMNS, load_neighborhood_mapping, select_mappable
+from get_different_species import genus_to_species_map
+from tree_schema import load_cleaned_trees, parse_plant_dates
+
+FACETS_PATH = 'facets.json'
+DBH_QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+def _quantiles(values):
+    values = values.dropna()
+    if values.empty:
+        return None
+    return [round(float(q), 2) for q in values.quantile(DBH_QUANTILES)]
+
+def build_facets(df, neighborhood_mapping):
+    """
+    Aggregate the mappable trees (the ones in trees.geojson) into the
+    counts and lists the map's filters need, and the canopy, carbon and
+    stormwater estimates summed per species and per neighborhood.
+    Everything per species or per neighborhood comes from one groupby over
+    (species, neighborhood) that counts and sums together.
+    """
+    genus_to_species = genus_to_species_map(df)
+    df = select_mappable(df)
+    codes = pd.to_numeric(df['Analysis Neighborhoods'], errors='coerce')
+    names = {float(code): name for code, name in neighborhood_mapping.items()}
+    species = df['Species'].astype(object).fillna('').astype(str)
+    dbh = pd.to_numeric(df['DBH'], errors='coerce')
+    trees = pd.DataFrame({
+        'species': species,
+        'neighborhood': codes.map(names).fillna('Unknown'),
+        'dbh': dbh,
+        'year': parse_plant_dates(df['Plant Date']).dt.year,
+        'count': 1,
+    })
+    benefits = estimate_benefits(df['Genus'], dbh)
+    for key in BENEFIT_KEYS:
+        trees[key] = benefits[key].to_numpy()
+
+    cross = trees.groupby(['species', 'neighborhood'], sort=True)[['count'] + BENEFIT_KEYS].sum()
+    species_totals = cross.groupby(level='species').sum()
+    neighborhood_totals = cross.groupby(level='neighborhood').sum()
+    species_counts = species_totals['count']
+    neighborhood_counts = neighborhood_totals['count']
+    crosstab = {}
+    for (species, neighborhood), count in cross['count'].items():
+        crosstab.setdefault(species, {})[neighborhood] = int(count)
+
+    dbh_by_species = trees.groupby('species', sort=True)['dbh'].quantile(DBH_QUANTILES).unstack().dropna()
+    years = trees['year'].dropna().astype('int64').value_counts().sort_index()
+
+    return {
+        "total": int(len(trees)),
+        "species": {species: int(count) for species, count in species_counts.items() if species},
+        "neighborhoods": {name: int(count) for name, count in neighborhood_counts.items()},
+        "species_by_neighborhood": {species: counts for species, counts in crosstab.items() if species},
+        "genus_to_species": {
+            genus: sorted(name for name in species if name)
+            for genus, species in sorted(genus_to_species.items()) if any(species)
+        },
+        "dbh_quantiles": {
+            "quantiles": DBH_QUANTILES,
+            "all": _quantiles(trees['dbh']),
+            "by_species": {
+                species: [round(q, 2) for q in row]
+                for species, row in zip(dbh_by_species.index, dbh_by_species.to_numpy().tolist())
+                if species
+            },
+        },
+        "plant_years": {
+            "counts": {str(year): int(count) for year, count in years.items()},
+            "unknown": int(trees['year'].isna().sum()),
+        },
+        "benefits": {
+            "units": BENEFIT_UNITS,
+            "total": benefit_totals(cross.sum().to_frame('all').T)['all'],
+            "by_species": {name: totals for name, totals in benefit_totals(species_totals).items() if name},
+            "by_neighborhood": benefit_totals(neighborhood_totals),
+        },
+    }
+
+def write_facets(facets, path=FACETS_PATH):
+    with open(path, 'w') as f:
+        json.dump(facets, f, separators=(',', ':'), ensure_ascii=False)
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    df = load_cleaned_trees('cleaned_street_trees.csv', columns=GEOJSON_COLUMNS)
+    facets = build_facets(df, load_neighborhood_mapping())
+    write_facets(facets)
+    print(f"Wrote {FACETS_PATH} ({len(facets['species'])} species, {len(facets['neighborhoods'])} neighborhoods, "
+          f"{facets['total']} trees) in {time.perf_counter() - start:.2f}s")
@@ -2,50 +2,35 @@ import pandas as pd
 import json
 import numpy as np
 from datetime import datetime
-import matplotlib.pyplot as plt
 import colorsys
+from tree_schema import load_cleaned_trees
 
-def clean_numeric(value):
-    if pd.isna(value) or value == '' or value is None:
-        return None
-    try:
-        return float(value)
-    except (ValueError, TypeError):
-        return None
+def genus_to_species_map(df):
+    """
+    Group the species of every tree with coordinates by their cleaned
+    Genus. Genera and species keep the order they first appear in.
+    """
+    lat = pd.to_numeric(df['Latitude'], errors='coerce')
+    lng = pd.to_numeric(df['Longitude'], errors='coerce')
+    located = df.loc[lat.notna() & lng.notna(), ['Species', 'Genus']].drop_duplicates('Species')
 
-def get_different_species():
-    # Read the cleaned CSV file
-    print("Reading cleaned CSV file...")
-    df = pd.read_csv('cleaned_street_trees.csv')
+    genus_to_species, seen = {}, set()
+    for name, genus in zip(located['Species'], located['Genus']):
+        name = str(name) if pd.notna(name) else ''
+        if name not in seen:
+            seen.add(name)
+            genus_to_species.setdefault(str(genus) if pd.notna(genus) else '', []).append(name)
+    return genus_to_species
 
-    genus_to_species = {}
-    
-    for _, row in df.iterrows():
-        # Skip rows with invalid coordinates
-        if pd.isna(row['Latitude']) or pd.isna(row['Longitude']):
-            continue
-        
-        # Clean and round numeric values
-        lat = round(clean_numeric(row['Latitude']), 6)  # Round to 6 decimal places
-        lng = round(clean_numeric(row['Longitude']), 6)  # Round to 6 decimal places
-        dbh = clean_numeric(row['DBH'])
-        
-        # Skip if coordinates are invalid
-        if lat is None or lng is None:
-            continue
-        
-        species = str(row['Species']) if pd.notna(row['Species']) else ''
-        common_name  = species.split('(')[0].strip()
-        scientific_name = species.split('(')[1].strip(')') if '(' in species else ''
-        genus = scientific_name.split(' ')[0] if ' ' in scientific_name else ''
-        if genus not in genus_to_species:
-            genus_to_species[genus] = set()
-        genus_to_species[genus].add(species)
-    
-    number_of_species = 0
-    for genus in genus_to_species:
-        number_of_species += len(genus_to_species[genus])
-        genus_to_species[genus] = list(genus_to_species[genus])
+def load_species_genus(path='genus_to_species.json'):
+    """
+    Invert genus_to_species.json into {species: genus}.
+    """
+    with open(path, 'r') as f:
+        return {species: genus for genus, names in json.load(f).items() for species in names}
+
+def write_genus_files(genus_to_species):
+    number_of_species = sum(len(species) for species in genus_to_species.values())
 
     print(f"Number of species: {number_of_species}")
     print("Saving genus_to_species.json file...")
@@ -59,6 +44,12 @@ def get_different_species():
     
     print(f"Converted {len(genus_to_species)} species to genus_to_species format")
 
+def get_different_species():
+    # Read the cleaned CSV file
+    print("Reading cleaned CSV file...")
+    df = load_cleaned_trees('cleaned_street_trees.csv', columns=['Species', 'Genus', 'Latitude', 'Longitude'])
+    write_genus_files(genus_to_species_map(df))
+
 def hsl_to_hex(h, s, l):
     """
     Convert HSL (degrees, %, %) to HEX color.
@@ -66,26 +57,30 @@ def hsl_to_hex(h, s, l):
     r, g, b = colorsys.hls_to_rgb(h / 360, l / 100, s / 100)
     return '#{:02x}{:02x}{:02x}'.format(int(r * 255), int(g * 255), int(b * 255))
 
-def genus_to_color_map():
+def genus_colors(genus_list):
     """
     Generate a {genus: hex_color} mapping.
     """
-    with open('genus_list.json', 'r') as f:
-        genus_list = json.load(f)
     total = len(genus_list)
     sorted_genuses = sorted(genus_list)
-    genus_colors = {}
+    color_map = {}
 
     for i, genus in enumerate(sorted_genuses):
         hue = int((360 * i) / total)
         saturation = 40
         lightness = 60
         hex_color = hsl_to_hex(hue, saturation, lightness)
-        genus_colors[genus] = hex_color
+        color_map[genus] = hex_color
     
-    return genus_colors
+    return color_map
+
+def genus_to_color_map():
+    with open('genus_list.json', 'r') as f:
+        return genus_colors(json.load(f))
 
 def visualize_genus_colors(genus_color_map, columns=5):
+    import matplotlib.pyplot as plt
+
     print(genus_color_map)
     genuses = list(genus_color_map.keys())
     colors = [genus_color_map[genus] for genus in genuses]
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import struct
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from clusters import mercator_pixels
+from convert_to_geojson import GEOJSON_COLUMNS, select_mappable
+from tree_schema import load_cleaned_trees
+
+HEATMAP_DIR = 'heatmap'
+WIDTHS = [256, 512, 1024]
+# Smallest extent in degrees (about 100 m), so a single tree or trees all on
+# one spot still get an image with a sensible shape
+MIN_SPAN = 0.001
+
+def density_grid(x, y, weights, extent, width, height):
+    """
+    Sum weights into a height x width grid over extent = (x0, y0, x1, y1)
+    with one bincount over flattened cell indexes. Row 0 is the top (y0).
+    """
+    x0, y0, x1, y1 = extent
+    col = ((x - x0) / (x1 - x0) * width).astype('int64')
+    row = ((y - y0) / (y1 - y0) * height).astype('int64')
+    # Points on the far edge belong to the last cell, as in np.histogram2d
+    col[x == x1] = width - 1
+    row[y == y1] = height - 1
+    inside = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+    cells = row[inside] * width + col[inside]
+    return np.bincount(cells, weights=weights[inside], minlength=width * height).reshape(height, width)
+
+def gaussian_kernel(sigma):
+    radius = max(1, int(np.ceil(3 * sigma)))
+    taps = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (taps / sigma) ** 2)
+    return kernel / kernel.sum()
+
+def gaussian_blur(grid, sigma):
+    """
+    Separable Gaussian blur: one 1-D pass along rows, one along columns,
+    each a weighted sum of shifted copies of the zero-padded grid.
+    """
+    if sigma <= 0:
+        return grid
+    kernel = gaussian_kernel(sigma)
+    radius = len(kernel) // 2
+    for axis in (0, 1):
+        padding = [(0, 0), (0, 0)]
+        padding[axis] = (radius, radius)
+        padded = np.pad(grid, padding)
+        length = grid.shape[axis]
+        grid = sum(
+            weight * np.take(padded, np.arange(tap, tap + length), axis=axis)
+            for tap, weight in enumerate(kernel)
+        )
+    return grid
+
+def to_uint8(grid, percentile=99.5):
+    """
+    Scale densities to 0-255 with the given percentile of the non-empty
+    cells at full intensity, so a few dense blocks don't wash out the rest.
+    """
+    positive = grid[grid > 0]
+    if positive.size == 0:
+        return np.zeros(grid.shape, dtype=np.uint8)
+    top = np.percentile(positive, percentile)
+    return np.clip(np.rint(grid / top * 255), 0, 255).astype(np.uint8)
+
+def write_png(path, image):
+    """
+    Write a 2-D uint8 array as an 8-bit grayscale PNG.
+    """
+    height, width = image.shape
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    # Every scanline starts with filter type 0 (none)
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), image]).tobytes()
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, 9)))
+        f.write(chunk(b'IEND', b''))
+
+def padded_range(low, high, span=MIN_SPAN):
+    """
+    Widen (low, high) about its middle to at least span.
+    """
+    if high - low >= span:
+        return low, high
+    middle = (low + high) / 2
+    return middle - span / 2, middle + span / 2
+
+def build_heatmaps(df, layers, widths=WIDTHS, sigma=1.5, fmt='png', directory=HEATMAP_DIR):
+    """
+    Rasterize the mappable trees once per layer and width. layers maps a
+    layer name to (weight, genus): weight is 'count' or 'dbh', genus None
+    for every tree. Writes <layer>-<width>.png (or .u8) and index.json with
+    each image's corner coordinates for a map image source. Without any
+    mappable trees index.json lists no images and no coordinates.
+    """
+    df = select_mappable(df)
+    os.makedirs(directory, exist_ok=True)
+    if df.empty:
+        index = {"format": fmt, "coordinates": None, "images": []}
+        with open(os.path.join(directory, 'index.json'), 'w') as f:
+            json.dump(index, f, indent=2)
+        return index
+
+    lng = df['Longitude'].to_numpy(dtype='float64')
+    lat = df['Latitude'].to_numpy(dtype='float64')
+    west, east = padded_range(lng.min(), lng.max())
+    south, north = padded_range(lat.min(), lat.max())
+    # Grid in Web Mercator so the image lines up with the map when stretched
+    # between its corners
+    x, y = mercator_pixels(lng, lat, 0)
+    (x0, x1), (y1, y0) = mercator_pixels(np.array([west, east]), np.array([south, north]), 0)
+    extent = (x0, y0, x1, y1)
+    aspect = (extent[3] - extent[1]) / (extent[2] - extent[0])
+    genus = df['Genus'].astype(object).fillna('').to_numpy()
+    dbh = pd.to_numeric(df['DBH'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+
+    images = []
+    for name, (weight, genus_filter) in layers.items():
+        keep = np.ones(len(x), dtype=bool) if genus_filter is None else genus == genus_filter
+        weights = dbh[keep] if weight == 'dbh' else np.ones(int(keep.sum()))
+        for width in widths:
+            height = max(1, int(round(width * aspect)))
+            grid = density_grid(x[keep], y[keep], weights, extent, width, height)
+            image = to_uint8(gaussian_blur(grid, sigma * width / WIDTHS[0]))
+            path = f"{name}-{width}.{'png' if fmt == 'png' else 'u8'}"
+            if fmt == 'png':
+                write_png(os.path.join(directory, path), image)
+            else:
+                image.tofile(os.path.join(directory, path))
+            images.append({
+                "layer": name, "weight": weight, "genus": genus_filter,
+                "path": path, "width": width, "height": height,
+                "bytes": os.path.getsize(os.path.join(directory, path)),
+            })
+    index = {
+        "format": fmt,
+        # top-left, top-right, bottom-right, bottom-left, as map image sources take them
+        "coordinates": [[west, north], [east, north], [east, south], [west, south]],
+        "images": images,
+    }
+    with open(os.path.join(directory, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rasterize tree density into heatmap images")
+    parser.add_argument('--weight', choices=['count', 'dbh'], default='count', help="what each tree adds to its cell")
+    parser.add_argument('--genus', action='append', default=[], help="also write a layer for this genus (repeatable)")
+    parser.add_argument('--widths', type=int, nargs='+', default=WIDTHS)
+    parser.add_argument('--sigma', type=float, default=1.5, help="blur radius in pixels at 256 px wide, 0 for none")
+    parser.add_argument('--format', choices=['png', 'raw'], default='png')
+    args = parser.parse_args()
+
+    df = load_cleaned_trees('cleaned_street_trees.csv', columns=GEOJSON_COLUMNS)
+    layers = {args.weight: (args.weight, None)}
+    layers.update({f"{args.weight}-{genus.lower()}": (args.weight, genus) for genus in args.genus})
+    start = time.perf_counter()
+    index = build_heatmaps(df, layers, args.widths, args.sigma, args.format)
+    print(f"Wrote {len(index['images'])} heatmap images to {HEATMAP_DIR}/ in {time.perf_counter() - start:.2f}s")
+    for image in index['images']:
+        print(f"  {image['path']:<28} {image['width']:>5} x {image['height']:<5} {image['bytes']:>9,} bytes")
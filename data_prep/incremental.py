@@ -0,0 +1,172 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+import pandas as pd
+import benefits
+import cleanupData
+import convert_to_geojson
+import coordinates
+import get_different_species
+import lookup_export
+import species_normalization
+import tree_schema
+from get_different_species import genus_to_species_map
+from pipeline import file_hash, module_hash, stage_key
+
+SNAPSHOT_PATH = os.path.join('.incremental', 'snapshot.pkl')
+RAW_CSV = 'Street_Tree_List_20250323.csv'
+
+def _hash_files(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def context_key(raw, corrections, drop):
+    """
+    Hash everything that affects trees outside their own row: the code
+    (with every data_prep module it imports), the species corrections, the
+    neighborhood mapping and the set of genera (genus colours are spread
+    over the sorted list, so a new genus recolours everything, but the
+    order trees appear in doesn't matter). When it changes the next run has
+    to be a full rebuild.
+    """
+    species, keep = species_normalization.normalize_species(raw['qSpecies'], corrections, drop)
+    recovered, _, _ = coordinates.recover_coordinates(raw.filter(['Latitude', 'Longitude', 'XCoord', 'YCoord']))
+    located = pd.DataFrame({
+        'Species': species['Species'],
+        'Genus': species['Genus'],
+        'Latitude': recovered['Latitude'],
+        'Longitude': recovered['Longitude'],
+    })[keep]
+    genus_list = list(genus_to_species_map(located).keys())
+    # Not module_hash of this script, which would take in pipeline and with
+    # it every other stage
+    modules = [benefits, cleanupData, convert_to_geojson, coordinates, get_different_species, lookup_export,
+               species_normalization, tree_schema]
+    code = stage_key(file_hash(__file__), *(module_hash(module) for module in modules))
+    data = _hash_files(['species_corrections.json', 'neighborhood_mapping.json'])
+    return stage_key(code, data, *sorted(genus_list)), genus_list
+
+def row_hashes(raw):
+    """
+    One 64-bit hash per raw row, indexed by TreeID.
+    """
+    hashes = pd.util.hash_pandas_object(raw, index=False)
+    return pd.Series(hashes.to_numpy(), index=raw['TreeID'].to_numpy())
+
+def convert_rows(raw, genus_list, neighborhood_mapping):
+    """
+    Clean and convert raw rows, returning their feature text and lookup
+    values (a tuple per tree, in LOOKUP_KEYS order) as Series indexed by
+    Tree ID, in row order.
+    """
+    cleaned = convert_to_geojson.coerce_cleaned_dtypes(cleanupData.cleanup_data(raw))
+    genus_color_map = convert_to_geojson.genus_colors(genus_list)
+    features = convert_to_geojson.build_features(cleaned, genus_color_map, neighborhood_mapping)
+    ids = [feature['properties']['id'] for feature in features]
+    keys = lookup_export.LOOKUP_KEYS
+    return (
+        pd.Series([json.dumps(f, separators=(',', ':')) for f in features], index=ids, dtype=object),
+        pd.Series([tuple(f['properties'][key] for key in keys) for f in features], index=ids, dtype=object),
+    )
+
+def write_outputs(features, lookup):
+    with open('trees.geojson', 'w') as f:
+        f.write('{"type":"FeatureCollection","features":[')
+        f.write(','.join(features))
+        f.write(']}')
+    rows = lookup.tolist()
+    columns = {key: [row[i] for row in rows] for i, key in enumerate(lookup_export.LOOKUP_KEYS)}
+    lookup_export.write_lookup(lookup_export.build_lookup(columns))
+
+def load_snapshot():
+    if not os.path.exists(SNAPSHOT_PATH):
+        return None
+    with open(SNAPSHOT_PATH, 'rb') as f:
+        return pickle.load(f)
+
+def save_snapshot(snapshot):
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+    with open(SNAPSHOT_PATH + '.tmp', 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(SNAPSHOT_PATH + '.tmp', SNAPSHOT_PATH)
+
+def incremental_rebuild(raw_csv=RAW_CSV, full=False, verify=False):
+    """
+    Rebuild trees.geojson and trees-lookup.json from a new export, cleaning
+    and converting only the TreeIDs that were added or modified since the
+    stored snapshot, and write the changes to trees-delta.json.
+    """
+    start = time.perf_counter()
+    raw = tree_schema.load_street_trees(raw_csv, parse_dates=False)
+    corrections, drop = species_normalization.load_species_corrections()
+    neighborhood_mapping = convert_to_geojson.load_neighborhood_mapping()
+    key, genus_list = context_key(raw, corrections, drop)
+    hashes = row_hashes(raw)
+    snapshot = load_snapshot()
+
+    if snapshot is None or snapshot['key'] != key or full or not hashes.index.is_unique:
+        reason = (
+            "no snapshot" if snapshot is None else
+            "requested" if full else
+            "duplicate TreeIDs" if not hashes.index.is_unique else
+            "code, corrections, mapping or genus list changed"
+        )
+        print(f"Full rebuild ({reason})...")
+        features, lookup = convert_rows(raw, genus_list, neighborhood_mapping)
+        delta = None
+    else:
+        old_hashes = snapshot['hashes']
+        added = hashes.index.difference(old_hashes.index)
+        removed = old_hashes.index.difference(hashes.index)
+        common = hashes.index.intersection(old_hashes.index)
+        modified = common[hashes[common].to_numpy() != old_hashes[common].to_numpy()]
+        print(f"{len(added)} added, {len(modified)} modified, {len(removed)} removed TreeIDs")
+
+        changed = raw[raw['TreeID'].isin(added.union(modified))]
+        new_features, new_lookup = convert_rows(changed, genus_list, neighborhood_mapping)
+
+        # Keep the stored text of untouched trees and lay everything out in
+        # the new export's row order, as a full rebuild would
+        stale = removed.union(modified)
+        order = raw['TreeID'].to_numpy()
+        features = pd.concat([snapshot['features'].drop(stale, errors='ignore'), new_features])
+        lookup = pd.concat([snapshot['lookup'].drop(stale, errors='ignore'), new_lookup])
+        features = features.reindex(order).dropna()
+        lookup = lookup.reindex(order).dropna()
+
+        # Trees that are modified but no longer mappable leave the map too
+        gone = stale.difference(new_features.index).intersection(snapshot['features'].index)
+        delta = {
+            "added": [json.loads(new_features[i]) for i in added if i in new_features.index],
+            "modified": [json.loads(new_features[i]) for i in modified if i in new_features.index],
+            "removed": [int(i) for i in gone],
+        }
+
+    write_outputs(features, lookup)
+    if delta is not None:
+        with open('trees-delta.json', 'w') as f:
+            json.dump(delta, f, separators=(',', ':'))
+        print(f"Wrote trees-delta.json ({len(delta['added'])} added, "
+              f"{len(delta['modified'])} modified, {len(delta['removed'])} removed)")
+    save_snapshot({'key': key, 'hashes': hashes, 'features': features, 'lookup': lookup})
+    print(f"Wrote {len(features)} trees in {time.perf_counter() - start:.2f}s")
+
+    if verify:
+        full_features, full_lookup = convert_rows(raw, genus_list, neighborhood_mapping)
+        same = full_features.tolist() == features.tolist() and full_lookup.tolist() == lookup.tolist()
+        print(f"Matches a full rebuild: {same}")
+        return same
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally rebuild trees.geojson from a new Street Tree List export")
+    parser.add_argument('--raw-csv', default=RAW_CSV, help="Street Tree List export to rebuild from")
+    parser.add_argument('--full', action='store_true', help="ignore the snapshot and rebuild everything")
+    parser.add_argument('--verify', action='store_true', help="compare the result against a full rebuild")
+    args = parser.parse_args()
+    incremental_rebuild(raw_csv=args.raw_csv, full=args.full, verify=args.verify)
@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+LOOKUP_PATH = 'trees-lookup.json'
+COORD_SCALE = 1_000_000  # 6 decimal places, same precision as trees.geojson
+
+# Properties kept in trees-lookup.json, in the order the old
+# generate-trees-lookup.cjs wrote them
+LOOKUP_KEYS = [
+    'id', 'species', 'address', 'dbh', 'plantDate', 'siteInfo', 'legalStatus',
+    'neighborhood', 'color', 'latitude', 'longitude', 'neighborhood_name',
+]
+# Repeated strings stored once in a dictionary and referenced by index
+DICTIONARY_KEYS = ['species', 'plantDate', 'siteInfo', 'legalStatus', 'neighborhood']
+# Keys that are a function of a dictionary key, stored as a second
+# dictionary in step with it instead of per tree
+DERIVED_KEYS = {'color': 'species', 'neighborhood_name': 'neighborhood'}
+
+def _dictionary_encode(values):
+    """
+    Return (codes, dictionary) with dictionary[0] = None for missing values.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    return (codes + 1).tolist(), [None] + uniques.tolist()
+
+def _derived_dictionary(values, codes, size, key):
+    codes = np.asarray(codes, dtype='int64')
+    values = np.asarray(values, dtype=object)
+    dictionary = [None] * size
+    used, firsts = np.unique(codes, return_index=True)
+    for code, first in zip(used.tolist(), firsts.tolist()):
+        dictionary[code] = values[first]
+    if len(codes) and not (np.asarray(dictionary, dtype=object)[codes] == values).all():
+        raise ValueError(f"{key} is not determined by {DERIVED_KEYS[key]}")
+    return dictionary
+
+def build_lookup(columns):
+    """
+    Build the compact trees-lookup.json document from {key: [value per
+    tree]}. Coordinates are stored as integers in millionths of a degree;
+    dictionary-encoded columns hold indexes into "dictionaries".
+    """
+    count = len(columns['id'])
+    dictionaries, encoded = {}, {}
+    for key in LOOKUP_KEYS:
+        values = columns[key]
+        if key in DICTIONARY_KEYS:
+            encoded[key], dictionaries[key] = _dictionary_encode(values)
+        elif key in DERIVED_KEYS:
+            source = DERIVED_KEYS[key]
+            dictionaries[key] = _derived_dictionary(values, encoded[source], len(dictionaries[source]), key)
+        elif key in ('latitude', 'longitude'):
+            encoded[key] = np.rint(np.asarray(values, dtype='float64') * COORD_SCALE).astype('int64').tolist()
+        else:
+            encoded[key] = list(values)
+    return {
+        "count": count,
+        "coordScale": COORD_SCALE,
+        "derived": DERIVED_KEYS,
+        "dictionaries": dictionaries,
+        "columns": encoded,
+    }
+
+def decode_lookup(lookup):
+    """
+    Rebuild the per-tree property dicts from a build_lookup document.
+    """
+    columns, dictionaries = lookup["columns"], lookup["dictionaries"]
+    derived = lookup["derived"]
+    scale = lookup["coordScale"]
+    decoded = {}
+    for key in LOOKUP_KEYS:
+        if key in derived:
+            dictionary = dictionaries[key]
+            decoded[key] = [dictionary[code] for code in columns[derived[key]]]
+        elif key in dictionaries:
+            dictionary = dictionaries[key]
+            decoded[key] = [dictionary[code] for code in columns[key]]
+        elif key in ('latitude', 'longitude'):
+            decoded[key] = [round(value / scale, 6) for value in columns[key]]
+        else:
+            decoded[key] = columns[key]
+    return [dict(zip(LOOKUP_KEYS, values)) for values in zip(*(decoded[key] for key in LOOKUP_KEYS))]
+
+def write_lookup(lookup, path=LOOKUP_PATH):
+    """
+    Write the lookup minified. Returns the number of bytes written.
+    """
+    text = json.dumps(lookup, separators=(',', ':'), ensure_ascii=False)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return len(text.encode('utf-8'))
+
+class LookupWriter:
+    """
+    Build the lookup from feature chunks as they are converted, so it comes
+    out of the same run as trees.geojson instead of reading the GeoJSON
+    back. Each chunk is encoded as it arrives and its part of every column
+    appended to a temporary file per column; only the dictionaries stay in
+    memory. write() joins the parts into the same document build_lookup
+    gives for all the trees at once.
+    """
+
+    _UNSET = object()
+
+    def __init__(self):
+        self.spill = tempfile.mkdtemp(prefix='trees-lookup-')
+        self.encoded_keys = [key for key in LOOKUP_KEYS if key not in DERIVED_KEYS]
+        self.parts = {key: os.path.join(self.spill, key + '.part') for key in self.encoded_keys}
+        self.codes = {key: {} for key in DICTIONARY_KEYS}        # key -> value -> code
+        self.derived = {key: [self._UNSET] for key in DERIVED_KEYS}  # key -> value per source code
+        self.count = 0
+
+    def _append(self, key, values):
+        with open(self.parts[key], 'a', encoding='utf-8') as f:
+            f.write((',' if self.count else '') + json.dumps(values, separators=(',', ':'), ensure_ascii=False)[1:-1])
+
+    def _encode(self, key, values):
+        """
+        Dictionary-encode one chunk, continuing the codes of earlier chunks
+        so they come out as if the whole column were factorized at once.
+        """
+        chunk_codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        codes = self.codes[key]
+        for value in uniques.tolist():
+            codes.setdefault(value, len(codes) + 1)
+        mapping = np.array([0] + [codes[value] for value in uniques.tolist()], dtype='int64')
+        return mapping[chunk_codes + 1]
+
+    def _derive(self, key, values, source_codes):
+        dictionary = self.derived[key]
+        dictionary.extend([self._UNSET] * (len(self.codes[DERIVED_KEYS[key]]) + 1 - len(dictionary)))
+        values = np.asarray(values, dtype=object)
+        used, firsts = np.unique(source_codes, return_index=True)
+        for code, first in zip(used.tolist(), firsts.tolist()):
+            if dictionary[code] is self._UNSET:
+                dictionary[code] = values[first]
+        if len(values) and not (np.asarray(dictionary, dtype=object)[source_codes] == values).all():
+            raise ValueError(f"{key} is not determined by {DERIVED_KEYS[key]}")
+
+    def add_columns(self, columns):
+        """
+        Add one chunk given as {lookup key: [value per tree]}.
+        """
+        rows = len(columns['id'])
+        if not rows:
+            return
+        encoded = {}
+        for key in LOOKUP_KEYS:
+            values = columns[key]
+            if key in DICTIONARY_KEYS:
+                encoded[key] = self._encode(key, values)
+                self._append(key, encoded[key].tolist())
+            elif key in DERIVED_KEYS:
+                self._derive(key, values, encoded[DERIVED_KEYS[key]])
+            elif key in ('latitude', 'longitude'):
+                self._append(key, np.rint(np.asarray(values, dtype='float64') * COORD_SCALE).astype('int64').tolist())
+            else:
+                self._append(key, list(values))
+        self.count += rows
+
+    def add(self, features):
+        self.add_columns({key: [feature['properties'][key] for feature in features] for key in LOOKUP_KEYS})
+
+    def tee(self, feature_chunks):
+        for features in feature_chunks:
+            self.add(features)
+            yield features
+
+    def tee_rendered(self, rendered_chunks):
+        """
+        Like tee, for rendered (feature texts, lookup columns) chunks.
+        """
+        for texts, columns in rendered_chunks:
+            self.add_columns(columns)
+            yield texts, columns
+
+    def write(self, path=LOOKUP_PATH):
+        """
+        Write the lookup minified. Returns the number of bytes written.
+        """
+        dictionaries = {}
+        for key in LOOKUP_KEYS:
+            if key in DICTIONARY_KEYS:
+                dictionaries[key] = [None] + list(self.codes[key])
+            elif key in DERIVED_KEYS:
+                dictionary = self.derived[key]
+                dictionary += [self._UNSET] * (len(dictionaries[DERIVED_KEYS[key]]) - len(dictionary))
+                dictionaries[key] = [None if value is self._UNSET else value for value in dictionary]
+        dumps = lambda value: json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'{{"count":{self.count},"coordScale":{COORD_SCALE},"derived":{dumps(DERIVED_KEYS)},'
+                    f'"dictionaries":{dumps(dictionaries)},"columns":{{')
+            for i, key in enumerate(self.encoded_keys):
+                f.write(f'{"," if i else ""}{dumps(key)}:[')
+                if os.path.exists(self.parts[key]):
+                    with open(self.parts[key], 'r', encoding='utf-8') as part:
+                        shutil.copyfileobj(part, f, 1 << 20)
+                f.write(']')
+            f.write('}}')
+        shutil.rmtree(self.spill)
+        return os.path.getsize(path)
@@ -0,0 +1,294 @@
+import json
+import math
+import os
+import re
+import time
+import numpy as np
+from extract_neighborhoods import NEIGHBORHOODS_CSV, read_neighborhoods
+
+BOUNDARIES_DIR = 'neighborhoods'
+TOLERANCES = [5, 20, 50]  # metres
+# Metres per degree, for a flat approximation that is plenty at city scale
+METRES_PER_DEGREE = 111_320.0
+REFERENCE_LATITUDE = 37.76
+
+def parse_polygons(wkt):
+    """
+    Parse a WKT (MULTI)POLYGON into polygons, each a list of open (n, 2)
+    lng/lat rings (outer ring first, then holes).
+    """
+    polygons = []
+    for polygon in re.findall(r'\((\([^()]+\)(?:\s*,\s*\([^()]+\))*)\)', wkt):
+        rings = []
+        for ring in re.findall(r'\(([^()]+)\)', polygon):
+            points = np.array(ring.replace(',', ' ').split(), dtype='float64').reshape(-1, 2)
+            if len(points) > 1 and (points[0] == points[-1]).all():
+                points = points[:-1]
+            rings.append(points)
+        polygons.append(rings)
+    return polygons
+
+def to_metres(points):
+    scale = np.array([METRES_PER_DEGREE * math.cos(math.radians(REFERENCE_LATITUDE)), METRES_PER_DEGREE])
+    return points * scale
+
+def segment_distances(points, a, b):
+    """
+    Distance from each point to the segment a-b (to a itself if a == b).
+    """
+    ab = b - a
+    length = ab @ ab
+    t = np.zeros(len(points)) if length == 0 else np.clip((points - a) @ ab / length, 0, 1)
+    return np.hypot(*(points - (a + t[:, None] * ab)).T)
+
+def douglas_peucker(points, tolerance):
+    """
+    Return a mask of the points Douglas-Peucker keeps. The ends are always
+    kept. Each split measures a whole span against its chord at once.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = segment_distances(points[first + 1:last], points[first], points[last])
+        farthest = int(distances.argmax())
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack += [(first, split), (split, last)]
+    return keep
+
+def _canonical_keep(points, tolerance):
+    # Neighbors walk a shared border in opposite directions; simplifying
+    # every stretch in one canonical direction gives both the same vertices
+    if len(points) > 2 and (tuple(points[-1]), tuple(points[-2])) < (tuple(points[0]), tuple(points[1])):
+        return douglas_peucker(points[::-1], tolerance)[::-1]
+    return douglas_peucker(points, tolerance)
+
+def pinned_vertices(rings):
+    """
+    Mark, per ring, the vertices where the set of rings sharing a vertex
+    changes: the ends of every border two neighborhoods share. Rings
+    sharing no such point get their smallest vertex pinned, so rings with
+    the same vertices still start in the same place.
+    """
+    points = np.concatenate(rings)
+    ring_of = np.repeat(np.arange(len(rings)), [len(ring) for ring in rings])
+    # Exact vertex identity, on a grid far finer than the source's precision
+    keys = np.rint(points * 1e9).astype('int64')
+    _, vertex = np.unique(keys, axis=0, return_inverse=True)
+    vertex = vertex.ravel()
+    # A vertex's signature is the sum of a random 64-bit weight per distinct
+    # ring it is on: equal sets give equal sums, collisions are negligible
+    weights = np.random.default_rng(0).integers(1, 2 ** 62, len(rings), dtype='int64')
+    pairs = np.unique(np.stack([vertex, ring_of], axis=1), axis=0)
+    signature = np.zeros(vertex.max() + 1, dtype='int64')
+    np.add.at(signature, pairs[:, 0], weights[pairs[:, 1]])
+    signature = signature[vertex]
+
+    pinned, offset = [], 0
+    for ring in rings:
+        own = signature[offset:offset + len(ring)]
+        mask = (own != np.roll(own, 1)) | (own != np.roll(own, -1))
+        if not mask.any():
+            mask[np.lexsort((ring[:, 1], ring[:, 0]))[0]] = True
+        pinned.append(mask)
+        offset += len(ring)
+    return pinned
+
+def simplify_ring(ring, pinned, tolerance):
+    """
+    Simplify an open ring between its pinned vertices. Returns the kept
+    vertices as an open ring.
+    """
+    metres = to_metres(ring)
+    anchors = np.flatnonzero(pinned)
+    # Rotate so the ring starts at a pinned vertex and close it, then
+    # simplify each stretch between consecutive pinned vertices
+    order = np.r_[np.arange(anchors[0], len(ring)), np.arange(anchors[0] + 1)]
+    anchors = np.r_[anchors - anchors[0], len(ring)]
+    keep = np.zeros(len(order), dtype=bool)
+    for first, last in zip(anchors[:-1], anchors[1:]):
+        keep[first:last + 1] |= _canonical_keep(metres[order[first:last + 1]], tolerance)
+    return ring[order[keep][:-1]]
+
+def quantize(ring, digits):
+    """
+    Round to digits decimals and drop vertices that became repeats.
+    """
+    ring = np.round(ring, digits)
+    repeat = (ring == np.roll(ring, 1, axis=0)).all(axis=1)
+    return ring[~repeat] if not repeat.all() else ring[:1]
+
+def digits_for(tolerance):
+    # Round to about half the tolerance so quantizing adds little error
+    return max(0, math.ceil(math.log10(2 * METRES_PER_DEGREE / tolerance)))
+
+def ring_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+def largest_polygon(polygons):
+    return max(polygons, key=lambda rings: ring_area(rings[0]))
+
+def _label_candidates(rings, low, high, grid):
+    """
+    Score a grid of points between low and high: returns the points and
+    their distance to the nearest edge, negative for points outside.
+    """
+    xs = np.linspace(low[0], high[0], grid)
+    ys = np.linspace(low[1], high[1], grid)
+    px, py = (axis.ravel()[:, None] for axis in np.meshgrid(xs, ys))
+    start = np.concatenate(rings)
+    end = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+    x0, y0, x1, y1 = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+    # Even-odd ray cast and distance to every edge, for all candidates at once
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = ((y0 > py) != (y1 > py)) & (px < x0 + (py - y0) * (x1 - x0) / (y1 - y0))
+    inside = crossing.sum(axis=1) % 2 == 1
+    dx, dy = x1 - x0, y1 - y0
+    length = np.where(dx * dx + dy * dy == 0, 1, dx * dx + dy * dy)
+    t = np.clip(((px - x0) * dx + (py - y0) * dy) / length, 0, 1)
+    clearance = np.hypot(px - (x0 + t * dx), py - (y0 + t * dy)).min(axis=1)
+    return np.c_[px, py], np.where(inside, clearance, -1.0)
+
+def label_point(polygons, grid=32):
+    """
+    A label position well inside the largest polygon: the grid point that
+    is inside and farthest from any edge, searched coarse then fine around
+    the best coarse cell. Unlike the centroid, it can't fall outside a
+    concave neighborhood.
+    """
+    rings = [to_metres(ring) for ring in largest_polygon(polygons)]
+    low, high = rings[0].min(axis=0), rings[0].max(axis=0)
+    # Labels don't need every vertex: search a lightly simplified outline
+    tolerance = np.hypot(*(high - low)) / 200
+    rings = [ring[douglas_peucker(np.vstack([ring, ring[:1]]), tolerance)[:-1]] for ring in rings]
+    rings = [ring for ring in rings if len(ring) >= 3]
+    points, scores = _label_candidates(rings, low, high, grid)
+    best = int(np.argmax(scores))
+    if scores[best] < 0:
+        return (np.concatenate(rings).mean(axis=0) / to_metres(np.ones(2))).tolist()
+    cell = (high - low) / (grid - 1)
+    points, scores = _label_candidates(rings, points[best] - cell, points[best] + cell, grid)
+    return (points[int(np.argmax(scores))] / to_metres(np.ones(2))).tolist()
+
+def bounding_box(polygons):
+    points = np.concatenate([ring for rings in polygons for ring in rings])
+    return [*points.min(axis=0).tolist(), *points.max(axis=0).tolist()]
+
+def simplify_neighborhoods(neighborhoods, tolerance):
+    """
+    Simplify every neighborhood's polygons. Shared borders are simplified
+    identically on both sides, so neighbors stay gap-free. Holes and
+    islands that collapse are dropped; a neighborhood keeps at least its
+    largest polygon.
+    """
+    rings = [ring for polygons in neighborhoods for rings in polygons for ring in rings]
+    pinned = iter(pinned_vertices(rings))
+    digits = digits_for(tolerance)
+    simplified = []
+    for polygons in neighborhoods:
+        result = []
+        for rings in polygons:
+            kept = [quantize(simplify_ring(ring, next(pinned), tolerance), digits) for ring in rings]
+            if len(kept[0]) >= 3:
+                result.append([ring for ring in kept if len(ring) >= 3])
+        if not result:
+            result = [[quantize(largest_polygon(polygons)[0], digits)]]
+        simplified.append(result)
+    return simplified
+
+def feature_collection(names, codes, simplified, digits):
+    def closed(ring):
+        return [[round(x, digits), round(y, digits)] for x, y in np.vstack([ring, ring[:1]]).tolist()]
+
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": index,
+                "properties": {"name": name, "code": code},
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [[closed(ring) for ring in rings] for rings in polygons],
+                },
+            }
+            for index, (name, code, polygons) in enumerate(zip(names, codes, simplified))
+        ],
+    }
+
+def export_boundaries(path=NEIGHBORHOODS_CSV, tolerances=TOLERANCES, directory=BOUNDARIES_DIR,
+                      mapping_path='neighborhood_mapping.json'):
+    """
+    Write boundaries-<tolerance>m.geojson per tolerance, labels.geojson
+    and index.json with every neighborhood's label point and bounding box
+    (from the full-resolution polygons) and each file's vertex count and
+    size. Returns the index.
+    """
+    neighborhoods = read_neighborhoods(path)
+    names = [name for name, _ in neighborhoods]
+    polygons = [parse_polygons(wkt) for _, wkt in neighborhoods]
+    code_for_name = {}
+    if os.path.exists(mapping_path):
+        with open(mapping_path, 'r') as f:
+            code_for_name = {name: float(code) for code, name in json.load(f).items()}
+    codes = [code_for_name.get(name) for name in names]
+    labels = [label_point(p) for p in polygons]
+    os.makedirs(directory, exist_ok=True)
+
+    levels = []
+    for tolerance in sorted(tolerances):
+        start = time.perf_counter()
+        simplified = simplify_neighborhoods(polygons, tolerance)
+        digits = digits_for(tolerance)
+        file_name = f"boundaries-{tolerance:g}m.geojson"
+        text = json.dumps(feature_collection(names, codes, simplified, digits), separators=(',', ':'))
+        with open(os.path.join(directory, file_name), 'w') as f:
+            f.write(text)
+        levels.append({
+            "tolerance": tolerance,
+            "digits": digits,
+            "path": file_name,
+            "vertices": sum(len(ring) + 1 for p in simplified for rings in p for ring in rings),
+            "bytes": len(text.encode('utf-8')),
+            "seconds": round(time.perf_counter() - start, 3),
+        })
+
+    label_features = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": index, "properties": {"name": name, "code": code},
+             "geometry": {"type": "Point", "coordinates": [round(value, 6) for value in label]}}
+            for index, (name, code, label) in enumerate(zip(names, codes, labels))
+        ],
+    }
+    with open(os.path.join(directory, 'labels.geojson'), 'w') as f:
+        json.dump(label_features, f, separators=(',', ':'))
+
+    index = {
+        "neighborhoods": [
+            {"id": i, "name": name, "code": code, "label": [round(value, 6) for value in label],
+             "bbox": [round(value, 6) for value in bounding_box(p)]}
+            for i, (name, code, label, p) in enumerate(zip(names, codes, labels, polygons))
+        ],
+        "source": {
+            "vertices": sum(len(ring) + 1 for p in polygons for rings in p for ring in rings),
+            "bytes": os.path.getsize(path),
+        },
+        "levels": levels,
+    }
+    with open(os.path.join(directory, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def print_levels(index):
+    source = index["source"]
+    print(f"  {'source':<26} {source['vertices']:>9,} vertices {source['bytes']:>11,} bytes")
+    for level in index["levels"]:
+        print(f"  {level['path']:<26} {level['vertices']:>9,} vertices {level['bytes']:>11,} bytes"
+              f"  ({level['digits']} decimals, {level['seconds']:.2f}s)")
@@ -0,0 +1,100 @@
+import collections
+import math
+import multiprocessing
+from convert_to_geojson import build_features, coerce_cleaned_dtypes
+from lookup_export import LOOKUP_KEYS
+from shards import feature_texts
+
+# Set once per worker by _init_worker, so each task only carries its rows
+_shared = {}
+
+def _init_worker(genus_color_map, neighborhood_mapping):
+    _shared.update(genus_color_map=genus_color_map, neighborhood_mapping=neighborhood_mapping)
+
+def render(features):
+    """
+    Return (feature texts, lookup columns) for a chunk of features: the
+    text trees.geojson and the shards are written from, and the values
+    trees-lookup.json and trees.sqlite are built from.
+    """
+    columns = {key: [feature['properties'][key] for feature in features] for key in LOOKUP_KEYS}
+    return feature_texts(features), columns
+
+def render_chunks(feature_chunks):
+    for features in feature_chunks:
+        yield render(features)
+
+def _render_frame(chunk):
+    """
+    Convert one frame chunk and render it. Features are serialized here, in
+    the worker: sending the dicts back would cost the parent as much as
+    serializing them itself.
+    """
+    return render(build_features(chunk, _shared['genus_color_map'], _shared['neighborhood_mapping']))
+
+def row_ranges(rows, workers, chunksize=50000):
+    """
+    Split rows into ranges of at most chunksize, and small enough that
+    every worker gets about four, which evens out uneven ranges.
+    """
+    size = max(1, min(chunksize, math.ceil(rows / (workers * 4))))
+    return [(start, min(start + size, rows)) for start in range(0, rows, size)]
+
+def frame_slices(df, workers, chunksize=50000):
+    """
+    Cut a frame already in memory into row_ranges slices for iter_rendered_chunks.
+    """
+    df = coerce_cleaned_dtypes(df)
+    for start, stop in row_ranges(len(df), workers, chunksize):
+        yield df.iloc[start:stop]
+
+def iter_rendered_chunks(frame_chunks, genus_color_map, neighborhood_mapping, workers, in_flight=None):
+    """
+    Yield (feature texts, lookup columns) per frame chunk, in order,
+    converting the chunks in a pool of workers processes. Chunks are read
+    from frame_chunks only as results are taken, so at most in_flight
+    (twice the workers by default) are in memory at once, however large
+    the input. The mappings reach each worker once through the pool
+    initializer.
+    """
+    if workers <= 1:
+        _init_worker(genus_color_map, neighborhood_mapping)
+        yield from map(_render_frame, frame_chunks)
+        return
+    in_flight = in_flight or 2 * workers
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    with context.Pool(workers, initializer=_init_worker, initargs=(genus_color_map, neighborhood_mapping)) as pool:
+        # Pool.imap would queue every chunk up front; a window of
+        # apply_async results keeps the reader in step with the workers
+        # and hands results back in chunk order
+        pending = collections.deque()
+        for chunk in frame_chunks:
+            pending.append(pool.apply_async(_render_frame, (chunk,)))
+            if len(pending) >= in_flight:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+def write_rendered(rendered_chunks, path, ndjson=False):
+    """
+    Write rendered chunks as write_geojson would write the same features.
+    Returns the number of features written.
+    """
+    count = 0
+    with open(path, 'w') as f:
+        if not ndjson:
+            f.write('{"type":"FeatureCollection","features":[')
+        for texts, _ in rendered_chunks:
+            if not texts:
+                continue
+            if ndjson:
+                f.write('\n'.join(texts) + '\n')
+            else:
+                if count:
+                    f.write(',')
+                f.write(','.join(texts))
+            count += len(texts)
+        if not ndjson:
+            f.write(']}')
+    return count
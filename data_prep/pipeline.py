@@ -0,0 +1,228 @@
+import argparse
+import ast
+import hashlib
+import os
+import pickle
+import time
+import benefits
+import clean_trees
+import clusters
+import coordinates
+import cleanupData
+import convert_to_geojson
+import facets
+import get_different_species
+import heatmap
+import lookup_export
+import publish
+import species_normalization
+import tree_schema
+import validation
+
+CACHE_DIR = '.pipeline_cache'
+RAW_CSV = 'Street_Tree_List_20250323.csv'
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def local_imports(path):
+    """
+    Return the files of the data_prep modules a script imports, at the top
+    or inside functions. Imports only its command line uses, under
+    if __name__ == "__main__", don't count.
+    """
+    with open(path, 'r') as f:
+        tree = ast.parse(f.read(), path)
+    body = [node for node in tree.body if not (
+        isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+        and isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__'
+    )]
+    names = set()
+    for node in (child for top in body for child in ast.walk(top)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module.split('.')[0])
+    directory = os.path.dirname(path)
+    paths = [os.path.join(directory, name + '.py') for name in names]
+    return [path for path in paths if os.path.exists(path)]
+
+def module_files(path):
+    """
+    A script and every data_prep module it imports, directly or not.
+    """
+    files, pending = set(), [os.path.abspath(path)]
+    while pending:
+        path = pending.pop()
+        if path not in files:
+            files.add(path)
+            pending.extend(local_imports(path))
+    return sorted(files)
+
+def module_hash(module):
+    """
+    Hash a stage's source together with every data_prep module it imports,
+    so editing the script or anything it builds on invalidates its cache.
+    """
+    return stage_key(*(os.path.basename(path) + ':' + file_hash(path) for path in module_files(module.__file__)))
+
+def stage_key(*parts):
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+def cache_path(name, key):
+    return os.path.join(CACHE_DIR, f"{name}-{key[:16]}.pkl")
+
+def save_cache(name, key, value):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = cache_path(name, key)
+    # Drop entries left behind by earlier inputs or code for this stage
+    for entry in os.listdir(CACHE_DIR):
+        if entry.startswith(f"{name}-") and os.path.join(CACHE_DIR, entry) != path:
+            os.remove(os.path.join(CACHE_DIR, entry))
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+def run_pipeline(raw_csv=RAW_CSV, force=False, strict=False, release=False):
+    """
+    Run validation -> clean_trees -> cleanupData -> get_different_species ->
+    convert_to_geojson -> clusters -> heatmap -> facets -> publish in one
+    process, passing DataFrames between stages.
+    Each stage's output is cached under a key hashed from its inputs and
+    its script, and is only loaded from the cache when a later stage that
+    has to run needs it. With strict, the run stops after validation if
+    any error rule has violations. release publishes with the slowest,
+    smallest brotli setting.
+    """
+    keys = {}
+    results = {}
+    timings = {}
+
+    def value(name):
+        if name not in results:
+            start = time.perf_counter()
+            with open(cache_path(name, keys[name]), 'rb') as f:
+                results[name] = pickle.load(f)
+            timings[name][1] += time.perf_counter() - start
+        return results[name]
+
+    def run(name, key, compute, artifacts=()):
+        """
+        Compute a stage unless its cache entry and artifacts already exist.
+        Returns True if the stage ran.
+        """
+        keys[name] = key
+        cached = os.path.exists(cache_path(name, key)) and all(os.path.exists(a) for a in artifacts)
+        if cached and not force:
+            timings[name] = ['cached', 0.0]
+            return False
+        print(f"Running stage {name}...")
+        start = time.perf_counter()
+        results[name] = compute()
+        save_cache(name, key, results[name])
+        timings[name] = ['ran', time.perf_counter() - start]
+        return True
+
+    def write(name, write_artifact):
+        start = time.perf_counter()
+        write_artifact(value(name))
+        timings[name][1] += time.perf_counter() - start
+
+    raw_key = stage_key(file_hash(raw_csv), module_hash(tree_schema))
+    run('load', raw_key, lambda: tree_schema.load_street_trees(raw_csv, parse_dates=False))
+
+    validation_key = stage_key(raw_key, module_hash(validation))
+    validation_files = [validation.REPORT_PATH, validation.VIOLATIONS_PATH]
+    if run('validation', validation_key, lambda: validation.run_validation(value('load')), validation_files):
+        write('validation', validation.write_report)
+    failed = validation.failures(value('validation'))
+    if failed:
+        print(f"Validation failed: {', '.join(failed)} (see {validation.REPORT_PATH})")
+        if strict:
+            raise SystemExit(1)
+
+    clean_key = stage_key(raw_key, module_hash(clean_trees))
+    if run('clean_trees', clean_key, lambda: clean_trees.clean_trees(value('load')), ['cleaned_trees.csv']):
+        write('clean_trees', lambda df: df.to_csv('cleaned_trees.csv', index=False))
+
+    cleanup_key = stage_key(
+        raw_key,
+        module_hash(cleanupData),
+        module_hash(coordinates),
+        module_hash(species_normalization),
+        file_hash('species_corrections.json'),
+    )
+    if run('cleanup', cleanup_key, lambda: cleanupData.cleanup_data(value('load')), ['cleaned_street_trees.csv']):
+        write('cleanup', lambda df: df.to_csv('cleaned_street_trees.csv', index=False))
+
+    genus_key = stage_key(cleanup_key, module_hash(get_different_species))
+    genus_files = ['genus_to_species.json', 'genus_list.json']
+    if run('genus', genus_key, lambda: get_different_species.genus_to_species_map(value('cleanup')), genus_files):
+        write('genus', get_different_species.write_genus_files)
+
+    def geojson():
+        genus_color_map = convert_to_geojson.genus_colors(list(value('genus').keys()))
+        neighborhood_mapping = convert_to_geojson.load_neighborhood_mapping()
+        chunks = convert_to_geojson.iter_frame_chunks(value('cleanup'), genus_color_map, neighborhood_mapping)
+        lookup_writer = lookup_export.LookupWriter()
+        count = convert_to_geojson.write_geojson(lookup_writer.tee(chunks), 'trees.geojson')
+        lookup_writer.write(lookup_export.LOOKUP_PATH)
+        return count
+
+    geojson_key = stage_key(
+        cleanup_key,
+        genus_key,
+        module_hash(convert_to_geojson),
+        module_hash(lookup_export),
+        module_hash(benefits),
+        file_hash('neighborhood_mapping.json'),
+    )
+    run('geojson', geojson_key, geojson, ['trees.geojson', lookup_export.LOOKUP_PATH])
+
+    clusters_key = stage_key(cleanup_key, genus_key, module_hash(clusters))
+    if run('clusters', clusters_key, lambda: clusters.build_pyramid(value('cleanup')),
+           [os.path.join(clusters.CLUSTERS_DIR, 'index.json')]):
+        genus_color_map = convert_to_geojson.genus_colors(list(value('genus').keys()))
+        write('clusters', lambda result: clusters.write_pyramid(*result, genus_color_map))
+
+    heatmap_key = stage_key(cleanup_key, module_hash(heatmap), module_hash(clusters))
+    heatmap_layers = {'count': ('count', None), 'dbh': ('dbh', None)}
+    run('heatmap', heatmap_key, lambda: heatmap.build_heatmaps(value('cleanup'), heatmap_layers),
+        [os.path.join(heatmap.HEATMAP_DIR, 'index.json')])
+
+    facets_key = stage_key(
+        cleanup_key,
+        module_hash(facets),
+        module_hash(benefits),
+        module_hash(get_different_species),
+        file_hash('neighborhood_mapping.json'),
+    )
+    if run('facets', facets_key,
+           lambda: facets.build_facets(value('cleanup'), convert_to_geojson.load_neighborhood_mapping()),
+           [facets.FACETS_PATH]):
+        write('facets', facets.write_facets)
+
+    brotli_quality = publish.RELEASE_BROTLI_QUALITY if release else publish.BROTLI_QUALITY
+    publish_key = stage_key(module_hash(publish), str(brotli_quality),
+                            *(file_hash(path) for path in publish.ARTIFACTS.values()))
+    if run('publish', publish_key, lambda: publish.publish(brotli_quality=brotli_quality),
+           [os.path.join(publish.PUBLISH_DIR, publish.MANIFEST_NAME)]):
+        publish.print_manifest(value('publish'))
+
+    print("\nStage timings:")
+    for name, (status, seconds) in timings.items():
+        print(f"  {name:<12} {status:<7} {seconds:8.3f}s")
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the data_prep pipeline with cached stages")
+    parser.add_argument('--raw-csv', default=RAW_CSV, help="Street Tree List export to start from")
+    parser.add_argument('--force', action='store_true', help="ignore the cache and rerun every stage")
+    parser.add_argument('--strict', action='store_true', help="stop if the data fails an error-level validation rule")
+    parser.add_argument('--release', action='store_true', help="publish with the smallest, slowest brotli setting")
+    args = parser.parse_args()
+    run_pipeline(raw_csv=args.raw_csv, force=args.force, strict=args.strict, release=args.release)
@@ -0,0 +1,177 @@
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from lookup_export import LOOKUP_PATH
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PUBLISH_DIR = 'publish'
+MANIFEST_NAME = 'manifest.json'
+# Logical names the frontend asks for -> the files data_prep writes
+ARTIFACTS = {
+    'trees.geojson': 'trees.geojson',
+    'trees-lookup.json': LOOKUP_PATH,
+    'neighborhood_mapping.json': 'neighborhood_mapping.json',
+    'genus_to_species.json': 'genus_to_species.json',
+}
+HASH_LENGTH = 12
+GZIP_LEVEL = 9
+# Quality 9 compresses an 80 MB trees.geojson in about 8 seconds; 11 makes it
+# 26% smaller but takes over 4 minutes, which would dominate every pipeline
+# run, so it is kept for release builds (--release)
+BROTLI_QUALITY = 9
+RELEASE_BROTLI_QUALITY = 11
+# Brotli's largest window; the default 4 MB one misses repeats further apart
+# than that in trees.geojson
+BROTLI_WINDOW = 24
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+def hashed_name(name, digest):
+    """
+    trees.geojson -> trees.<digest>.geojson
+    """
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{digest}{extension}"
+
+def variant_name(file_name, encoding, brotli_quality):
+    """
+    trees.<digest>.geojson -> trees.<digest>.geojson.gz, or
+    trees.<digest>.q<quality>.geojson.br: the brotli quality is part of the
+    name so a variant made at another quality is never taken as this one.
+    """
+    if encoding == 'gzip':
+        return file_name + '.gz'
+    stem, extension = os.path.splitext(file_name)
+    return f"{stem}.q{brotli_quality}{extension}.br"
+
+def _compress(job):
+    """
+    Write one compressed variant of a file, through a temporary file so an
+    interrupted run never leaves a truncated variant behind that would be
+    taken as done. Returns (bytes written, seconds).
+    """
+    source, target, encoding, quality = job
+    start = time.perf_counter()
+    with open(source, 'rb') as f:
+        data = f.read()
+    if encoding == 'gzip':
+        # mtime=0 keeps the output identical for identical input
+        compressed = gzip.compress(data, GZIP_LEVEL, mtime=0)
+    else:
+        compressed = brotli.compress(data, quality=quality, lgwin=BROTLI_WINDOW)
+    with open(target + '.tmp', 'wb') as f:
+        f.write(compressed)
+    os.replace(target + '.tmp', target)
+    return len(compressed), time.perf_counter() - start
+
+def encodings():
+    return ['gzip', 'br'] if brotli is not None else ['gzip']
+
+def publish(artifacts=ARTIFACTS, directory=PUBLISH_DIR, workers=None, prune=False, brotli_quality=BROTLI_QUALITY):
+    """
+    Copy each artifact into directory under a content-hashed name next to
+    .gz and .br variants, and write manifest.json mapping the logical names
+    to them, so the hashed files can be served with long-lived caching.
+    Variants whose file already exists (named for the content hash and, for
+    brotli, the quality) are reused rather than compressed again. The
+    compression jobs, one per artifact and encoding, run in a pool of
+    workers processes (all CPUs by default), largest file first. Returns
+    the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    wanted = encodings()
+    if brotli is None:
+        print("brotli is not installed; writing gzip variants only")
+
+    manifest, jobs, sizes = {}, [], {}
+    for name, path in artifacts.items():
+        digest = content_hash(path)
+        file_name = hashed_name(name, digest)
+        target = os.path.join(directory, file_name)
+        if not os.path.exists(target):
+            shutil.copyfile(path, target + '.tmp')
+            os.replace(target + '.tmp', target)
+        sizes[name] = os.path.getsize(target)
+        manifest[name] = {"file": file_name, "hash": digest, "bytes": sizes[name]}
+        for encoding in wanted:
+            variant = os.path.join(directory, variant_name(file_name, encoding, brotli_quality))
+            manifest[name][encoding] = {"file": os.path.basename(variant)}
+            if encoding == 'br':
+                manifest[name][encoding]["quality"] = brotli_quality
+            if not os.path.exists(variant):
+                jobs.append((name, encoding, (target, variant, encoding, brotli_quality)))
+
+    results = {}
+    if jobs:
+        jobs.sort(key=lambda job: sizes[job[0]], reverse=True)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            for (name, encoding, _), result in zip(jobs, pool.map(_compress, [job[2] for job in jobs])):
+                results[(name, encoding)] = result
+
+    for name, entry in manifest.items():
+        for encoding in wanted:
+            variant = os.path.join(directory, entry[encoding]["file"])
+            size, seconds = results.get((name, encoding), (os.path.getsize(variant), None))
+            entry[encoding].update({"bytes": size, "seconds": round(seconds, 3) if seconds is not None else None})
+
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    if prune:
+        keep = {MANIFEST_NAME}
+        for entry in manifest.values():
+            keep.add(entry["file"])
+            keep.update(entry[encoding]["file"] for encoding in wanted)
+        for entry in os.listdir(directory):
+            if entry not in keep:
+                os.remove(os.path.join(directory, entry))
+    return manifest
+
+def print_manifest(manifest):
+    print(f"{'artifact':<28}{'bytes':>14}{'gzip':>14}{'ratio':>7}{'gzip s':>9}{'br':>14}{'ratio':>7}{'br s':>9}")
+    for name, entry in manifest.items():
+        line = f"{name:<28}{entry['bytes']:>14,}"
+        for encoding in ['gzip', 'br']:
+            if encoding not in entry:
+                line += f"{'-':>14}{'-':>7}{'-':>9}"
+                continue
+            variant = entry[encoding]
+            ratio = entry['bytes'] / variant['bytes'] if variant['bytes'] else 0
+            seconds = f"{variant['seconds']:.2f}" if variant['seconds'] is not None else 'reused'
+            line += f"{variant['bytes']:>14,}{ratio:>6.1f}x{seconds:>9}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write content-hashed, precompressed copies of the generated artifacts")
+    parser.add_argument('--output-dir', default=PUBLISH_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="compression processes (default: one per CPU)")
+    parser.add_argument('--brotli-quality', type=int, default=BROTLI_QUALITY, help="0-11; lower is much faster")
+    parser.add_argument('--release', action='store_true',
+                        help=f"compress with brotli quality {RELEASE_BROTLI_QUALITY}, the smallest and slowest")
+    parser.add_argument('--prune', action='store_true', help="remove hashed files the new manifest doesn't list")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    manifest = publish(directory=args.output_dir, workers=args.workers, prune=args.prune,
+                       brotli_quality=RELEASE_BROTLI_QUALITY if args.release else args.brotli_quality)
+    print_manifest(manifest)
+    print(f"Wrote {os.path.join(args.output_dir, MANIFEST_NAME)} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,186 @@
+import re
+from html.parser import HTMLParser
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'source', 'track', 'wbr',
+}
+
+def _clean_text(parts):
+    """
+    Collapse whitespace the way inner_text() renders normal text, where
+    each <br> (a None in parts) starts a new line.
+    """
+    lines = [[]]
+    for part in parts:
+        if part is None:
+            lines.append([])
+        else:
+            lines[-1].append(part)
+    return '\n'.join(re.sub(r'\s+', ' ', ''.join(line)).strip() for line in lines).strip()
+
+class _TreePageParser(HTMLParser):
+    """
+    Single pass over a tree-detail page collecting the text of the elements
+    species_to_link.py selects inside div.tree-name-info.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.found_info = False
+        self.fields = {}
+        self.synonyms = []
+        self.alt_names = []
+
+    def _inside(self, tag, cls):
+        return any(frame['tag'] == tag and cls in frame['classes'] for frame in self.stack)
+
+    def _capture_for(self, tag, classes, has_class):
+        if not self._inside('div', 'tree-name-info'):
+            return None
+        if tag == 'h2' and 'label-demibold' in classes:
+            return 'common_name'
+        if tag == 'span' and self._inside('p', 'tree-name-info-science-name'):
+            return 'scientific_name'
+        if tag == 'span' and 'tree-name-info-family' in classes:
+            return 'family'
+        if tag == 'p' and 'font-italic' in classes and self._inside('div', 'tree-name-info-middle-text'):
+            return 'synonyms'
+        if tag == 'p' and not has_class and self._inside('div', 'tree-name-info-right-text'):
+            return 'additional_common_names'
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'br':
+            for frame in self.stack:
+                if frame['capture']:
+                    frame['text'].append(None)
+        if tag in VOID_ELEMENTS:
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        capture = self._capture_for(tag, classes, bool(attrs.get('class')))
+        # Single-valued fields keep the first match, like query_selector
+        if capture in self.fields:
+            capture = None
+        if capture in ('common_name', 'scientific_name', 'family'):
+            self.fields[capture] = None
+        if tag == 'div' and 'tree-name-info' in classes:
+            self.found_info = True
+        self.stack.append({'tag': tag, 'classes': classes, 'capture': capture, 'text': []})
+
+    def handle_endtag(self, tag):
+        # Close any elements left open (e.g. an implied </p>) down to tag
+        if not any(frame['tag'] == tag for frame in self.stack):
+            return
+        while self.stack:
+            frame = self.stack.pop()
+            self._finish(frame)
+            if frame['tag'] == tag:
+                break
+
+    def handle_data(self, data):
+        for frame in self.stack:
+            if frame['capture']:
+                frame['text'].append(data)
+
+    def _finish(self, frame):
+        capture = frame['capture']
+        if capture == 'synonyms':
+            self.synonyms.append(_clean_text(frame['text']))
+        elif capture == 'additional_common_names':
+            self.alt_names.append(_clean_text(frame['text']))
+        elif capture:
+            self.fields[capture] = _clean_text(frame['text'])
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._finish(self.stack.pop())
+
+def parse_tree_html(html, url):
+    """
+    Extract a tree-detail record from raw page HTML without a browser.
+    Returns the same record species_to_link.py builds with Playwright, or
+    None if the page has no tree info (e.g. it is only rendered client-side).
+    """
+    parser = _TreePageParser()
+    parser.feed(html)
+    parser.close()
+    if not parser.found_info:
+        return None
+    return {
+        "common_name": parser.fields.get('common_name'),
+        "scientific_name": parser.fields.get('scientific_name'),
+        "family": parser.fields.get('family'),
+        "synonyms": parser.synonyms,
+        "additional_common_names": parser.alt_names,
+        "url": url
+    }
+
+def extract_from_page(page, url):
+    """
+    Extract a tree-detail record from a page rendered by Playwright.
+    """
+    info = page.query_selector("div.tree-name-info")
+
+    common_name = info.query_selector("h2.label-demibold")
+    scientific_name = info.query_selector("p.tree-name-info-science-name span")
+    family = info.query_selector("span.tree-name-info-family")
+
+    synonyms_div = info.query_selector("div.tree-name-info-middle-text")
+    synonyms = [el.inner_text().strip() for el in synonyms_div.query_selector_all("p.font-italic")] if synonyms_div else []
+
+    alt_names_div = info.query_selector("div.tree-name-info-right-text")
+    alt_names = [el.inner_text().strip() for el in alt_names_div.query_selector_all("p") if not el.get_attribute("class")] if alt_names_div else []
+
+    return {
+        "common_name": common_name.inner_text().strip() if common_name else None,
+        "scientific_name": scientific_name.inner_text().strip() if scientific_name else None,
+        "family": family.inner_text().strip() if family else None,
+        "synonyms": synonyms,
+        "additional_common_names": alt_names,
+        "url": url
+    }
+
+class PlaywrightExtractor:
+    """
+    Headless Chromium fallback for pages the HTML parser can't handle. The
+    browser is only launched the first time it is needed.
+    """
+
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.page = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.browser is not None:
+            self.browser.close()
+        if self.playwright is not None:
+            self.playwright.stop()
+
+    def _page(self):
+        if self.page is None:
+            from playwright.sync_api import sync_playwright
+            self.playwright = sync_playwright().start()
+            self.browser = self.playwright.chromium.launch(headless=True)
+            self.page = self.browser.new_page()
+        return self.page
+
+    def extract(self, url):
+        page = self._page()
+        page.goto(url, timeout=10000)
+        page.wait_for_selector("div.tree-name-info", timeout=3000)
+        return extract_from_page(page, url)
+
+    def extract_html(self, html, url):
+        page = self._page()
+        page.set_content(html)
+        if page.query_selector("div.tree-name-info") is None:
+            return None
+        return extract_from_page(page, url)
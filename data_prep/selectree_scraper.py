@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import time
+from urllib.parse import urlsplit
+from selectree_parser import parse_tree_html
+from species_matcher import SELECTREE_PATH
+
+BASE_URL = "https://selectree.calpoly.edu/tree-detail/"
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+OUTPUT_PATH = SELECTREE_PATH
+CHECKPOINT_PATH = 'selectree_checkpoint.jsonl'
+FAILED_PATH = 'selectree_failed_ids.json'
+LAST_TREE_ID = 2351
+
+class RateLimiter:
+    """
+    Space request starts at least 1 / rate seconds apart across all workers.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class Connection:
+    """
+    One keep-alive HTTP(S) connection, reopened after any error.
+    """
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self.conn = None
+
+    def get(self, url):
+        if self.conn is None:
+            self.conn = self.cls(self.netloc, timeout=self.timeout)
+        try:
+            self.conn.request("GET", urlsplit(url).path, headers=HEADERS)
+            response = self.conn.getresponse()
+            return response.status, response.read().decode('utf-8', errors='replace')
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def load_checkpoint(path=CHECKPOINT_PATH, output_path=OUTPUT_PATH):
+    """
+    Return ({id: record} for finished trees, set of ids known not to exist
+    or to have no tree info). Records already in the output file count as
+    finished, so a scrape made before checkpoints existed is not repeated.
+    """
+    records, missing = {}, set()
+    if os.path.exists(output_path):
+        with open(output_path, 'r') as f:
+            records.update({int(tree_id): record for tree_id, record in json.load(f).items()})
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # line cut short by an interrupted run
+                if entry.get("record") is not None:
+                    records[entry["id"]] = entry["record"]
+                elif entry.get("missing") or entry.get("not_found"):
+                    missing.add(entry["id"])
+    return records, missing
+
+def write_output(records, path=OUTPUT_PATH):
+    tree_data = {tree_id: records[tree_id] for tree_id in sorted(records)}
+    with open(path + '.tmp', 'w') as f:
+        json.dump(tree_data, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+async def scrape(tree_ids, base_url=BASE_URL, concurrency=8, rate=10.0, retries=4, backoff=1.0,
+                 timeout=10.0, parse=parse_tree_html, checkpoint_path=CHECKPOINT_PATH,
+                 output_path=OUTPUT_PATH, failed_path=FAILED_PATH, write_every=50):
+    """
+    Fetch and parse tree-detail pages with a bounded number of concurrent
+    keep-alive connections and a shared rate limit. Every finished id is
+    appended to the checkpoint, so an interrupted run resumes where it
+    stopped; the output JSON is rewritten every write_every records.
+    Transient errors are retried with exponential backoff, 404s and pages
+    without tree info are remembered as missing, and ids that still fail
+    are written to failed_path. Returns (records, failed ids).
+    """
+    records, missing = load_checkpoint(checkpoint_path, output_path)
+    queue = asyncio.Queue()
+    for tree_id in tree_ids:
+        if tree_id not in records and tree_id not in missing:
+            queue.put_nowait(tree_id)
+    total = queue.qsize()
+    print(f"{len(records)} trees already scraped, {total} to fetch")
+
+    limiter = RateLimiter(rate)
+    failed = {}
+    done = 0
+    checkpoint = open(checkpoint_path, 'a')
+
+    def finish(tree_id, **entry):
+        nonlocal done
+        checkpoint.write(json.dumps({"id": tree_id, **entry}) + '\n')
+        checkpoint.flush()
+        done += 1
+        if done % write_every == 0:
+            write_output(records, output_path)
+            print(f"{done}/{total} fetched, {len(failed)} failed")
+
+    async def fetch(connection, tree_id):
+        url = f"{base_url}{tree_id}"
+        for attempt in range(retries + 1):
+            await limiter.wait()
+            try:
+                status, html = await asyncio.to_thread(connection.get, url)
+            except (OSError, http.client.HTTPException) as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if status == 404:
+                    return finish(tree_id, missing=True)
+                if status == 200:
+                    record = parse(html, url)
+                    if record is None:
+                        # The id exists but isn't a tree; fetching it again
+                        # would only give the same page
+                        return finish(tree_id, not_found=True)
+                    records[tree_id] = record
+                    failed.pop(tree_id, None)
+                    return finish(tree_id, record=record)
+                error = f"HTTP {status}"
+            if attempt < retries:
+                await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random()))
+        failed[tree_id] = error
+        finish(tree_id, failed=error)
+
+    async def worker():
+        connection = Connection(base_url, timeout)
+        try:
+            while True:
+                try:
+                    tree_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await fetch(connection, tree_id)
+        finally:
+            connection.close()
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        checkpoint.close()
+        write_output(records, output_path)
+        with open(failed_path, 'w') as f:
+            json.dump({str(tree_id): error for tree_id, error in sorted(failed.items())}, f, indent=2)
+    print(f"Scraped {len(records)} trees, {len(failed)} failed (see {failed_path})")
+    return records, failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape SelecTree tree-detail pages")
+    parser.add_argument('--base-url', default=BASE_URL, help="tree-detail URL prefix, e.g. a local stub server")
+    parser.add_argument('--first-id', type=int, default=1)
+    parser.add_argument('--last-id', type=int, default=LAST_TREE_ID)
+    parser.add_argument('--concurrency', type=int, default=8, help="simultaneous connections")
+    parser.add_argument('--rate', type=float, default=10.0, help="maximum requests per second")
+    parser.add_argument('--retries', type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(scrape(
+        range(args.first_id, args.last_id + 1),
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        retries=args.retries,
+    ))
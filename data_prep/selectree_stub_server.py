@@ -0,0 +1,61 @@
+import argparse
+import itertools
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'selectree')
+
+def make_handler(directory, fail_every):
+    """
+    Serve <directory>/<id>.html at /tree-detail/<id>, answering every
+    fail_every-th request with a 503 so retries get exercised.
+    """
+    counter = itertools.count(1)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep connections alive
+
+        def do_GET(self):
+            if fail_every and next(counter) % fail_every == 0:
+                return self.send_body(503, b'Service Unavailable')
+            prefix, _, tree_id = self.path.rpartition('/')
+            path = os.path.join(directory, f"{tree_id}.html")
+            if prefix != '/tree-detail' or not tree_id.isdigit() or not os.path.exists(path):
+                return self.send_body(404, b'Not Found')
+            with open(path, 'rb') as f:
+                self.send_body(200, f.read())
+
+        def send_body(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def start_stub_server(directory=FIXTURES_DIR, port=0, fail_every=0):
+    """
+    Start the stub server on a background thread and return it; its
+    tree-detail prefix is base_url(server).
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(directory, fail_every))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/tree-detail/"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve SelecTree fixture pages for offline scraping")
+    parser.add_argument('--directory', default=FIXTURES_DIR)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-every', type=int, default=0, help="answer every Nth request with a 503")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args.directory, args.fail_every))
+    print(f"Serving {args.directory} at http://127.0.0.1:{args.port}/tree-detail/")
+    server.serve_forever()
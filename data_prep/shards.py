@@ -0,0 +1,172 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from get_different_species import load_species_genus
+
+SHARDS_DIR = 'shards'
+FEATURE_SEPARATOR = ',{"type":"Feature",'
+
+def feature_texts(features):
+    """
+    Serialize a list of features with one json.dumps call and cut the
+    result into each feature's text. A quote inside a JSON string is always
+    escaped, so the separator can't occur inside a value.
+    """
+    if not features:
+        return []
+    texts = json.dumps(features, separators=(',', ':'))[1:-1].split(FEATURE_SEPARATOR)
+    return [texts[0]] + ['{"type":"Feature",' + text for text in texts[1:]]
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'unknown'
+
+def default_partitions(species_genus):
+    """
+    Partition name -> function of a feature's properties giving its shard
+    key. Features don't carry their genus, so it is looked up by species
+    in species_genus ({species: cleaned Genus}).
+    """
+    return {
+        'neighborhood': lambda properties: properties['neighborhood_name'] or 'Unknown',
+        'genus': lambda properties: species_genus.get(properties['species']) or 'Unknown',
+        'species': lambda properties: properties['species'] or 'Unknown',
+    }
+
+class ShardWriter:
+    """
+    Split features into per-neighborhood, per-genus and per-species shards
+    as chunks stream past, then finish every shard as its own
+    FeatureCollection plus a manifest of counts, byte sizes and bounding
+    boxes. Each chunk's feature texts are grouped with a single factorize
+    and sort per partition and appended straight to the shard's file, so
+    only the running counts and bounding boxes stay in memory. Shards are
+    spilled to numbered part files until write() gives them their names,
+    which are only known once every key has been seen.
+    """
+
+    def __init__(self, directory=SHARDS_DIR, partitions=None):
+        self.directory = directory
+        # By default genera come from genus_to_species.json, written from
+        # the same cleaned data before the conversion
+        self.partitions = partitions if partitions is not None else default_partitions(load_species_genus())
+        os.makedirs(directory, exist_ok=True)
+        self.spill = tempfile.mkdtemp(prefix='.parts-', dir=directory)
+        self.parts = {name: {} for name in self.partitions}   # partition -> key -> part file
+        self.counts = {name: {} for name in self.partitions}  # partition -> key -> features written
+        self.bounds = {name: {} for name in self.partitions}  # partition -> key -> [w, s, e, n]
+
+    def add(self, features):
+        if not features:
+            return
+        self._add_texts(
+            feature_texts(features),
+            [f['geometry']['coordinates'][0] for f in features],
+            [f['geometry']['coordinates'][1] for f in features],
+            [f['properties'] for f in features],
+        )
+
+    def add_rendered(self, texts, columns):
+        """
+        Add features already serialized for trees.geojson, with their
+        lookup columns standing in for the properties.
+        """
+        if not texts:
+            return
+        properties = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        self._add_texts(texts, columns['longitude'], columns['latitude'], properties)
+
+    def _append(self, name, key, texts):
+        part = self.parts[name].get(key)
+        if part is None:
+            part = os.path.join(self.spill, f"{name}-{len(self.parts[name])}.part")
+            self.parts[name][key] = part
+            self.counts[name][key] = 0
+        with open(part, 'a', encoding='utf-8') as f:
+            f.write((',' if self.counts[name][key] else '') + ','.join(texts))
+        self.counts[name][key] += len(texts)
+
+    def _add_texts(self, texts, lng, lat, properties):
+        texts = np.array(texts, dtype=object)
+        lng = np.asarray(lng, dtype='float64')
+        lat = np.asarray(lat, dtype='float64')
+        for name, key_of in self.partitions.items():
+            codes, keys = pd.factorize(pd.Series([key_of(p) for p in properties], dtype=object))
+            order = np.argsort(codes, kind='stable')
+            starts = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+            group_lng, group_lat, firsts = lng[order], lat[order], starts[:-1]
+            boxes = np.column_stack([
+                np.minimum.reduceat(group_lng, firsts), np.minimum.reduceat(group_lat, firsts),
+                np.maximum.reduceat(group_lng, firsts), np.maximum.reduceat(group_lat, firsts),
+            ]).tolist()
+            grouped = texts[order].tolist()
+            for code, key in enumerate(keys):
+                self._append(name, key, grouped[starts[code]:starts[code + 1]])
+                box = boxes[code]
+                old = self.bounds[name].get(key)
+                self.bounds[name][key] = box if old is None else [
+                    min(old[0], box[0]), min(old[1], box[1]), max(old[2], box[2]), max(old[3], box[3])
+                ]
+
+    def tee(self, feature_chunks):
+        """
+        Pass feature chunks through unchanged, adding each to the shards.
+        """
+        for features in feature_chunks:
+            self.add(features)
+            yield features
+
+    def tee_rendered(self, rendered_chunks):
+        for texts, columns in rendered_chunks:
+            self.add_rendered(texts, columns)
+            yield texts, columns
+
+    def write(self):
+        """
+        Close every shard's FeatureCollection, move it into place under its
+        name and write manifest.json, returning the manifest.
+        """
+        header = '{"type":"FeatureCollection","features":['
+        manifest = {}
+        for name, parts in self.parts.items():
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+            entries, used = [], set()
+            for key in sorted(parts):
+                slug = slugify(key)
+                while slug in used:
+                    slug += '-'
+                used.add(slug)
+                path = os.path.join(name, slug + '.geojson')
+                target = os.path.join(self.directory, path)
+                with open(target + '.tmp', 'w', encoding='utf-8') as out, open(parts[key], 'r', encoding='utf-8') as f:
+                    out.write(header)
+                    shutil.copyfileobj(f, out, 1 << 20)
+                    out.write(']}')
+                os.replace(target + '.tmp', target)
+                os.remove(parts[key])
+                entries.append({
+                    "name": key,
+                    "path": path.replace(os.sep, '/'),
+                    "count": self.counts[name][key],
+                    "bytes": os.path.getsize(target),
+                    "bbox": self.bounds[name][key],
+                })
+            manifest[name] = entries
+        os.rmdir(self.spill)
+        with open(os.path.join(self.directory, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+def print_partition_sizes(manifest):
+    for name, entries in manifest.items():
+        if not entries:
+            continue
+        sizes = np.array([entry['bytes'] for entry in entries])
+        counts = np.array([entry['count'] for entry in entries])
+        largest = max(entries, key=lambda entry: entry['bytes'])
+        print(f"  {name:<12} {len(entries):>4} shards, {counts.sum():>7} trees, "
+              f"median {np.median(sizes) / 1024:,.0f} KiB, total {sizes.sum() / 1024 ** 2:,.1f} MiB, "
+              f"largest {largest['name']} ({largest['bytes'] / 1024 ** 2:,.1f} MiB)")
@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter, defaultdict
+
+# Scraped SelecTree records, kept at the repository root next to the app
+SELECTREE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                                               'selectree_detailed_tree_data.json'))
+OUTPUT_PATH = 'species_to_selectree.json'
+# Epithets the export uses for trees only identified to genus
+GENUS_ONLY = {'spp', 'spp.', 'sp', 'sp.', 'sps', 'species'}
+# A fuzzy or common-name match has to have a genus and epithet this close
+# to the street name's. Misspellings like "casurina" (0.74) or "aramata"
+# (0.67) pass; another species of the genus, like "ovata" for "odorata"
+# (0.43), doesn't
+PART_SIMILARITY = 0.6
+
+def normalize_name(name):
+    """
+    Lowercase, unify quotes and hybrid markers and collapse whitespace so
+    "Platanus × hispanica" and "platanus x  hispanica" compare equal.
+    """
+    name = name.lower().replace('’', "'").replace('‘', "'").replace('"', "'")
+    name = name.replace('×', ' x ')
+    name = re.sub(r'[^a-z0-9\'. -]', ' ', name)
+    return ' '.join(name.split())
+
+def without_cultivar(name):
+    """
+    Drop a quoted cultivar, e.g. "acer rubrum 'armstrong'" -> "acer rubrum".
+    """
+    return ' '.join(re.sub(r"'[^']*'?", ' ', name).split())
+
+def trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def dice(a, b):
+    a, b = trigrams(a), trigrams(b)
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def name_parts(name):
+    """
+    Split a normalized scientific name into (genus, epithet, genus only),
+    skipping hybrid markers and cultivars: "platanus x hispanica 'columbia'"
+    -> ('platanus', 'hispanica', False), "acer spp" -> ('acer', '', True).
+    A bare genus is genus only unless it names a cultivar
+    ("laurus x 'saratoga'").
+    """
+    base = without_cultivar(name)
+    words = [word for word in base.split() if word != 'x']
+    genus = words[0] if words else ''
+    epithet = words[1] if len(words) > 1 else ''
+    if epithet in GENUS_ONLY:
+        return genus, '', True
+    return genus, epithet, bool(genus) and not epithet and base == name
+
+def same_species(parts, name):
+    """
+    Whether a SelecTree name can be the species parts were taken from:
+    the genera, and the epithets where both have one, are at least
+    PART_SIMILARITY alike.
+    """
+    genus, epithet, _ = parts
+    other_genus, other_epithet, _ = name_parts(name)
+    if dice(genus, other_genus) < PART_SIMILARITY:
+        return False
+    return not (epithet and other_epithet) or dice(epithet, other_epithet) >= PART_SIMILARITY
+
+class SpeciesMatcher:
+    """
+    Resolve street-tree species to SelecTree records using indexes built
+    once over the SelecTree data: exact scientific names, synonyms and
+    common names, then a trigram index for fuzzy scientific-name matches.
+    Fuzzy lookups only score records sharing a trigram with the query, so
+    matching never compares every species against every record. Fuzzy and
+    common-name matches must agree with the street name's genus and
+    epithet, and genus-only names ("Acer spp") are never resolved to one
+    species.
+    """
+
+    def __init__(self, records, min_similarity=0.75):
+        self.records = records
+        self.min_similarity = min_similarity
+        self.scientific = {}
+        self.base_scientific = {}
+        self.synonyms = {}
+        self.common = defaultdict(set)
+        self.names = []  # (normalized scientific name or synonym, record id)
+        self.record_names = defaultdict(list)
+        self.trigram_index = defaultdict(list)
+
+        # Lowest id wins when several records share a name
+        for tree_id in sorted(records, key=int):
+            record = records[tree_id]
+            scientific = normalize_name(record.get('scientific_name') or '')
+            if scientific:
+                self.scientific.setdefault(scientific, tree_id)
+                self.base_scientific.setdefault(without_cultivar(scientific), tree_id)
+                self.names.append((scientific, tree_id))
+            for synonym in record.get('synonyms') or []:
+                synonym = normalize_name(synonym)
+                self.synonyms.setdefault(synonym, tree_id)
+                self.names.append((synonym, tree_id))
+            for common in [record.get('common_name')] + (record.get('additional_common_names') or []):
+                if common:
+                    self.common[normalize_name(common)].add(tree_id)
+        # Common names like "ASH" cover many records; only trust unique ones
+        self.common = {name: ids.pop() for name, ids in self.common.items() if len(ids) == 1}
+        for name, tree_id in self.names:
+            self.record_names[tree_id].append(name)
+
+        self.trigram_counts = []
+        for position, (name, _) in enumerate(self.names):
+            grams = trigrams(name)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigram_index[gram].append(position)
+
+    def fuzzy(self, name):
+        """
+        Return (record id, Dice similarity) of the closest scientific name
+        or synonym of the same species (see same_species), or (None, best
+        similarity of any name) if none is close enough.
+        """
+        query = trigrams(name)
+        parts = name_parts(name)
+        shared = Counter()
+        for gram in query:
+            shared.update(self.trigram_index.get(gram, ()))
+        best_id, best_score, closest = None, 0.0, 0.0
+        for position, count in shared.items():
+            score = 2 * count / (len(query) + self.trigram_counts[position])
+            closest = max(closest, score)
+            if score > best_score and score >= self.min_similarity and same_species(parts, self.names[position][0]):
+                best_id, best_score = self.names[position][1], score
+        if best_id is None:
+            return None, closest
+        return best_id, best_score
+
+    def match(self, species):
+        """
+        Match a "Common (Scientific)" species string. Returns
+        (record id or None, method, score); the method of an unmatched
+        species is 'genus_only' for names like "Acer spp", 'species_mismatch'
+        when a fuzzy or common-name candidate was of another species, or
+        'unmatched'.
+        """
+        # The scientific name is the last parenthesized part, as in
+        # "Walnut: Black (n.calif) (Juglans hindsii)"
+        common, _, scientific = species[:-1].rpartition(' (') if species.endswith(')') else (species, '', '')
+        scientific = normalize_name(scientific)
+        base = without_cultivar(scientific)
+        binomial = ' '.join(base.split()[:2])
+        parts = name_parts(scientific)
+        lookups = [
+            ('scientific', self.scientific, scientific),
+            ('synonym', self.synonyms, scientific),
+            ('scientific_without_cultivar', self.base_scientific, base),
+            ('synonym_without_cultivar', self.synonyms, base),
+            ('binomial', self.base_scientific, binomial),
+        ]
+        for method, index, key in lookups:
+            if key and key in index:
+                return index[key], method, 1.0
+        if parts[2]:
+            return None, 'genus_only', 0.0
+        rejected = False
+        if scientific:
+            tree_id, score = self.fuzzy(scientific)
+            if tree_id is not None:
+                return tree_id, 'fuzzy', round(score, 3)
+            rejected = score >= self.min_similarity
+        # "Shamel Ash: Evergreen Ash" lists two common names
+        for name in common.split(':'):
+            tree_id = self.common.get(normalize_name(name))
+            if tree_id is None:
+                continue
+            # Without a scientific name there is nothing to contradict it
+            if not scientific or any(same_species(parts, other) for other in self.record_names[tree_id]):
+                return tree_id, 'common_name', 1.0
+            rejected = True
+        return None, 'species_mismatch' if rejected else 'unmatched', 0.0
+
+def match_species(species_list, records):
+    """
+    Match every species, returning ({species: match} for matched species,
+    {unmatched species: why}, Counter of match methods).
+    """
+    matcher = SpeciesMatcher(records)
+    mapping, unmatched, methods = {}, {}, Counter()
+    for species in species_list:
+        tree_id, method, score = matcher.match(species)
+        methods[method] += 1
+        if tree_id is None:
+            unmatched[species] = method
+            continue
+        mapping[species] = {
+            "id": tree_id,
+            "url": records[tree_id].get('url'),
+            "match": method,
+            "score": score,
+        }
+    return mapping, unmatched, methods
+
+def load_selectree_records(path=SELECTREE_PATH):
+    """
+    Load the scraped SelecTree records, failing with a pointer to the
+    scraper if they haven't been fetched.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"SelecTree data not found at {path}; run selectree_scraper.py to fetch it")
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def match_street_species(selectree_path=SELECTREE_PATH, genus_path='genus_to_species.json',
+                         output_path=OUTPUT_PATH):
+    records = load_selectree_records(selectree_path)
+    with open(genus_path, 'r') as f:
+        species_list = sorted({s for species in json.load(f).values() for s in species})
+
+    start = time.perf_counter()
+    mapping, unmatched, methods = match_species(species_list, records)
+    elapsed = time.perf_counter() - start
+
+    with open(output_path, 'w') as f:
+        json.dump(mapping, f, indent=2, sort_keys=True)
+
+    print(f"Matched {len(mapping)}/{len(species_list)} species to SelecTree in {elapsed:.3f}s")
+    for method, count in methods.most_common():
+        print(f"  {method:<28} {count:>5}")
+    if unmatched:
+        print("Unmatched species:")
+        for species, reason in unmatched.items():
+            print(f"  {species:<70} {reason}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match street tree species to SelecTree records")
+    parser.add_argument('--selectree', default=SELECTREE_PATH)
+    parser.add_argument('--genus-to-species', default='genus_to_species.json')
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    args = parser.parse_args()
+    match_street_species(args.selectree, args.genus_to_species, args.output)
@@ -0,0 +1,71 @@
+import json
+import numpy as np
+import pandas as pd
+
+def load_species_corrections(path='species_corrections.json'):
+    """
+    Load the ordered species correction table and the species to drop.
+    """
+    with open(path, 'r') as f:
+        table = json.load(f)
+    return [(entry['from'], entry['to']) for entry in table['corrections']], set(table['drop'])
+
+def correct_species(species, corrections):
+    """
+    Apply the corrections to one raw "scientific :: common" value in
+    order, the same as one Series.replace per entry would.
+    """
+    for old, new in corrections:
+        if species == old:
+            species = new
+    return species
+
+def convert_species_format(species):
+    """
+    Convert "scientific name :: common name" to "common name (scientific name)".
+    """
+    parts = species.split(' :: ')
+    if len(parts) == 2:
+        return f"{parts[1]} ({parts[0]})"
+    return species
+
+def split_species(species):
+    """
+    Split a "Common (Scientific)" species string into (common, scientific, genus).
+    """
+    common_name = species.split('(')[0].strip()
+    scientific_name = species.split('(')[1].strip(')') if '(' in species else ''
+    genus = scientific_name.split(' ')[0] if ' ' in scientific_name else ''
+    return common_name, scientific_name, genus
+
+def _categorical(values, codes):
+    """
+    Build a categorical column from per-category values and row codes,
+    merging categories that normalize to the same value.
+    """
+    value_codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    # Missing rows have code -1, which picks the trailing -1
+    value_codes = np.append(value_codes, -1)
+    return pd.Categorical.from_codes(value_codes[codes], categories=pd.Index(uniques, dtype=object))
+
+def normalize_species(raw_species, corrections, drop):
+    """
+    Correct and reformat a raw species column in one pass over its distinct
+    values. Returns a frame of categorical Species, Common Name, Scientific
+    Name and Genus columns, aligned to raw_species, and a mask of the rows
+    to keep.
+    """
+    codes, uniques = pd.factorize(raw_species)
+    corrected = [correct_species(value, corrections) for value in uniques]
+    formatted = [convert_species_format(value) for value in corrected]
+    parts = [split_species(value) for value in formatted]
+
+    dropped = np.array([value in drop for value in corrected] + [False])
+    keep = ~dropped[codes]
+    columns = {
+        'Species': _categorical(formatted, codes),
+        'Common Name': _categorical([p[0] for p in parts], codes),
+        'Scientific Name': _categorical([p[1] for p in parts], codes),
+        'Genus': _categorical([p[2] for p in parts], codes),
+    }
+    return pd.DataFrame(columns, index=raw_species.index), keep
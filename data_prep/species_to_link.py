@@ -1,46 +1,38 @@
-from playwright.sync_api import sync_playwright
 from tqdm import tqdm
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from selectree_parser import PlaywrightExtractor, parse_tree_html
 import json
 import time
 
-tree_data = {}
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+def fetch_html(url):
+    with urlopen(Request(url, headers=HEADERS), timeout=10) as response:
+        return response.read().decode('utf-8', errors='replace')
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+tree_data = {}
+failed_ids = []
 
+# Parse the raw HTML first and only render a page in Chromium when the
+# fast path finds no tree info in it
+with PlaywrightExtractor() as playwright_extractor:
     for i in tqdm(range(1, 2352), desc="Scraping Selectree"):
         url = f"https://selectree.calpoly.edu/tree-detail/{i}"
         try:
-            page.goto(url, timeout=10000)
-            page.wait_for_selector("div.tree-name-info", timeout=3000)
-            info = page.query_selector("div.tree-name-info")
-
-            common_name = info.query_selector("h2.label-demibold")
-            scientific_name = info.query_selector("p.tree-name-info-science-name span")
-            family = info.query_selector("span.tree-name-info-family")
-
-            synonyms_div = info.query_selector("div.tree-name-info-middle-text")
-            synonyms = [el.inner_text().strip() for el in synonyms_div.query_selector_all("p.font-italic")] if synonyms_div else []
-
-            alt_names_div = info.query_selector("div.tree-name-info-right-text")
-            alt_names = [el.inner_text().strip() for el in alt_names_div.query_selector_all("p") if not el.get_attribute("class")] if alt_names_div else []
-
-            tree_data[i] = {
-                "common_name": common_name.inner_text().strip() if common_name else None,
-                "scientific_name": scientific_name.inner_text().strip() if scientific_name else None,
-                "family": family.inner_text().strip() if family else None,
-                "synonyms": synonyms,
-                "additional_common_names": alt_names,
-                "url": url
-            }
+            record = parse_tree_html(fetch_html(url), url)
+            if record is None:
+                record = playwright_extractor.extract(url)
+            tree_data[i] = record
             print(tree_data[i])
+        except HTTPError as e:
+            if e.code != 404:
+                failed_ids.append(i)
         except Exception as e:
-            # You can log or collect failed IDs here if needed
-            pass
+            failed_ids.append(i)
         time.sleep(0.05)
 
-    browser.close()
+print(f"Failed to scrape {len(failed_ids)} trees: {failed_ids}")
 
 # Save to file
 with open("selectree_detailed_tree_data.json", "w") as f:
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from coordinates import lnglat_to_state_plane
+from species_normalization import load_species_corrections
+from tree_schema import PLANT_DATE_FORMAT, RAW_DTYPES
+
+SYNTHETIC_DIR = 'synthetic'
+SIZES = [100_000, 1_000_000, 10_000_000]
+CHUNK_ROWS = 1_000_000
+# Where the trees are: SF east of Ocean Beach and south of the Presidio shore
+LAND_BOUNDS = (-122.510, 37.709, -122.370, 37.808)  # west, south, east, north
+
+# Share of rows given each kind of dirty value cleanupData, coordinates
+# and validation deal with
+DIRTY_RATES = {
+    'potential_site': 0.03,      # dropped by cleanup_data
+    'species_correction': 0.002, # a "from" value of species_corrections.json
+    'missing_dbh': 0.15,         # filled with 10
+    'zero_dbh': 0.003,           # raised to the 1 inch minimum
+    'huge_dbh': 0.0001,          # typo-sized, flagged by validation
+    'missing_lnglat': 0.01,      # recovered from XCoord/YCoord
+    'missing_xy': 0.003,
+    'duplicate_id': 0.00001,
+}
+
+LEGAL_STATUS = {
+    'DPW Maintained': 0.62, 'Permitted Site': 0.25, 'Undocumented': 0.07, 'Significant Tree': 0.02,
+    'Private': 0.015, 'Planning Code 138.1 required': 0.01, 'Property Tree': 0.008,
+    'Section 806 (d)': 0.005, 'Landmark tree': 0.002,
+}
+SITE_INFO = {
+    'Sidewalk: Curb side : Cutout': 0.70, 'Sidewalk: Property side : Cutout': 0.08,
+    'Sidewalk: Curb side : Yard': 0.05, 'Sidewalk: Property side : Yard': 0.04, 'Median : Cutout': 0.04,
+    'Sidewalk: Curb side : Pot': 0.02, 'Front Yard : Yard': 0.02, 'Median : Yard': 0.02,
+    'Back Yard : Yard': 0.01, 'Sidewalk: Curb side : Unaccepted St': 0.01, 'Hanging Pot : Cutout': 0.01,
+}
+CARETAKER = {'Private': 0.78, 'DPW': 0.16, 'Port': 0.02, 'Rec/Park': 0.02, 'SFUSD': 0.01, 'Purchasing Dept': 0.01}
+PLOT_SIZE = {'': 0.55, 'Width 3ft': 0.15, '3x3': 0.12, '4x4': 0.08, 'Width 4ft': 0.06, '3X3': 0.04}
+STREETS = [
+    'Mission St', 'Market St', 'Valencia St', 'Folsom St', 'Harrison St', 'Guerrero St', 'Dolores St',
+    'Church St', 'Castro St', 'Divisadero St', 'Fillmore St', 'Geary Blvd', 'California St', 'Clement St',
+    'Judah St', 'Irving St', 'Noriega St', 'Taraval St', 'Ocean Ave', 'Alemany Blvd', 'San Bruno Ave',
+    'Cortland Ave', 'Haight St', 'Oak St', 'Fell St', 'Hayes St', 'Grove St', 'Fulton St', 'Balboa St',
+    'Cabrillo St', 'Lake St', 'Broadway', 'Vallejo St', 'Green St', 'Union St', 'Filbert St', '3rd St',
+] + [f"{n}{'st' if n == 1 else 'nd' if n == 2 else 'rd' if n == 3 else 'th'} Ave" for n in range(1, 48)]
+
+def is_lfs_pointer(path):
+    with open(path, 'rb') as f:
+        return f.read(40).startswith(b'version https://git-lfs')
+
+def to_raw_species(species):
+    """
+    Turn a cleaned "Common (Scientific)" species back into the export's
+    "Scientific :: Common".
+    """
+    match = re.match(r'^(.*) \((.*)\)$', species)
+    return f"{match.group(2)} :: {match.group(1)}" if match else species
+
+def species_distribution(cleaned_path='cleaned_street_trees.csv', genus_path='genus_to_species.json'):
+    """
+    Return (raw species names, probabilities). Counted from the cleaned
+    export when it is checked out; otherwise every species in
+    genus_to_species.json, in its first-seen order, on a Zipf tail, which
+    is close to how the real counts fall off.
+    """
+    if os.path.exists(cleaned_path) and not is_lfs_pointer(cleaned_path):
+        counts = pd.read_csv(cleaned_path, usecols=['Species'])['Species'].dropna().value_counts()
+        names, weights = counts.index.tolist(), counts.to_numpy(dtype='float64')
+    else:
+        with open(genus_path, 'r') as f:
+            names = [name for species in json.load(f).values() for name in species if name]
+        weights = 1.0 / np.arange(1, len(names) + 1) ** 1.1
+    names = [to_raw_species(name) for name in names]
+    return names, weights / weights.sum()
+
+def _choice(rng, table, rows):
+    values = np.array(list(table), dtype=object)
+    weights = np.array(list(table.values()), dtype='float64')
+    return values[rng.choice(len(values), rows, p=weights / weights.sum())]
+
+def _where_rate(rng, rows, kind):
+    return rng.random(rows) < DIRTY_RATES[kind]
+
+def generate_chunk(rng, first_id, rows, species, neighborhoods):
+    """
+    Generate rows export rows with Tree IDs from first_id. species is
+    (names, probabilities) plus the correction and drop values to inject;
+    neighborhoods is (codes, centre lngs, centre lats, spreads).
+    """
+    names, probabilities, dirty_species, drop_species = species
+    codes, centre_lng, centre_lat, spread = neighborhoods
+
+    qspecies = np.array(names, dtype=object)[rng.choice(len(names), rows, p=probabilities)]
+    corrected = _where_rate(rng, rows, 'species_correction')
+    qspecies[corrected] = np.array(dirty_species, dtype=object)[rng.integers(0, len(dirty_species), corrected.sum())]
+    potential = _where_rate(rng, rows, 'potential_site')
+    qspecies[potential] = np.array(drop_species, dtype=object)[rng.integers(0, len(drop_species), potential.sum())]
+
+    # Trees cluster around their neighborhood's centre
+    hood = rng.integers(0, len(codes), rows)
+    west, south, east, north = LAND_BOUNDS
+    lng = np.clip(centre_lng[hood] + rng.normal(0, 1, rows) * spread[hood] * 1.27, west, east)
+    lat = np.clip(centre_lat[hood] + rng.normal(0, 1, rows) * spread[hood], south, north)
+    x, y = lnglat_to_state_plane(lng, lat)
+    lng, lat = np.round(lng, 7), np.round(lat, 7)
+    x, y = np.round(x, 3), np.round(y, 3)
+    no_lnglat = _where_rate(rng, rows, 'missing_lnglat')
+    no_xy = _where_rate(rng, rows, 'missing_xy') & ~no_lnglat
+    lat[no_lnglat], lng[no_lnglat] = np.nan, np.nan
+    x[no_xy], y[no_xy] = np.nan, np.nan
+    location = pd.Series('(' + pd.Series(lat).astype(str) + ', ' + pd.Series(lng).astype(str) + ')')
+    location[no_lnglat] = ''
+
+    dbh = np.round(np.exp(rng.normal(np.log(8), 0.7, rows)))
+    dbh[_where_rate(rng, rows, 'zero_dbh')] = 0
+    huge = _where_rate(rng, rows, 'huge_dbh')
+    dbh[huge] = rng.integers(301, 9999, huge.sum())
+    dbh[_where_rate(rng, rows, 'missing_dbh')] = np.nan
+
+    # Plant dates: about a third of the trees have one, mostly recent. The
+    # few thousand distinct days are formatted once each
+    dated = rng.random(rows) < 0.35
+    days = (2024 - 1955) * 365 - np.floor(rng.exponential(3500, dated.sum())).astype('int64')
+    unique_days, day_codes = np.unique(np.clip(days, 0, None), return_inverse=True)
+    formatted = (pd.Timestamp('1955-01-01') + pd.to_timedelta(unique_days, unit='D')).strftime(PLANT_DATE_FORMAT)
+    plant_date = np.full(rows, '', dtype=object)
+    plant_date[dated] = np.asarray(formatted, dtype=object)[day_codes.ravel()]
+
+    tree_id = np.arange(first_id, first_id + rows, dtype='int64')
+    duplicate = _where_rate(rng, rows, 'duplicate_id')
+    tree_id[duplicate] = np.maximum(first_id, tree_id[duplicate] - 1)
+    house = rng.integers(1, 4000, rows).astype(str).astype(object)
+    street = np.array(STREETS, dtype=object)[rng.integers(0, len(STREETS), rows)]
+
+    return pd.DataFrame({
+        'TreeID': tree_id,
+        'qLegalStatus': _choice(rng, LEGAL_STATUS, rows),
+        'qSpecies': qspecies,
+        'qAddress': house + ' ' + street,
+        'SiteOrder': rng.integers(1, 6, rows),
+        'qSiteInfo': _choice(rng, SITE_INFO, rows),
+        'PlantType': np.where(rng.random(rows) < 0.98, 'Tree', 'Landscaping'),
+        'qCaretaker': _choice(rng, CARETAKER, rows),
+        'qCareAssistant': np.where(rng.random(rows) < 0.05, 'FUF', ''),
+        'PlantDate': plant_date,
+        'DBH': dbh,
+        'PlotSize': _choice(rng, PLOT_SIZE, rows),
+        'PermitNotes': np.where(rng.random(rows) < 0.1, 'Permit Number ' + rng.integers(10000, 99999, rows).astype(str).astype(object), ''),
+        'XCoord': x,
+        'YCoord': y,
+        'Latitude': lat,
+        'Longitude': lng,
+        'Location': location.to_numpy(),
+        'Analysis Neighborhoods': codes[hood],
+    }, columns=list(RAW_DTYPES))
+
+def neighborhood_centres(rng, mapping_path='neighborhood_mapping.json'):
+    with open(mapping_path, 'r') as f:
+        codes = np.array(sorted(float(code) for code in json.load(f)), dtype='float64')
+    west, south, east, north = LAND_BOUNDS
+    return (
+        codes,
+        rng.uniform(west + 0.01, east - 0.01, len(codes)),
+        rng.uniform(south + 0.01, north - 0.01, len(codes)),
+        rng.uniform(0.004, 0.010, len(codes)),
+    )
+
+def generate_street_trees(path, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """
+    Write a synthetic Street_Tree_List-shaped CSV of rows trees, a chunk
+    at a time so 10M rows fit in memory. The same seed gives the same file.
+    """
+    rng = np.random.default_rng(seed)
+    names, probabilities = species_distribution()
+    corrections, drop = load_species_corrections()
+    species = (names, probabilities, [old for old, _ in corrections], sorted(drop))
+    neighborhoods = neighborhood_centres(rng)
+    for first in range(0, rows, chunk_rows):
+        chunk = generate_chunk(rng, first + 1, min(chunk_rows, rows - first), species, neighborhoods)
+        chunk.to_csv(path, mode='w' if first == 0 else 'a', header=first == 0, index=False)
+
+def synthetic_path(rows, directory=SYNTHETIC_DIR):
+    return os.path.join(directory, f"Street_Tree_List_synthetic_{rows}.csv")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Street Tree List exports")
+    parser.add_argument('--rows', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default=SYNTHETIC_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for rows in args.rows:
+        path = synthetic_path(rows, args.output_dir)
+        start = time.perf_counter()
+        generate_street_trees(path, rows, args.seed)
+        print(f"Wrote {rows:,} trees to {path} ({os.path.getsize(path):,} bytes) in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,38 @@
+import glob
+import json
+import os
+import pytest
+from selectree_parser import PlaywrightExtractor, parse_tree_html
+from selectree_stub_server import FIXTURES_DIR
+
+BASE_URL = "https://selectree.calpoly.edu/tree-detail/"
+TREE_IDS = sorted(os.path.splitext(os.path.basename(path))[0]
+                  for path in glob.glob(os.path.join(FIXTURES_DIR, '*.html')))
+
+def read_page(tree_id):
+    with open(os.path.join(FIXTURES_DIR, f"{tree_id}.html"), 'r') as f:
+        return f.read()
+
+@pytest.fixture(scope='module')
+def expected():
+    with open(os.path.join(FIXTURES_DIR, 'expected.json'), 'r') as f:
+        return json.load(f)
+
+@pytest.fixture(scope='module')
+def extractor():
+    pytest.importorskip('playwright')
+    with PlaywrightExtractor() as extractor:
+        yield extractor
+
+def test_fixtures_found():
+    assert TREE_IDS
+
+@pytest.mark.parametrize('tree_id', TREE_IDS)
+def test_html_parser_matches_expected(tree_id, expected):
+    # Pages without tree info (like 7.html) have no entry and parse to None
+    assert parse_tree_html(read_page(tree_id), f"{BASE_URL}{tree_id}") == expected.get(tree_id)
+
+@pytest.mark.parametrize('tree_id', TREE_IDS)
+def test_playwright_matches_html_parser(tree_id, extractor):
+    html, url = read_page(tree_id), f"{BASE_URL}{tree_id}"
+    assert extractor.extract_html(html, url) == parse_tree_html(html, url)
@@ -0,0 +1,50 @@
+import asyncio
+import json
+import os
+import pytest
+from selectree_scraper import scrape
+from selectree_stub_server import FIXTURES_DIR, base_url, start_stub_server
+from test_selectree_parser import TREE_IDS
+
+# One id past the fixtures, which the stub server answers with a 404
+MISSING_ID = max(int(tree_id) for tree_id in TREE_IDS) + 1
+
+@pytest.fixture
+def server():
+    # Every third request fails with a 503, so retries are exercised too
+    server = start_stub_server(fail_every=3)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def run_scrape(server, directory):
+    tree_ids = [int(tree_id) for tree_id in TREE_IDS] + [MISSING_ID]
+    return asyncio.run(scrape(
+        tree_ids, base_url=base_url(server), concurrency=2, rate=0, backoff=0,
+        checkpoint_path=os.path.join(directory, 'checkpoint.jsonl'),
+        output_path=os.path.join(directory, 'selectree.json'),
+        failed_path=os.path.join(directory, 'failed.json'),
+    ))
+
+def test_scrape_stub_server(server, tmp_path):
+    with open(os.path.join(FIXTURES_DIR, 'expected.json'), 'r') as f:
+        expected = json.load(f)
+    # Records keep the URL they were fetched from
+    expected = {tree_id: {**record, "url": f"{base_url(server)}{tree_id}"} for tree_id, record in expected.items()}
+    records, failed = run_scrape(server, tmp_path)
+    assert failed == {}
+    assert records == {int(tree_id): record for tree_id, record in expected.items()}
+    with open(tmp_path / 'selectree.json', 'r') as f:
+        assert json.load(f) == expected
+
+def test_rerun_fetches_nothing(server, tmp_path):
+    run_scrape(server, tmp_path)
+    checkpoint = (tmp_path / 'checkpoint.jsonl').read_text()
+    # Pages without tree info (7.html) and 404s are done, not failures
+    # to fetch again
+    entries = {entry['id']: entry for entry in map(json.loads, checkpoint.splitlines())}
+    assert entries[7] == {"id": 7, "not_found": True}
+    assert entries[MISSING_ID] == {"id": MISSING_ID, "missing": True}
+    records, failed = run_scrape(server, tmp_path)
+    assert failed == {}
+    assert (tmp_path / 'checkpoint.jsonl').read_text() == checkpoint
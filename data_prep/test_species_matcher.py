@@ -0,0 +1,41 @@
+import pytest
+from species_matcher import SpeciesMatcher, match_species
+
+RECORDS = {
+    '1': {'scientific_name': 'Persea americana', 'common_name': 'AVOCADO', 'additional_common_names': ['Pear Tree']},
+    '2': {'scientific_name': 'Acer rubrum', 'common_name': 'RED MAPLE', 'additional_common_names': ['Maple']},
+    '3': {'scientific_name': 'Eucalyptus ovata', 'common_name': 'SWAMP GUM'},
+    '4': {'scientific_name': 'Melaleuca styphelioides', 'common_name': 'PRICKLY PAPERBARK'},
+    '5': {'scientific_name': 'Allocasuarina verticillata', 'synonyms': ['Casuarina stricta'],
+          'common_name': 'DROOPING SHE-OAK'},
+    '6': {'scientific_name': 'Dracaena draco', 'common_name': 'DRAGON TREE'},
+    '7': {'scientific_name': 'Juglans hindsii', 'common_name': 'NORTHERN CALIFORNIA BLACK WALNUT'},
+    '8': {'scientific_name': "Laurus 'Saratoga'", 'common_name': 'SARATOGA LAUREL'},
+}
+
+@pytest.fixture(scope='module')
+def matcher():
+    return SpeciesMatcher(RECORDS)
+
+@pytest.mark.parametrize('species, expected', [
+    # Genus-only names never resolve to one species, whatever their common name
+    ("Pear Tree (Pyrus spp)", (None, 'genus_only')),
+    ("Maple (Acer spp)", (None, 'genus_only')),
+    ("California lilac (Ceanothus Sps)", (None, 'genus_only')),
+    # A close name of another species, or a common name shared with one
+    ("Peppermint Box (Eucalyptus odorata)", (None, 'species_mismatch')),
+    ("Dragon tree (Paulownia fortunei)", (None, 'species_mismatch')),
+    # Misspellings, also of the genus, and synonyms still match
+    ("Paperbark Tree (Melaleuca styphelliodes)", ('4', 'fuzzy')),
+    ("Beefwood: Drooping She-Oak (Casurina stricta)", ('5', 'fuzzy')),
+    ("Hybrid Laurel (Laurus x 'Saratoga')", ('8', 'fuzzy')),
+    ("Walnut: Black (n.calif) (Juglans hindsii)", ('7', 'scientific')),
+])
+def test_match(matcher, species, expected):
+    tree_id, method, _ = matcher.match(species)
+    assert (tree_id, method) == expected
+
+def test_unmatched_report():
+    mapping, unmatched, _ = match_species(["Pear Tree (Pyrus spp)", "Swamp Gum (Eucalyptus ovata)"], RECORDS)
+    assert list(mapping) == ["Swamp Gum (Eucalyptus ovata)"]
+    assert unmatched == {"Pear Tree (Pyrus spp)": 'genus_only'}
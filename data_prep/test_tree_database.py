@@ -0,0 +1,38 @@
+import json
+import pytest
+from lookup_export import LOOKUP_KEYS
+from tree_database import TreeDatabaseWriter, open_tree_database, search_trees
+
+SELECTREE = {
+    '1': {'scientific_name': 'Persea americana', 'common_name': 'AVOCADO',
+          'synonyms': ['Persea americana var. drymifolia'], 'additional_common_names': ['Avocado Pear', 'Pear Tree']},
+    '2': {'scientific_name': 'Pyrus calleryana', 'common_name': 'CALLERY PEAR',
+          'synonyms': [], 'additional_common_names': ['Bradford Pear']},
+}
+SPECIES = ["Pear Tree (Pyrus spp)", "Callery Pear (Pyrus calleryana)"]
+
+@pytest.fixture
+def connection(tmp_path):
+    selectree_path = tmp_path / 'selectree.json'
+    selectree_path.write_text(json.dumps(SELECTREE))
+    path = str(tmp_path / 'trees.sqlite')
+    writer = TreeDatabaseWriter(path, selectree_path=str(selectree_path))
+    features = [
+        {'properties': dict.fromkeys(LOOKUP_KEYS) | {
+            'id': i + 1, 'species': species, 'address': f"{i + 1} Main St", 'color': '#000000',
+            'latitude': 37.77, 'longitude': -122.42, 'neighborhood_name': 'Unknown'}}
+        for i, species in enumerate(SPECIES)
+    ]
+    writer.add(features)
+    writer.write()
+    connection = open_tree_database(path)
+    yield connection
+    connection.close()
+
+def other_names(connection):
+    return dict(connection.execute('SELECT name, other_names FROM species'))
+
+def test_genus_level_species_gets_no_other_species_names(connection):
+    assert other_names(connection) == {"Pear Tree (Pyrus spp)": '', "Callery Pear (Pyrus calleryana)": 'Bradford Pear'}
+    assert search_trees(connection, 'avocado') == []
+    assert [tree['species'] for tree in search_trees(connection, 'bradford')] == ["Callery Pear (Pyrus calleryana)"]
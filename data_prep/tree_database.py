@@ -0,0 +1,242 @@
+import os
+import re
+import sqlite3
+from lookup_export import LOOKUP_KEYS
+from species_matcher import SELECTREE_PATH, SpeciesMatcher, load_selectree_records
+from species_normalization import split_species
+
+TREES_DB_PATH = 'trees.sqlite'
+
+SCHEMA = """
+CREATE TABLE species (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    common_name TEXT,
+    scientific_name TEXT,
+    genus TEXT,
+    color TEXT,
+    selectree_id INTEGER,
+    other_names TEXT
+);
+CREATE TABLE neighborhoods (
+    id INTEGER PRIMARY KEY,
+    code TEXT,
+    name TEXT
+);
+CREATE TABLE trees (
+    id INTEGER PRIMARY KEY,
+    tree_id INTEGER,
+    species_id INTEGER REFERENCES species(id),
+    neighborhood_id INTEGER REFERENCES neighborhoods(id),
+    address TEXT,
+    dbh REAL,
+    plant_date TEXT,
+    site_info TEXT,
+    legal_status TEXT,
+    latitude REAL,
+    longitude REAL
+);
+CREATE VIRTUAL TABLE trees_rtree USING rtree(id, min_lng, max_lng, min_lat, max_lat);
+-- Contentless and without token positions (detail=column): only which
+-- column of which tree holds a word is stored, rowids point at trees.id.
+-- Prefix indexes make search-as-you-type prefix queries index lookups.
+CREATE VIRTUAL TABLE trees_fts USING fts5(
+    address, common_name, scientific_name, other_names,
+    content='', detail=column, prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# trees joined with its lookups, in LOOKUP_KEYS order
+SELECT_TREES = """
+SELECT t.tree_id, s.name, t.address, t.dbh, t.plant_date, t.site_info, t.legal_status,
+       n.code, s.color, t.latitude, t.longitude, n.name
+FROM trees t
+JOIN species s ON s.id = t.species_id
+JOIN neighborhoods n ON n.id = t.neighborhood_id
+"""
+
+def load_selectree_names(path=SELECTREE_PATH):
+    """
+    Return a function giving a species' (SelecTree id, other names) as
+    SpeciesMatcher resolves it. Other names are the record's synonyms and
+    extra common names, so searches for either find the trees. Species the
+    matcher leaves unmatched, genus-only ones ("Pyrus spp") and those whose
+    only candidates were of another species included, get none, so a
+    search for another species' names never finds them. Raises
+    FileNotFoundError if the SelecTree data isn't there.
+    """
+    records = load_selectree_records(path)
+    matcher = SpeciesMatcher(records)
+
+    def names_for(species):
+        record_id, _, _ = matcher.match(species)
+        if record_id is None:
+            return None, ''
+        record = records[record_id]
+        names = (record.get('synonyms') or []) + (record.get('additional_common_names') or [])
+        return int(record_id), ' | '.join(name.title() if name.isupper() else name for name in names)
+
+    return names_for
+
+class TreeDatabaseWriter:
+    """
+    Build trees.sqlite from feature chunks as they are converted, like
+    LookupWriter. Rows go in with executemany inside a single transaction;
+    the R*Tree and full-text rows are inserted alongside, and the B-tree
+    indexes are created once at the end, which is far cheaper than
+    maintaining them row by row.
+    """
+
+    def __init__(self, path=TREES_DB_PATH, selectree_path=SELECTREE_PATH):
+        # Without SelecTree data only the export's own names are searchable,
+        # so that has to be asked for with selectree_path=None
+        self.names_for = load_selectree_names(selectree_path) if selectree_path else None
+        self.path = path
+        self.building = path + '.tmp'
+        if os.path.exists(self.building):
+            os.remove(self.building)
+        self.connection = sqlite3.connect(self.building, isolation_level=None)
+        # Nothing to recover if the build dies: the half-built file is discarded
+        self.connection.execute('PRAGMA journal_mode = OFF')
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.executescript(SCHEMA)
+        self.connection.execute('BEGIN')
+        self.species = {}        # name -> (id, common, scientific, other names)
+        self.neighborhoods = {}  # (code, name) -> id
+        self.count = 0
+
+    def _species(self, name, color):
+        entry = self.species.get(name)
+        if entry is None:
+            common, scientific, genus = split_species(name)
+            selectree_id, other_names = self.names_for(name) if self.names_for and name else (None, '')
+            entry = (len(self.species) + 1, common, scientific, other_names)
+            self.species[name] = entry
+            self.connection.execute(
+                'INSERT INTO species VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (entry[0], name, common, scientific, genus, color, selectree_id, other_names),
+            )
+        return entry
+
+    def _neighborhood(self, code, name):
+        key = (code, name)
+        if key not in self.neighborhoods:
+            self.neighborhoods[key] = len(self.neighborhoods) + 1
+            self.connection.execute('INSERT INTO neighborhoods VALUES (?, ?, ?)', (self.neighborhoods[key], code, name))
+        return self.neighborhoods[key]
+
+    def add_columns(self, columns):
+        """
+        Insert one chunk given as {lookup key: [value per tree]}.
+        """
+        rows = len(columns['id'])
+        ids = range(self.count + 1, self.count + rows + 1)
+        species = [self._species(name, color) for name, color in zip(columns['species'], columns['color'])]
+        neighborhoods = [self._neighborhood(code, name)
+                         for code, name in zip(columns['neighborhood'], columns['neighborhood_name'])]
+        lng, lat = columns['longitude'], columns['latitude']
+        self.connection.executemany(
+            'INSERT INTO trees VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            zip(ids, columns['id'], (s[0] for s in species), neighborhoods, columns['address'], columns['dbh'],
+                columns['plantDate'], columns['siteInfo'], columns['legalStatus'], lat, lng),
+        )
+        self.connection.executemany('INSERT INTO trees_rtree VALUES (?, ?, ?, ?, ?)', zip(ids, lng, lng, lat, lat))
+        self.connection.executemany(
+            'INSERT INTO trees_fts (rowid, address, common_name, scientific_name, other_names) VALUES (?, ?, ?, ?, ?)',
+            ((i, address, s[1], s[2], s[3]) for i, address, s in zip(ids, columns['address'], species)),
+        )
+        self.count += rows
+
+    def add(self, features):
+        self.add_columns({key: [feature['properties'][key] for feature in features] for key in LOOKUP_KEYS})
+
+    def tee(self, feature_chunks):
+        for features in feature_chunks:
+            self.add(features)
+            yield features
+
+    def tee_rendered(self, rendered_chunks):
+        for texts, columns in rendered_chunks:
+            self.add_columns(columns)
+            yield texts, columns
+
+    def write(self):
+        """
+        Index, commit and move the database into place. Returns its size.
+        """
+        execute = self.connection.execute
+        execute('CREATE INDEX trees_tree_id ON trees(tree_id)')
+        execute('CREATE INDEX trees_species ON trees(species_id)')
+        execute('CREATE INDEX trees_neighborhood ON trees(neighborhood_id)')
+        execute("INSERT INTO trees_fts(trees_fts) VALUES ('optimize')")
+        execute('COMMIT')
+        execute('ANALYZE')
+        self.connection.close()
+        os.replace(self.building, self.path)
+        return os.path.getsize(self.path)
+
+def open_tree_database(path=TREES_DB_PATH, mmap_size=1 << 30):
+    """
+    Open trees.sqlite read-only with the whole file memory-mapped.
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    connection.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+    return connection
+
+def _properties(rows):
+    return [dict(zip(LOOKUP_KEYS, row)) for row in rows]
+
+def match_expression(text):
+    """
+    Turn typed text into an FTS5 query: every word must match, the last
+    one as a prefix so results update while it is being typed.
+    """
+    # Split where unicode61 does: a word it would split (say on "_") would
+    # otherwise become a phrase, which detail=column can't match
+    words = re.findall(r'[^\W_]+', text.lower())
+    if not words:
+        return None
+    return ' '.join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*'])
+
+def trees_in_bbox(connection, west, south, east, north, limit=None):
+    """
+    Trees inside the box, found through the R*Tree. Its float32 bounds can
+    reach slightly past the box, so the exact coordinates are checked too.
+    """
+    query = SELECT_TREES + """
+        WHERE t.id IN (SELECT id FROM trees_rtree
+                       WHERE min_lng <= ? AND max_lng >= ? AND min_lat <= ? AND max_lat >= ?)
+          AND t.longitude BETWEEN ? AND ? AND t.latitude BETWEEN ? AND ?
+        ORDER BY t.id
+    """ + ('LIMIT ?' if limit else '')
+    params = [east, west, north, south, west, east, south, north] + ([limit] if limit else [])
+    return _properties(connection.execute(query, params))
+
+def search_trees(connection, text=None, species=None, street=None, limit=20):
+    """
+    Full-text search. text matches any column as the user types; species
+    only matches species names (including SelecTree synonyms and common
+    names) and street only addresses, so search_trees(connection,
+    species='liquidambar', street='valencia st') finds every Liquidambar
+    on Valencia St.
+    """
+    clauses = []
+    for expression, columns in [(text, None), (species, '{common_name scientific_name other_names}'),
+                                (street, 'address')]:
+        match = match_expression(expression) if expression else None
+        if match:
+            clauses.append(f"{columns} : ({match})" if columns else f"({match})")
+    if not clauses:
+        return []
+    # Limit inside the subquery, so a one-letter prefix stops at the first
+    # page of matches instead of collecting every tree
+    query = SELECT_TREES + """
+        WHERE t.id IN (SELECT rowid FROM trees_fts WHERE trees_fts MATCH ? ORDER BY rowid""" + (' LIMIT ?' if limit else '') + """)
+        ORDER BY t.id
+    """
+    params = [' AND '.join(clauses)] + ([limit] if limit else [])
+    return _properties(connection.execute(query, params))
+
+def tree_by_id(connection, tree_id):
+    rows = _properties(connection.execute(SELECT_TREES + 'WHERE t.tree_id = ?', (tree_id,)))
+    return rows[0] if rows else None
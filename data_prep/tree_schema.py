@@ -0,0 +1,128 @@
+import glob
+import hashlib
+import importlib.util
+import os
+import pandas as pd
+
+# Columns of the DPW Street Tree List export that the data_prep scripts
+# use, with the dtype each is loaded as. Low-cardinality text is loaded as
+# category; PlantDate is parsed separately (see load_street_trees).
+RAW_DTYPES = {
+    'TreeID': 'Int64',
+    'qLegalStatus': 'category',
+    'qSpecies': 'category',
+    'qAddress': str,
+    'SiteOrder': 'Int64',
+    'qSiteInfo': 'category',
+    'PlantType': 'category',
+    'qCaretaker': 'category',
+    'qCareAssistant': 'category',
+    'PlantDate': str,
+    'DBH': 'float64',
+    'PlotSize': 'category',
+    'PermitNotes': str,
+    'XCoord': 'float64',
+    'YCoord': 'float64',
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+    'Location': str,
+    'Analysis Neighborhoods': 'float64',
+}
+
+PLANT_DATE_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+
+# Columns of cleaned_street_trees.csv. Everything that ends up stringified
+# in the output has a pinned dtype so every chunk formats it the same way
+# (e.g. neighborhood "5.0", never "5").
+CLEANED_DTYPES = {
+    'Tree ID': 'Int64',
+    'Legal Status': 'category',
+    'Species': 'category',
+    'Address': str,
+    'Site Info': 'category',
+    'Plant Date': str,
+    'DBH': 'float64',
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+    'Analysis Neighborhoods': 'float64',
+    'Common Name': 'category',
+    'Scientific Name': 'category',
+    'Genus': 'category',
+}
+
+def has_pyarrow():
+    return importlib.util.find_spec('pyarrow') is not None
+
+def parse_plant_dates(values):
+    """
+    Parse PlantDate with the export's fixed format, falling back to
+    per-value inference if the format ever changes.
+    """
+    try:
+        return pd.to_datetime(values, format=PLANT_DATE_FORMAT)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, errors='coerce')
+
+def _usecols(path, wanted):
+    header = pd.read_csv(path, nrows=0).columns
+    return [col for col in header if col in wanted]
+
+def _read_typed_csv(path, dtypes, columns, engine, **kwargs):
+    wanted = dtypes if columns is None else columns
+    usecols = _usecols(path, wanted)
+    dtype = {col: dtypes[col] for col in usecols if col in dtypes}
+    if engine == 'pyarrow' and not has_pyarrow():
+        print("pyarrow is not installed, reading with the default CSV engine")
+        engine = 'c'
+    if engine == 'pyarrow':
+        return pd.read_csv(path, usecols=usecols, dtype=dtype, engine='pyarrow', **kwargs)
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, low_memory=False, **kwargs)
+
+def parquet_cache_path(path):
+    """
+    Parquet cache next to a CSV, named for a hash of this module, since its
+    RAW_DTYPES and reading code decide what the cache holds: changing
+    either gives a new cache rather than reusing a stale one.
+    """
+    with open(__file__, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    return f"{os.path.splitext(path)[0]}.{digest}.parquet"
+
+def load_street_trees(path='Street_Tree_List_20250323.csv', columns=None, parse_dates=True,
+                      engine='c', parquet_cache=False):
+    """
+    Load the raw Street Tree List with explicit dtypes, reading only the
+    schema's columns (or the given subset). With parquet_cache, the typed
+    frame is also saved next to the CSV as Parquet (see parquet_cache_path)
+    and reused while it is newer than the CSV, which skips text parsing
+    entirely.
+    """
+    if parquet_cache and not has_pyarrow():
+        print("pyarrow is not installed, skipping the Parquet cache")
+        parquet_cache = False
+
+    if parquet_cache:
+        cache = parquet_cache_path(path)
+        if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(path):
+            # Drop caches written by other versions of the schema
+            for stale in glob.glob(glob.escape(os.path.splitext(path)[0]) + '.' + '[0-9a-f]' * 12 + '.parquet'):
+                os.remove(stale)
+            _read_typed_csv(path, RAW_DTYPES, None, engine).to_parquet(cache, index=False)
+        if columns is not None:
+            import pyarrow.parquet
+            cached = set(pyarrow.parquet.read_schema(cache).names)
+            columns = [col for col in columns if col in cached]
+        df = pd.read_parquet(cache, columns=columns)
+    else:
+        df = _read_typed_csv(path, RAW_DTYPES, columns, engine)
+
+    if parse_dates and 'PlantDate' in df.columns:
+        df['PlantDate'] = parse_plant_dates(df['PlantDate'])
+    return df
+
+def load_cleaned_trees(path='cleaned_street_trees.csv', columns=None, chunksize=None):
+    """
+    Load cleaned_street_trees.csv with explicit dtypes, optionally in chunks.
+    """
+    kwargs = {'chunksize': chunksize} if chunksize else {}
+    return _read_typed_csv(path, CLEANED_DTYPES, columns, 'c', **kwargs)
@@ -0,0 +1,252 @@
+import argparse
+import json
+import math
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
+
+GEOJSON_PATH = 'trees.geojson'
+EARTH_RADIUS_M = 6371008.8
+
+class TreeStore:
+    """
+    Trees held as parallel NumPy arrays plus the serialized text of each
+    feature, with a uniform lat/lng grid for spatial queries and a Tree ID
+    hash index. Points are sorted by grid cell, so every row of cells a
+    query touches is one contiguous slice of the arrays.
+    """
+
+    def __init__(self, features, texts=None, cell_size=0.002):
+        """
+        features: GeoJSON feature dicts; texts: their serialized JSON, if
+        already at hand, so it doesn't have to be encoded again.
+        """
+        self.cell_size = cell_size
+        lng = np.array([f['geometry']['coordinates'][0] for f in features], dtype='float64')
+        lat = np.array([f['geometry']['coordinates'][1] for f in features], dtype='float64')
+        self.lng0, self.lat0 = (lng.min(), lat.min()) if len(features) else (0.0, 0.0)
+        self.cols = int((lng.max() - self.lng0) // cell_size) + 1 if len(features) else 1
+        self.rows = int((lat.max() - self.lat0) // cell_size) + 1 if len(features) else 1
+
+        cells = self._cell(lng, lat)
+        order = np.argsort(cells, kind='stable')
+        self.lng, self.lat = lng[order], lat[order]
+        self.cell_starts = np.searchsorted(cells[order], np.arange(self.rows * self.cols + 1))
+
+        properties = [features[i]['properties'] for i in order]
+        self.ids = np.array([p.get('id') if p.get('id') is not None else -1 for p in properties], dtype='int64')
+        self.species_codes, self.species = pd.factorize(pd.Series([p.get('species') for p in properties], dtype=object))
+        self.nhood_codes, self.nhoods = pd.factorize(pd.Series([p.get('neighborhood_name') for p in properties], dtype=object))
+        if texts is None:
+            texts = [json.dumps(feature, separators=(',', ':')) for feature in features]
+        self.text = [texts[i] for i in order]
+        self.by_id = {tree_id: row for row, tree_id in enumerate(self.ids.tolist()) if tree_id != -1}
+
+    @classmethod
+    def from_geojson(cls, path=GEOJSON_PATH, **kwargs):
+        """
+        Load trees.geojson or trees.ndjson as written by convert_to_geojson,
+        keeping each feature's text as it is in the file.
+        """
+        with open(path, 'r') as f:
+            text = f.read()
+        if path.endswith('.ndjson'):
+            texts = text.splitlines()
+            return cls([json.loads(line) for line in texts], texts, **kwargs)
+        features = json.loads(text)['features']
+        return cls(features, _split_features(text, len(features)), **kwargs)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell(self, lng, lat):
+        col = np.clip(((lng - self.lng0) // self.cell_size).astype('int64'), 0, self.cols - 1)
+        row = np.clip(((lat - self.lat0) // self.cell_size).astype('int64'), 0, self.rows - 1)
+        return row * self.cols + col
+
+    def _candidates(self, west, south, east, north):
+        """
+        Row positions of every tree in the grid cells overlapping the box.
+        """
+        def index(value, origin, count):
+            # Clamped to one past the grid on either side before int(), which
+            # a box far outside it (or a huge radius) would overflow
+            return int(min(max(float(value - origin) // self.cell_size, -1), count))
+
+        col0 = max(index(west, self.lng0, self.cols), 0)
+        col1 = min(index(east, self.lng0, self.cols), self.cols - 1)
+        row0 = max(index(south, self.lat0, self.rows), 0)
+        row1 = min(index(north, self.lat0, self.rows), self.rows - 1)
+        if col0 > col1 or row0 > row1:
+            return np.empty(0, dtype='int64')
+        slices = [
+            np.arange(self.cell_starts[row * self.cols + col0], self.cell_starts[row * self.cols + col1 + 1])
+            for row in range(row0, row1 + 1)
+        ]
+        return np.concatenate(slices)
+
+    def _filter(self, rows, species=None, neighborhood=None):
+        if species is not None:
+            code = self.species.get_indexer([species])[0]
+            rows = rows[self.species_codes[rows] == code] if code != -1 else rows[:0]
+        if neighborhood is not None:
+            code = self.nhoods.get_indexer([neighborhood])[0]
+            rows = rows[self.nhood_codes[rows] == code] if code != -1 else rows[:0]
+        return rows
+
+    def _distances(self, rows, lat, lng):
+        """
+        Equirectangular distance in metres, accurate to well under a metre
+        at city scale.
+        """
+        dx = np.radians(self.lng[rows] - lng) * math.cos(math.radians(lat))
+        dy = np.radians(self.lat[rows] - lat)
+        return EARTH_RADIUS_M * np.hypot(dx, dy)
+
+    def _radius_box(self, lat, lng, radius):
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        return lng - dlng, lat - dlat, lng + dlng, lat + dlat
+
+    def bbox(self, west, south, east, north, species=None, neighborhood=None):
+        rows = self._filter(self._candidates(west, south, east, north), species, neighborhood)
+        inside = (self.lng[rows] >= west) & (self.lng[rows] <= east) & (self.lat[rows] >= south) & (self.lat[rows] <= north)
+        return np.sort(rows[inside])
+
+    def within(self, lat, lng, radius, species=None, neighborhood=None):
+        """
+        Rows of trees within radius metres, nearest first.
+        """
+        rows = self._filter(self._candidates(*self._radius_box(lat, lng, radius)), species, neighborhood)
+        distances = self._distances(rows, lat, lng)
+        keep = distances <= radius
+        rows, distances = rows[keep], distances[keep]
+        return rows[np.argsort(distances, kind='stable')]
+
+    def nearest(self, lat, lng, n, species=None, neighborhood=None):
+        """
+        Rows of the n trees closest to the point, nearest first. The search
+        radius doubles until it holds n trees, which then have to include
+        the n nearest.
+        """
+        radius = self.cell_size * 111000 / 2
+        extent = 2 * EARTH_RADIUS_M * math.pi
+        while True:
+            rows = self.within(lat, lng, radius, species, neighborhood)
+            if len(rows) >= n or radius > extent:
+                return rows[:n]
+            radius *= 2
+
+    def get(self, tree_id):
+        return self.by_id.get(tree_id)
+
+    def feature_collection(self, rows, limit=None):
+        if limit is not None:
+            rows = rows[:limit]
+        return '{"type":"FeatureCollection","features":[' + ','.join(self.text[i] for i in rows) + ']}'
+
+def _split_features(text, count):
+    """
+    Cut a minimally separated FeatureCollection into its features' text,
+    or return None if the file is laid out any other way. A quote inside a
+    JSON string is always escaped, so the separator can't occur in a value.
+    """
+    prefix, suffix, separator = '{"type":"FeatureCollection","features":[', ']}', ',{"type":"Feature",'
+    if not (text.startswith(prefix) and text.endswith(suffix)) or count == 0:
+        return None
+    texts = text[len(prefix):-len(suffix)].split(separator)
+    if len(texts) != count:
+        return None
+    return [texts[0]] + ['{"type":"Feature",' + t for t in texts[1:]]
+
+def _number(params, name, cast=float, default=None, minimum=None):
+    values = params.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"missing parameter '{name}'")
+        return default
+    value = cast(values[0])
+    # float() takes 'inf' and 'nan', which would overflow the grid lookups
+    if not math.isfinite(value):
+        raise ValueError(f"parameter '{name}' must be finite")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"parameter '{name}' must be at least {minimum}")
+    return value
+
+def make_handler(store):
+    """
+    GET /trees/bbox?west=&south=&east=&north=
+    GET /trees/radius?lat=&lng=&r=       (metres)
+    GET /trees/nearest?lat=&lng=&n=
+    GET /trees/<Tree ID>
+    bbox, radius and nearest accept species=, neighborhood= and limit=.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep connections alive
+        # Headers and body go out as separate writes; without TCP_NODELAY
+        # every keep-alive response waits out a delayed ACK
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = parse_qs(parts.query)
+            filters = {
+                'species': params.get('species', [None])[0],
+                'neighborhood': params.get('neighborhood', [None])[0],
+            }
+            try:
+                limit = _number(params, 'limit', int, -1)
+                limit = None if limit < 0 else limit
+                route = parts.path.rstrip('/')
+                if route == '/trees/bbox':
+                    rows = store.bbox(
+                        _number(params, 'west'), _number(params, 'south'),
+                        _number(params, 'east'), _number(params, 'north'), **filters)
+                elif route == '/trees/radius':
+                    rows = store.within(_number(params, 'lat'), _number(params, 'lng'), _number(params, 'r'), **filters)
+                elif route == '/trees/nearest':
+                    rows = store.nearest(_number(params, 'lat'), _number(params, 'lng'),
+                                         _number(params, 'n', int, 10, minimum=1), **filters)
+                elif route.startswith('/trees/') and route[len('/trees/'):].isdigit():
+                    row = store.get(int(route[len('/trees/'):]))
+                    if row is None:
+                        return self.send_body(404, '{"error":"unknown tree"}')
+                    return self.send_body(200, store.text[row])
+                else:
+                    return self.send_body(404, '{"error":"not found"}')
+            except ValueError as e:
+                return self.send_body(400, json.dumps({"error": str(e)}))
+            self.send_body(200, store.feature_collection(rows, limit))
+
+        def send_body(self, status, text):
+            body = text.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/geo+json' if status == 200 else 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def make_server(store, host='127.0.0.1', port=8000):
+    return ThreadingHTTPServer((host, port), make_handler(store))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve bbox, radius and nearest-tree queries over trees.geojson")
+    parser.add_argument('--geojson', default=GEOJSON_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    store = TreeStore.from_geojson(args.geojson)
+    print(f"Loaded {len(store)} trees in {time.perf_counter() - start:.2f}s")
+    server = make_server(store, args.host, args.port)
+    print(f"Serving tree queries at http://{args.host}:{args.port}/trees/")
+    server.serve_forever()
@@ -0,0 +1,141 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from tree_schema import load_street_trees, parse_plant_dates
+
+REPORT_PATH = 'validation.json'
+VIOLATIONS_PATH = 'validation_violations.csv'
+
+SF_BOUNDS = (-122.53, 37.70, -122.35, 37.84)  # west, south, east, north
+DBH_RANGE = (1, 300)  # inches; anything larger is almost certainly a typo
+SPECIES_FORMAT = r'^.+\s::\s.+$'  # "scientific name :: common name"
+
+def prepare(df, today=None):
+    """
+    Convert the raw export's columns the rules look at once, so every rule
+    is a cheap expression over ready-made arrays.
+    """
+    lat = pd.to_numeric(df['Latitude'], errors='coerce').to_numpy(dtype='float64')
+    lng = pd.to_numeric(df['Longitude'], errors='coerce').to_numpy(dtype='float64')
+    species = df['qSpecies'].astype('category')
+    # The regex runs once per distinct species, then is spread over the rows
+    valid_species = species.cat.categories.astype(str).str.match(SPECIES_FORMAT)
+    # Missing species have code -1, which picks the appended False
+    codes = species.cat.codes.to_numpy()
+    plant_date = df['PlantDate']
+    if not pd.api.types.is_datetime64_any_dtype(plant_date):
+        plant_date = parse_plant_dates(plant_date)
+    tree_id = df['TreeID']
+    located = ~np.isnan(lat) & ~np.isnan(lng)
+    return {
+        'lat': lat,
+        'lng': lng,
+        'located': located,
+        'dbh': pd.to_numeric(df['DBH'], errors='coerce').to_numpy(dtype='float64'),
+        'species_ok': np.append(valid_species, False)[codes],
+        'plant_date': plant_date.to_numpy(),
+        'today': np.datetime64(pd.Timestamp(today or pd.Timestamp.now()).normalize()),
+        'duplicate_id': (tree_id.duplicated(keep=False) & tree_id.notna()).to_numpy(),
+        'duplicate_point': pd.DataFrame({'lat': lat, 'lng': lng}).duplicated(keep=False).to_numpy() & located,
+    }
+
+# name -> (severity, description, mask over prepare()'s columns). Errors
+# fail the build; warnings are only reported.
+RULES = {
+    'duplicate_tree_id': (
+        'error', "Tree ID appears on more than one row",
+        lambda c: c['duplicate_id'],
+    ),
+    'outside_sf': (
+        'error', f"Latitude/Longitude outside {SF_BOUNDS}",
+        lambda c: c['located'] & ((c['lng'] < SF_BOUNDS[0]) | (c['lat'] < SF_BOUNDS[1])
+                                  | (c['lng'] > SF_BOUNDS[2]) | (c['lat'] > SF_BOUNDS[3])),
+    ),
+    'future_plant_date': (
+        'error', "PlantDate is after today",
+        lambda c: c['plant_date'] > c['today'],
+    ),
+    'dbh_range': (
+        'warning', f"DBH outside {DBH_RANGE[0]}-{DBH_RANGE[1]} inches",
+        lambda c: (c['dbh'] < DBH_RANGE[0]) | (c['dbh'] > DBH_RANGE[1]),
+    ),
+    'species_format': (
+        'warning', "qSpecies is not \"scientific name :: common name\"",
+        lambda c: ~c['species_ok'],
+    ),
+    'duplicate_coordinates': (
+        'warning', "Another tree has exactly the same Latitude/Longitude",
+        lambda c: c['duplicate_point'],
+    ),
+}
+
+def validate(df, rules=RULES, today=None):
+    """
+    Evaluate every rule over the raw export as a boolean column mask.
+    Returns {rule: mask}, in rule order.
+    """
+    columns = prepare(df, today)
+    return {name: np.asarray(mask(columns), dtype=bool) for name, (_, _, mask) in rules.items()}
+
+def build_report(df, masks, seconds, rules=RULES):
+    """
+    Summarize the masks as a JSON-ready report with the violating Tree IDs
+    (and 0-based row numbers, for rows without one) per rule.
+    """
+    tree_ids = df['TreeID'].astype(object).where(df['TreeID'].notna(), None).to_numpy()
+    report = {"rows": int(len(df)), "seconds": round(seconds, 3), "rules": {}}
+    for name, mask in masks.items():
+        severity, description, _ = rules[name]
+        rows = np.flatnonzero(mask)
+        report["rules"][name] = {
+            "severity": severity,
+            "description": description,
+            "count": int(len(rows)),
+            "ids": [None if value is None else int(value) for value in tree_ids[rows]],
+            "rows": rows.tolist(),
+        }
+    return report
+
+def failures(report):
+    """
+    Names of the error rules that have violations.
+    """
+    return [name for name, rule in report["rules"].items() if rule["severity"] == 'error' and rule["count"]]
+
+def write_report(report, path=REPORT_PATH, csv_path=VIOLATIONS_PATH):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    frames = [
+        pd.DataFrame({'rule': name, 'severity': rule["severity"], 'TreeID': pd.array(rule["ids"], dtype='Int64'),
+                      'row': rule["rows"]})
+        for name, rule in report["rules"].items() if rule["count"]
+    ]
+    columns = ['rule', 'severity', 'TreeID', 'row']
+    (pd.concat(frames) if frames else pd.DataFrame(columns=columns)).to_csv(csv_path, index=False)
+
+def run_validation(df):
+    start = time.perf_counter()
+    masks = validate(df)
+    return build_report(df, masks, time.perf_counter() - start)
+
+def print_report(report):
+    print(f"Validated {report['rows']} rows against {len(report['rules'])} rules in {report['seconds']:.3f}s")
+    for name, rule in report["rules"].items():
+        print(f"  {name:<24} {rule['severity']:<8} {rule['count']:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the raw street tree export against the data-quality rules")
+    parser.add_argument('raw_csv', nargs='?', default='Street_Tree_List_20250323.csv')
+    args = parser.parse_args()
+
+    report = run_validation(load_street_trees(args.raw_csv, parse_dates=False))
+    write_report(report)
+    print_report(report)
+    print(f"Wrote {REPORT_PATH} and {VIOLATIONS_PATH}")
+    failed = failures(report)
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
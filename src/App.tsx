@@ -77,6 +77,45 @@ interface GeoJSONResponse {
   features: GeoJSONFeature[]
 }
 
+// Compact trees-lookup.json written by data_prep/lookup_export.py: one
+// array per property, repeated strings as indexes into dictionaries, and
+// coordinates as integers scaled by coordScale
+interface TreeLookup {
+  count: number
+  coordScale: number
+  derived: Record<string, string>
+  dictionaries: Record<string, (string | null)[]>
+  columns: Record<string, (number | string | null)[]>
+}
+
+const decodeTreeLookup = (data: TreeInfo[] | TreeLookup): TreeInfo[] => {
+  if (Array.isArray(data)) return data
+  const { count, coordScale, derived, dictionaries, columns } = data
+  const value = (key: string, i: number) => {
+    if (key in derived) return dictionaries[key][columns[derived[key]][i] as number]
+    if (key in dictionaries) return dictionaries[key][columns[key][i] as number]
+    return columns[key][i]
+  }
+  const trees = new Array<TreeInfo>(count)
+  for (let i = 0; i < count; i++) {
+    trees[i] = {
+      id: value('id', i),
+      species: value('species', i),
+      address: value('address', i),
+      dbh: value('dbh', i),
+      plantDate: value('plantDate', i),
+      siteInfo: value('siteInfo', i),
+      legalStatus: value('legalStatus', i),
+      neighborhood: value('neighborhood', i),
+      color: value('color', i),
+      latitude: (columns.latitude[i] as number) / coordScale,
+      longitude: (columns.longitude[i] as number) / coordScale,
+      neighborhood_name: value('neighborhood_name', i),
+    } as TreeInfo
+  }
+  return trees
+}
+
 const subtitleStyle = {
   color: '#2e7d32',
   mb: 0.5,
@@ -609,7 +648,8 @@ function App() {
       // Extract unique species and neighborhoods, and count occurrences
       fetch('trees-lookup.json')
         .then(response => response.json())
-        .then((data: TreeInfo[]) => {
+        .then((lookup: TreeInfo[] | TreeLookup) => {
+          const data = decodeTreeLookup(lookup);
           setAllTrees(data);
           const uniqueSpecies = new Set<string>();
           const uniqueNeighborhoods = new Set<string>();